@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Brainfuck interpreter.
+
+Usage:
+    python bench_bf.py            # Run every benchmark
+    python bench_bf.py ir         # Run one benchmark
+    python bench_bf.py python     # Transpiled backend vs the IR interpreter
+    python bench_bf.py overhead   # Per-call time, peak memory and tape footprint
+    python bench_bf.py run_many   # Batch throughput against run_file per input
+    python bench_bf.py worker     # Warm worker pool against spawning bf.py per call
+    python bench_bf.py snapshot   # Runs resumed from the input-independent prefix
+    python bench_bf.py batch      # NumPy lockstep lanes against the scalar run_many loop
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import bf
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# (program, input, cell_bits). Digit-only inputs parse quickly; a ',' in
+# the input sends the digit loop through a full cell wraparound, which is
+# the O(cell value) case the IR collapses.
+PROGRAM_CASES = [
+    ('timeago.bf', '1704067170\x001704067200', 32),
+    ('timeago.bf', '1704067170,1704067200', 16),
+    ('timeago.bf', '1704067170,1704067200', 32),
+    ('duration.bf', '93661', 32),
+    ('duration.bf', '93661,', 16),
+    ('duration.bf', '93661,', 32),
+    ('date_range.bf', '1705276800\x001705881600', 32),
+    ('date_range.bf', '1705276800,1705881600', 16),
+    ('date_range.bf', '1705276800,1705881600', 32),
+]
+
+# Runs longer than this are not timed with the naive interpreter; its
+# time is extrapolated from the measured steps/sec instead
+NAIVE_STEP_LIMIT = 2_000_000
+
+
+def _best_of(fn, repeat=3):
+    """Return the fastest wall-clock time of `repeat` calls to fn()."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _read(name):
+    with open(os.path.join(HERE, name)) as f:
+        return f.read()
+
+
+def bench_ir():
+    """Compare the IR interpreter against one command at a time."""
+    naive_rate = None
+    rows = []
+    for name, input_data, cell_bits in PROGRAM_CASES:
+        code = _read(name)
+        compiled = _best_of(lambda: bf.compile_ir(code))
+        program = bf.compile_ir(code)
+        output, steps = bf.execute(code, input_data, cell_bits, max_steps=float('inf'))[:2]
+        ir = _best_of(lambda: bf.interpret(code, input_data, cell_bits, max_steps=steps))
+
+        if steps <= NAIVE_STEP_LIMIT:
+            naive = _best_of(lambda: bf._interpret_naive(code, input_data, cell_bits, max_steps=steps),
+                             repeat=1 if steps > 100_000 else 3)
+            assert bf._interpret_naive(code, input_data, cell_bits, max_steps=steps) == output
+            naive_rate = max(naive_rate or 0, steps / naive)
+            estimated = False
+        else:
+            naive = None
+            estimated = True
+        rows.append((name, input_data, cell_bits, steps, len(code), len(program), compiled, naive, ir, estimated))
+
+    for name, input_data, cell_bits, steps, chars, ops, compiled, naive, ir, estimated in rows:
+        if estimated:
+            naive = steps / naive_rate
+        print(f"{name:<14} {cell_bits:>2}-bit {input_data!r:<26} steps {steps:>14,}  "
+              f"{chars:>4} cmds -> {ops:>3} ops ({compiled * 1e6:5.0f} us)  "
+              f"naive {naive * 1e3:12,.2f} ms{'*' if estimated else ' '}  "
+              f"ir {ir * 1e3:7.3f} ms  speedup {naive / ir:14,.0f}x")
+    print(f"* estimated at the measured {naive_rate:,.0f} naive steps/sec")
+
+
+def bench_python():
+    """Compare the transpiled Python backend against the IR interpreter."""
+    import shutil
+    import tempfile
+
+    cache_dir = tempfile.mkdtemp(prefix='bfcache-')
+    try:
+        for name, input_data, cell_bits in PROGRAM_CASES:
+            code = _read(name)
+            max_steps = float('inf')
+            expected = bf.interpret(code, input_data, cell_bits, max_steps=max_steps)
+
+            def cold():
+                bf._python_runners.clear()
+                return bf._python_runner(code, cell_bits, 30000)
+
+            def from_disk():
+                bf._python_runners.clear()
+                return bf._python_runner(code, cell_bits, 30000, cache_dir)
+
+            translate = _best_of(cold)
+            from_disk()  # populate the on-disk cache
+            load = _best_of(from_disk)
+
+            run = bf._python_runner(code, cell_bits, 30000)
+            assert run(input_data, max_steps, bf._reset_tape(None, cell_bits, input_data, 30000))[0] == expected
+            ir = _best_of(lambda: bf.interpret(code, input_data, cell_bits, max_steps=max_steps), repeat=20)
+            python = _best_of(lambda: bf.interpret(code, input_data, cell_bits, max_steps=max_steps,
+                                                   backend='python'), repeat=20)
+
+            print(f"{name:<14} {cell_bits:>2}-bit {input_data!r:<26} "
+                  f"ir {ir * 1e6:7.1f} us  python {python * 1e6:7.1f} us  speedup {ir / python:5.1f}x  "
+                  f"(first call: translate {translate * 1e6:6.0f} us, from disk {load * 1e6:5.0f} us)")
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+# Hot loops that do not fold (the loop cell moves by 2), about 2.6M steps.
+# The leading , ends the input-independent prefix at step 0, so every call
+# runs the loops instead of resuming from the end-of-run snapshot.
+LONG_PROGRAM = "," + "+" * 64 + "[>" + "+" * 64 + "[>" + "+" * 254 + "[--]<-]<-]"
+
+
+def bench_overhead():
+    """Per-call time, peak traced memory and tape footprint of execute."""
+    import tracemalloc
+
+    cases = [
+        ('duration.bf', _read('duration.bf'), '93661', 32),
+        ('timeago.bf', _read('timeago.bf'), '1704067170\x001704067200', 32),
+        ('timeago.bf', _read('timeago.bf'), '1704067170\x001704067200', 8),
+        ('long run', LONG_PROGRAM, '', 32),
+    ]
+    for name, code, input_data, cell_bits in cases:
+        result = bf.execute(code, input_data, cell_bits)  # also warms the program cache
+        repeat = 3 if name == 'long run' else 200
+        fresh = _best_of(lambda: bf.execute(code, input_data, cell_bits), repeat=repeat)
+        tape = result.tape
+        reused = _best_of(lambda: bf.execute(code, input_data, cell_bits, tape=tape), repeat=repeat)
+
+        tracemalloc.start()
+        try:
+            bf.execute(code, input_data, cell_bits)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        print(f"{name:<14} {cell_bits:>2}-bit  {fresh * 1e6:12,.1f} us/call  "
+              f"reused tape {reused * 1e6:12,.1f} us/call  peak {peak:>9,} B  "
+              f"tape {result.tape_cells:>4} cells / {result.tape_bytes:>5,} B")
+
+
+def bench_run_many():
+    """Inputs/sec for run_many against calling run_file per input."""
+    import random
+
+    rng = random.Random(0)
+    path = os.path.join(HERE, 'timeago.bf')
+    code = _read('timeago.bf')
+    for size in (1_000, 10_000):
+        inputs = [f"{t}\x00{t + rng.randint(0, 10**6)}"
+                  for t in (rng.randint(10**9, 2 * 10**9) for _ in range(size))]
+        for backend in ('ir', 'python'):
+            per_call = _best_of(lambda: [bf.run_file(path, i, backend) for i in inputs], repeat=1)
+            batch = _best_of(lambda: list(bf.run_many(code, inputs, backend=backend)), repeat=1)
+            print(f"{'run_many':<14} {backend:<6} n={size:>7,}  run_file {size / per_call:9,.0f} inputs/sec  "
+                  f"run_many {size / batch:9,.0f} inputs/sec  speedup {per_call / batch:5.1f}x")
+
+
+def bench_worker():
+    """Requests/sec for a warm worker pool against spawning bf.py per call."""
+    import subprocess
+
+    import bf_worker
+
+    path = os.path.join(HERE, 'duration.bf')
+    script = os.path.join(HERE, 'bf.py')
+    input_data = '93661'  # argv cannot carry timeago's NUL separator
+    expected = bf.run_file(path, input_data)
+
+    spawns = 20
+    spawn = _best_of(lambda: [subprocess.run([sys.executable, script, path, input_data],
+                                             capture_output=True, check=True)
+                              for _ in range(spawns)], repeat=1)
+    print(f"{'spawn bf.py':<14} {spawns / spawn:9,.1f} requests/sec")
+
+    requests = 2_000
+    for size in (1, 2):
+        with bf_worker.WorkerPool(size=size) as pool:
+            assert pool.run('duration', input_data) == expected
+            pooled = _best_of(lambda: [pool.run('duration', input_data) for _ in range(requests)],
+                              repeat=1)
+        print(f"{f'pool size={size}':<14} {requests / pooled:9,.1f} requests/sec  "
+              f"speedup {spawn / spawns / (pooled / requests):7,.0f}x")
+
+
+def bench_snapshot():
+    """Per-call time resuming from the prefix snapshot against a full run."""
+    cases = [
+        ('timeago.bf', '1704067170\x001704067200'),
+        ('duration.bf', '93661'),
+        ('parse_duration.bf', '2h'),
+    ]
+    for name, input_data in cases:
+        code = _read(name)
+        instructions, loops = bf._unpack(bf._packed_program(code, 30000))
+        namespace = {'grow': bf._grow}
+        exec(bf.transpile(code), namespace)
+        full = {
+            'ir': lambda tape: bf._run_ir(instructions, loops, input_data, 32, 30000, 10**8, tape),
+            'python': lambda tape: namespace['run'](input_data, 10**8, tape),
+        }
+        for backend in ('ir', 'python'):
+            run = bf._prepare(code, 32, 30000, backend)
+            tape = bf._reset_tape(None, 32, input_data, 30000)
+            expected = full[backend](tape)
+            assert run(input_data, 10**8, bf._reset_tape(tape, 32, input_data, 30000)) == expected
+            snapshot = bf._snapshots[(code, 32, 30000)]
+
+            def calls(fn, count=2_000):
+                for _ in range(count):
+                    fn(bf._reset_tape(tape, 32, input_data, 30000))
+
+            before = _best_of(lambda: calls(full[backend])) / 2_000
+            after = _best_of(lambda: calls(lambda t: run(input_data, 10**8, t))) / 2_000
+            print(f"{name:<18} {backend:<6} prefix {snapshot[0][4]:>4} steps  "
+                  f"full {before * 1e6:6.1f} us/call  from snapshot {after * 1e6:6.1f} us/call  "
+                  f"speedup {before / after:4.2f}x")
+
+
+def bench_batch():
+    """Lanes/sec for bf_batch.run_batch against run_many, by batch size."""
+    import random
+
+    try:
+        import bf_batch
+    except ImportError:
+        print("batch: NumPy is not installed; skipped")
+        return
+
+    rng = random.Random(0)
+    code = _read('timeago.bf')
+    for size in (10, 100, 1_000, 10_000, 100_000):
+        # Mostly 10-digit timestamps, some shorter, so digit loops diverge
+        inputs = [f"{t}\x00{t + rng.randint(-10**6, 10**6)}"
+                  for t in (rng.randint(0, 2 * 10**9) for _ in range(size))]
+        expected = list(bf.run_many(code, inputs))
+        assert bf_batch.run_batch(code, inputs) == expected
+        repeat = 3 if size <= 1_000 else 1
+        scalar = {backend: _best_of(lambda: list(bf.run_many(code, inputs, backend=backend)), repeat)
+                  for backend in ('ir', 'python')}
+        batch = _best_of(lambda: bf_batch.run_batch(code, inputs), repeat)
+        print(f"{'batch':<8} n={size:>7,}  run_many ir {size / scalar['ir']:9,.0f} lanes/sec  "
+              f"python {size / scalar['python']:9,.0f} lanes/sec  "
+              f"run_batch {size / batch:9,.0f} lanes/sec  "
+              f"speedup {min(scalar.values()) / batch:5.2f}x")
+
+
+BENCHMARKS = {
+    'ir': bench_ir,
+    'python': bench_python,
+    'overhead': bench_overhead,
+    'run_many': bench_run_many,
+    'worker': bench_worker,
+    'snapshot': bench_snapshot,
+    'batch': bench_batch,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Brainfuck interpreter')
+    parser.add_argument('names', nargs='*',
+                        help=f"Benchmarks to run (default: all): {', '.join(BENCHMARKS)}")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+
+    status = 0
+    for name in args.names or BENCHMARKS:
+        if BENCHMARKS[name]() is False:
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
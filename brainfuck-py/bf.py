@@ -3,26 +3,79 @@
 Brainfuck interpreter for whenwords implementation.
 Supports extended cell size (32-bit integers) for timestamp arithmetic.
 """
+import argparse
+import hashlib
+from array import array
+from collections import namedtuple
+import json
+import marshal
+import os
 import sys
+import time
 
-def interpret(code, input_data="", cell_bits=32, tape_size=30000, max_steps=100000000):
-    """
-    Execute Brainfuck code.
+# IR opcodes. Each instruction is an (op, arg, cost) tuple, where cost is
+# the number of source commands it stands for, so the step count matches
+# a command-at-a-time interpreter exactly. For execution the tuples are
+# packed into parallel typed arrays (see _pack).
+ADD = 0       # arg: net +/- count
+MOVE = 1      # arg: net >/< count
+OUT = 2
+IN = 3
+OPEN = 4      # arg: index just past the matching CLOSE
+CLOSE = 5     # arg: index just past the matching OPEN
+CLEAR = 6     # [-] / [+]; arg: (sign, steps per iteration)
+MULADD = 7    # [->+<] etc.; arg: (sign, steps per iteration, ((offset, factor), ...))
 
-    Args:
-        code: Brainfuck source code
-        input_data: Input string
-        cell_bits: Bits per cell (32 for timestamp arithmetic)
-        tape_size: Number of cells
-        max_steps: Maximum operations before timeout
+COMMANDS = '><+-.,[]'
 
-    Returns:
-        Output string
-    """
-    # Filter to only BF commands
-    code = ''.join(c for c in code if c in '><+-.,[]')
+# Every other ASCII byte, deleted in bulk by bytes.translate
+_NON_COMMANDS = bytes(c for c in range(128) if chr(c) not in COMMANDS)
+
+# Tape array types, narrowest first, with the largest value each can hold
+_TAPE_TYPES = [(typecode, (1 << (8 * array(typecode).itemsize)) - 1) for typecode in 'BHILQ']
+
+BACKENDS = ('ir', 'python', 'naive')
 
-    # Precompute bracket jumps
+# Bump when transpile output changes, to invalidate on-disk caches
+TRANSPILER_VERSION = 4
+
+# CPython allows 20 statically nested blocks; deeper programs use the IR
+_MAX_LOOP_DEPTH = 18
+
+RunResult = namedtuple('RunResult', ['output', 'steps', 'tape_cells', 'tape_bytes', 'tape'])
+RunResult.__doc__ = """\
+Output of execute, with the run's footprint.
+
+output: Output string
+steps: Source commands executed
+tape_cells: High-water mark, the number of leading cells the run reached
+tape_bytes: Memory held by those cells
+tape: The tape itself; pass it back as execute(..., tape=) to reuse it
+"""
+
+# Step budget for the run that takes a snapshot for the python backend
+_SNAPSHOT_STEPS = 1000000
+
+# Output bytes stream() collects before writing them, and the most input
+# it reads at once
+STREAM_BUFFER_SIZE = 8192
+
+# Packed IR, snapshots and transpiled run functions kept in memory
+_IR_CACHE_SIZE = 128
+_packed_programs = {}
+_snapshots = {}
+_PYTHON_CACHE_SIZE = 128
+_python_runners = {}
+
+
+def _filter(code):
+    """Keep only the eight Brainfuck commands."""
+    # The commands are ASCII, so anything else can go while encoding
+    return code.encode('ascii', 'ignore').translate(None, _NON_COMMANDS).decode('ascii')
+
+
+def _match_brackets(code):
+    """Map each bracket index to its partner's index."""
     brackets = {}
     stack = []
     for i, c in enumerate(code):
@@ -36,8 +89,570 @@ def interpret(code, input_data="", cell_bits=32, tape_size=30000, max_steps=1000
             brackets[i] = j
     if stack:
         raise ValueError("Unmatched [")
+    return brackets
+
+
+def _linear_loop(body, tape_size):
+    """
+    Describe a loop body as CLEAR or MULADD, or return None.
+
+    The body must contain only +-<>, return the pointer to where it
+    started and change the loop cell by exactly -1 or +1 per iteration.
+    Every other touched cell then changes by a fixed amount per
+    iteration, so the whole loop runs in one step.
+    """
+    offset = 0
+    deltas = {}
+    for c in body:
+        if c == '>':
+            offset += 1
+        elif c == '<':
+            offset -= 1
+        elif c == '+':
+            deltas[offset] = deltas.get(offset, 0) + 1
+        elif c == '-':
+            deltas[offset] = deltas.get(offset, 0) - 1
+        else:
+            return None
+    if offset != 0:
+        return None
+    center = deltas.pop(0, 0)
+    if center not in (-1, 1):
+        return None
+    # Offsets that alias on a small wrapping tape would need the slow path
+    if deltas and max(max(deltas), 0) - min(min(deltas), 0) >= tape_size:
+        return None
+
+    # sign turns the cell value into the iteration count: v for [-], -v for [+]
+    sign = -center
+    per_iteration = len(body) + 1  # the body plus its ]
+    if not deltas:
+        return (CLEAR, (sign, per_iteration), 1)
+    return (MULADD, (sign, per_iteration, tuple(sorted(deltas.items()))), 1)
+
+
+def compile_ir(code, tape_size=30000, spans=None):
+    """
+    Compile Brainfuck source to a list of (op, arg, cost) instructions.
+
+    Runs of +/- and >/< fold into one ADD or MOVE, [-] and [+] become
+    CLEAR, balanced loops such as [->+<] or [->++>+++<<] become MULADD,
+    and bracket jump targets are resolved up front.
+
+    Args:
+        spans: Optional list to receive, per instruction, the (start, end)
+            range of commands it was compiled from, as indices into the
+            commands of code with everything else removed
+
+    Raises:
+        ValueError: On unmatched brackets
+    """
+    code = _filter(code)
+    brackets = _match_brackets(code)
+
+    program = []
+    opens = []
+    i = 0
+    n = len(code)
+    while i < n:
+        c = code[i]
+        j = i + 1
+        if c in '+-':
+            j = i
+            total = 0
+            while j < n and code[j] in '+-':
+                total += 1 if code[j] == '+' else -1
+                j += 1
+            program.append((ADD, total, j - i))
+        elif c in '><':
+            j = i
+            total = 0
+            while j < n and code[j] in '><':
+                total += 1 if code[j] == '>' else -1
+                j += 1
+            program.append((MOVE, total, j - i))
+        elif c == '.':
+            program.append((OUT, None, 1))
+        elif c == ',':
+            program.append((IN, None, 1))
+        elif c == '[':
+            end = brackets[i]
+            loop = _linear_loop(code[i + 1:end], tape_size)
+            if loop is not None:
+                program.append(loop)
+                j = end + 1
+            else:
+                opens.append(len(program))
+                program.append(None)  # patched at the matching ]
+        else:
+            start = opens.pop()
+            program[start] = (OPEN, len(program) + 1, 1)
+            program.append((CLOSE, start + 1, 1))
+        if spans is not None:
+            spans.append((i, j))
+        i = j
+    return program
+
+
+def interpret(code, input_data="", cell_bits=32, tape_size=30000, max_steps=100000000,
+              backend='ir', profile=None):
+    """
+    Execute Brainfuck code.
+
+    Output and the step limit are the same for every backend:
+
+        'ir'      compile with compile_ir and run the instructions (default)
+        'python'  transpile to Python source and run the compiled code;
+                  falls back to 'ir' for loops nested too deep for CPython
+        'naive'   one source command at a time
+
+    Args:
+        code: Brainfuck source code
+        input_data: Input string
+        cell_bits: Bits per cell (32 for timestamp arithmetic)
+        tape_size: Number of cells
+        max_steps: Maximum operations before timeout
+        backend: One of BACKENDS
+        profile: A Profile to fill in. The IR instructions then run with
+            counters whatever the backend; without one there is no cost
+
+    Returns:
+        Output string
+    """
+    if profile is not None:
+        return _profile(code, input_data, cell_bits, tape_size, max_steps, profile)
+    if backend == 'naive':
+        return _interpret_naive(code, input_data, cell_bits, tape_size, max_steps)
+    return execute(code, input_data, cell_bits, tape_size, max_steps, backend).output
+
+
+def execute(code, input_data="", cell_bits=32, tape_size=30000, max_steps=100000000,
+            backend='ir', tape=None):
+    """
+    Execute Brainfuck code and report the run's footprint.
+
+    Takes the same arguments as interpret ('ir' or 'python' backend). The
+    tape starts at one cell and grows as the pointer reaches new cells,
+    including cells reached by wrapping left of cell 0 (see _grow).
+
+    Args:
+        tape: A tape from an earlier RunResult to reuse; only the cells that
+            run reached are cleared
+
+    Returns:
+        RunResult
+    """
+    run = _prepare(code, cell_bits, tape_size, backend)
+    tape = _reset_tape(tape, cell_bits, input_data, tape_size)
+    output, steps = run(input_data, max_steps, tape)
+    return RunResult(output, steps, len(tape), len(tape) * _itemsize(tape), tape)
+
+
+def run_many(code, inputs, cell_bits=32, tape_size=30000, max_steps=100000000, backend='ir'):
+    """
+    Run one program over many inputs, yielding each output in order.
+
+    The program is compiled once and a single tape is reused, clearing
+    only the cells the previous input reached. Takes the same arguments
+    as interpret ('ir' or 'python' backend); max_steps applies per input.
+    Outputs are produced lazily, so inputs can be a stream.
+
+    Raises:
+        RuntimeError: When an input exceeds max_steps; the generator stops
+    """
+    run = _prepare(code, cell_bits, tape_size, backend)
+    tape = None
+    for input_data in inputs:
+        tape = _reset_tape(tape, cell_bits, input_data, tape_size)
+        yield run(input_data, max_steps, tape)[0]
+
+
+def stream(code, source=None, sink=None, cell_bits=32, tape_size=30000, max_steps=100000000,
+           buffer_size=STREAM_BUFFER_SIZE, line_buffered=False):
+    """
+    Run Brainfuck code, reading input only as , needs it and writing
+    output while the program runs.
+
+    interpret(code, text) equals the bytes written for source=text,
+    decoded as Latin-1. Neither input nor output is held in full, so
+    memory does not grow with either. Runs use the 'ir' backend.
+
+    Args:
+        source: A str, bytes, a text or binary file object, or an
+            iterable of str or bytes chunks. Characters and bytes are
+            read one per ,; None is empty input
+        sink: A callable taking bytes, or a binary stream to write to
+            (and flush, if it can be); None discards output
+        buffer_size: Output bytes collected before they are written;
+            1 writes each byte as soon as it is output
+        line_buffered: Also write after each newline
+
+    Pending output is also written before each , and when the run ends,
+    including when it raises, so it is never held while the program
+    waits for input.
+
+    Returns:
+        Steps executed
+
+    Raises:
+        RuntimeError: If execution exceeds max_steps
+        ValueError: On unmatched brackets
+    """
+    if callable(sink):
+        write = sink
+    else:
+        def write(data):
+            if sink is not None:
+                sink.write(data)
+                if hasattr(sink, 'flush'):
+                    sink.flush()
+    out = _Sink(write, buffer_size, line_buffered)
+    run = _prepare(code, cell_bits, tape_size, 'ir')
+    # Any character may arrive, so the tape is typed for the widest
+    tape = _reset_tape(None, cell_bits, chr(sys.maxunicode), tape_size)
+    try:
+        return run(_input_values(source), max_steps, tape, out)[1]
+    finally:
+        out.flush()
+
+
+class _Sink:
+    """Output buffer for stream; flush hands its bytes to write."""
+
+    def __init__(self, write, buffer_size, line_buffered):
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be at least 1")
+        self.write = write
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+        self.line_buffered = line_buffered
+
+    def flush(self):
+        if self.buffer:
+            data = bytes(self.buffer)
+            del self.buffer[:]
+            self.write(data)
+
+
+def _input_values(source):
+    """Yield the cell values , reads from source, reading it lazily."""
+    if source is None:
+        return
+    if isinstance(source, str):
+        yield from map(ord, source)
+    elif isinstance(source, (bytes, bytearray)):
+        yield from source
+    elif hasattr(source, 'read'):
+        # read1 returns what is buffered or arrives next, where read(n)
+        # would wait for n bytes; text files have no read1 and read a
+        # character at a time
+        read1 = getattr(source, 'read1', None)
+        while True:
+            chunk = read1(STREAM_BUFFER_SIZE) if read1 is not None else source.read(1)
+            if not chunk:
+                return
+            yield from (map(ord, chunk) if isinstance(chunk, str) else chunk)
+    else:
+        for chunk in source:
+            yield from (map(ord, chunk) if isinstance(chunk, str) else chunk)
+
+
+def _prepare(code, cell_bits, tape_size, backend):
+    """
+    Compile code for repeated runs.
+
+    Returns run(input_data, max_steps, tape) -> (output, steps), where
+    tape comes from _reset_tape. The 'ir' run also takes a sink (see
+    _run_ir).
+    """
+    if backend == 'python':
+        run = _python_runner(code, cell_bits, tape_size)
+        if run is not None:
+            return run
+    elif backend != 'ir':
+        raise ValueError(f"Unknown backend: {backend!r}")
+
+    instructions, loops = _unpack(_packed_program(code, tape_size))
+    key = (code, cell_bits, tape_size)
+
+    def run(input_data, max_steps, tape, sink=None):
+        # Runs start where the input-independent prefix left off, once a
+        # run has got that far
+        snapshot = _snapshots.get(key)
+        if snapshot is not None:
+            _restore(tape, snapshot[1])
+            return _run_ir(instructions, loops, input_data, cell_bits, tape_size, max_steps,
+                           tape, snapshot[0], sink=sink)
+        if sink is not None:
+            # Output written before the first , would be missing from a
+            # snapshot's output
+            return _run_ir(instructions, loops, input_data, cell_bits, tape_size, max_steps,
+                           tape, sink=sink)
+        captured = []
+        try:
+            return _run_ir(instructions, loops, input_data, cell_bits, tape_size, max_steps,
+                           tape, snapshot=captured)
+        finally:
+            if captured:
+                _remember_snapshot(key, captured[0])
+    return run
+
+
+def _pack(program):
+    """
+    Pack compile_ir output for execution.
+
+    Returns (ops, args, costs, loops): opcodes in an array('B'), operands
+    (ADD/MOVE amounts and jump targets) and costs in parallel array('q')s,
+    and the CLEAR/MULADD descriptors in a list indexed by their operand.
+    This is the form kept in the program cache, about a fifth the size
+    of the instruction tuples.
+    """
+    ops = array('B')
+    args = array('q')
+    costs = array('q')
+    loops = []
+    for op, arg, cost in program:
+        if op in (CLEAR, MULADD):
+            loops.append(arg)
+            arg = len(loops) - 1
+        ops.append(op)
+        args.append(arg or 0)
+        costs.append(cost)
+    return ops, args, costs, loops
+
+
+def _unpack(packed):
+    """
+    (instructions, loops) for _run_ir.
+
+    Reading array items boxes a new int each time, which doubles the cost
+    of dispatch on long runs, so execution works on (op, arg, cost) tuples.
+    """
+    ops, args, costs, loops = packed
+    return list(zip(ops, args, costs)), loops
+
+
+def _packed_program(code, tape_size):
+    """compile_ir and _pack, memoized per source."""
+    key = (code, tape_size)
+    packed = _packed_programs.get(key)
+    if packed is None:
+        packed = _pack(compile_ir(code, tape_size))
+        if len(_packed_programs) >= _IR_CACHE_SIZE:
+            del _packed_programs[next(iter(_packed_programs))]
+        _packed_programs[key] = packed
+    return packed
+
+
+def _remember_snapshot(key, snapshot):
+    if len(_snapshots) >= _IR_CACHE_SIZE:
+        del _snapshots[next(iter(_snapshots))]
+    _snapshots[key] = snapshot
+
+
+def _program_snapshot(code, cell_bits, tape_size):
+    """
+    The snapshot of code at its first , (see _run_ir), or None.
+
+    Takes one with a run on empty input if no run has yet, giving up
+    after _SNAPSHOT_STEPS.
+    """
+    key = (code, cell_bits, tape_size)
+    snapshot = _snapshots.get(key)
+    if snapshot is None:
+        instructions, loops = _unpack(_packed_program(code, tape_size))
+        captured = []
+        try:
+            _run_ir(instructions, loops, "", cell_bits, tape_size, _SNAPSHOT_STEPS,
+                    snapshot=captured)
+        except RuntimeError:
+            pass
+        if captured:
+            snapshot = captured[0]
+            _remember_snapshot(key, snapshot)
+    return snapshot
+
+
+def _restore(tape, cells):
+    """Replace a tape's contents with a snapshot's cells, keeping its type."""
+    tape[:] = array(tape.typecode, cells) if isinstance(tape, array) else list(cells)
+
+
+def _tape_typecode(cell_bits, input_data):
+    """
+    The narrowest array type that holds every cell value, or None for a list.
+
+    Array types raise on overflow instead of wrapping, so arithmetic is
+    still masked to cell_bits. The type must also fit characters that ,
+    stores unmasked. Cells wider than 64 bits use a list.
+    """
+    largest = (1 << cell_bits) - 1
+    if input_data and not input_data.isascii():
+        largest = max(largest, max(map(ord, input_data)))
+    for typecode, limit in _TAPE_TYPES:
+        if largest <= limit:
+            return typecode
+    return None
+
+
+def _new_tape(typecode, cells):
+    """A zeroed tape of the given type and length."""
+    if typecode is None:
+        return [0] * cells
+    return array(typecode, [0]) * cells
+
+
+def _reset_tape(tape, cell_bits, input_data, tape_size):
+    """
+    A zeroed tape for the next run.
+
+    Reuses `tape` with its used prefix cleared when its type still fits,
+    else starts a new one-cell tape.
+    """
+    typecode = _tape_typecode(cell_bits, input_data)
+    if tape is None or getattr(tape, 'typecode', None) != typecode:
+        return _new_tape(typecode, 1)
+    # A reused tape restarts as low cells only, which must stay below the split
+    del tape[(tape_size + 1) // 2:]
+    tape[:] = _new_tape(typecode, len(tape))
+    return tape
+
+
+def _grow(tape, ptr, top, bottom, tape_size):
+    """
+    Wrap ptr onto the tape and make sure its cell exists.
+
+    The tape stores the low cells [0, top) first and the wrapped-around
+    high cells [tape_size + bottom, tape_size) last, so ptr runs from
+    -(tape_size // 2) to (tape_size + 1) // 2 and negative values index
+    the high cells directly. New cells go in between.
+
+    Returns:
+        (ptr, top, bottom)
+    """
+    ptr %= tape_size
+    if ptr >= (tape_size + 1) // 2:
+        ptr -= tape_size
+    zero = array(tape.typecode, [0]) if isinstance(tape, array) else [0]
+    if ptr >= top:
+        tape[top:top] = zero * (ptr + 1 - top)
+        top = ptr + 1
+    elif ptr < bottom:
+        tape[top:top] = zero * (bottom - ptr)
+        bottom = ptr
+    return ptr, top, bottom
+
+
+def _itemsize(tape):
+    # List cells are pointers to (mostly shared) small ints
+    return tape.itemsize if isinstance(tape, array) else 8
+
+
+def _run_ir(program, loops, input_data, cell_bits, tape_size, max_steps, tape=None,
+            start=None, snapshot=None, sink=None):
+    """
+    Execute unpacked instructions; returns (output, steps).
+
+    The tape (a fresh one if None) grows in place as cells are reached;
+    see _grow for its layout.
+
+    Args:
+        input_data: The input string, or an iterator of cell values that
+            , reads from as it runs
+        start: The state from a snapshot to resume from, with the
+            snapshot's cells already on the tape
+        snapshot: A list to receive the snapshot taken just before the
+            first , runs, or at the end if none does. Everything before
+            that is the same for every input. A snapshot is (state,
+            cells), where state is (pc, ptr, top, bottom, steps, output).
+        sink: A _Sink to write output to as it is produced; the output
+            returned is then only what it has not yet written
+    """
+    if tape is None:
+        tape = _reset_tape(None, cell_bits, input_data, tape_size)
+    if start is None:
+        pc, ptr, top, bottom, steps = 0, 0, len(tape), 0, 0
+        prefix = ''
+    else:
+        pc, ptr, top, bottom, steps, prefix = start
+    # Output bytes, as . writes the low 8 bits of a cell
+    output = bytearray() if sink is None else sink.buffer
+    output += prefix.encode('latin-1')
+    values = map(ord, input_data) if isinstance(input_data, str) else input_data
+    cell_max = (1 << cell_bits) - 1
+    n = len(program)
+
+    # Every non-terminating run passes a CLOSE, so checking the limit
+    # there and once at the end raises exactly when the step-by-step
+    # interpreter would
+    while pc < n:
+        op, arg, cost = program[pc]
+        steps += cost
+
+        if op == ADD:
+            tape[ptr] = (tape[ptr] + arg) & cell_max
+        elif op == MOVE:
+            ptr += arg
+            if not bottom <= ptr < top:
+                ptr, top, bottom = _grow(tape, ptr, top, bottom, tape_size)
+        elif op == CLOSE:
+            if steps > max_steps:
+                raise RuntimeError(f"Execution exceeded {max_steps} steps")
+            if tape[ptr] != 0:
+                pc = arg
+                continue
+        elif op == OPEN:
+            if tape[ptr] == 0:
+                pc = arg
+                continue
+        elif op == CLEAR:
+            value = tape[ptr]
+            if value:
+                sign, per_iteration = loops[arg]
+                steps += ((((sign * value) - 1) & cell_max) + 1) * per_iteration
+                tape[ptr] = 0
+        elif op == MULADD:
+            value = tape[ptr]
+            if value:
+                sign, per_iteration, targets = loops[arg]
+                count = (((sign * value) - 1) & cell_max) + 1
+                steps += count * per_iteration
+                for offset, factor in targets:
+                    cell = ptr + offset
+                    if not bottom <= cell < top:
+                        cell, top, bottom = _grow(tape, cell, top, bottom, tape_size)
+                    tape[cell] = (tape[cell] + count * factor) & cell_max
+                tape[ptr] = 0
+        elif op == OUT:
+            value = tape[ptr] & 0xFF
+            output.append(value)
+            if sink is not None and (len(output) >= sink.buffer_size or
+                                     value == 10 and sink.line_buffered):
+                sink.flush()
+        elif op == IN:
+            if snapshot is not None:
+                snapshot.append(((pc, ptr, top, bottom, steps - cost, output.decode('latin-1')),
+                                 tuple(tape)))
+                snapshot = None
+            if sink is not None:
+                sink.flush()  # before waiting for input
+            tape[ptr] = next(values, 0)  # 0 at EOF
+
+        pc += 1
+
+    if snapshot is not None:
+        snapshot.append(((pc, ptr, top, bottom, steps, output.decode('latin-1')), tuple(tape)))
+    if steps > max_steps:
+        raise RuntimeError(f"Execution exceeded {max_steps} steps")
+    return output.decode('latin-1'), steps
+
+
+def _interpret_naive(code, input_data="", cell_bits=32, tape_size=30000, max_steps=100000000):
+    """One command at a time; the reference that interpret must match."""
+    code = _filter(code)
+    brackets = _match_brackets(code)
 
-    # Execute
     tape = [0] * tape_size
     cell_max = (1 << cell_bits) - 1
     ptr = 0
@@ -85,28 +700,564 @@ def interpret(code, input_data="", cell_bits=32, tape_size=30000, max_steps=1000
     return ''.join(output)
 
 
-def run_file(filename, input_data=""):
-    """Run a Brainfuck file."""
+# ============================================================
+# PROFILING
+# ============================================================
+
+_OP_NAMES = ('add', 'move', 'out', 'in', 'loop', 'end', 'clear', 'muladd')
+
+
+class Profile:
+    """
+    Where a run spent its steps; pass one to interpret(..., profile=).
+
+    Filled in even when the run raises for exceeding max_steps, so the
+    loop that used up the budget shows. Positions refer to the original
+    source, comments included: offset (characters), byte, line and col
+    (1-based).
+
+    steps: Source commands executed
+    pointer_min, pointer_max: The furthest cells reached; negative cells
+        were reached by wrapping left of cell 0
+    instructions: A dict per IR instruction with its position, op,
+        source, count (executions) and steps
+    loops: A dict per [...] loop with its position, source, whether it
+        was folded into one instruction, entries, iterations and steps,
+        including those of nested loops
+    """
+
+    SORT_KEYS = ('steps', 'count', 'offset')
+
+    def __init__(self):
+        self.steps = 0
+        self.pointer_min = 0
+        self.pointer_max = 0
+        self.instructions = []
+        self.loops = []
+
+    def _fill(self, code, program, spans, counts, costs, iterations, pointer):
+        positions = _command_positions(code)
+        commands = _filter(code)
+
+        def row(start, end):
+            source = commands[start:end]
+            if len(source) > 30:
+                source = source[:27] + '...'
+            offset, byte, line, col = positions[start]
+            return {'offset': offset, 'byte': byte, 'line': line, 'col': col, 'source': source}
+
+        self.steps = sum(costs)
+        self.pointer_min, self.pointer_max = pointer
+        self.instructions = []
+        self.loops = []
+        for pc, (op, arg, _) in enumerate(program):
+            start, end = spans[pc]
+            self.instructions.append(dict(row(start, end), op=_OP_NAMES[op],
+                                          count=counts[pc], steps=costs[pc]))
+            if op == OPEN:
+                self.loops.append(dict(row(start, spans[arg - 1][1]), folded=False,
+                                       entries=counts[pc], iterations=iterations[pc],
+                                       steps=sum(costs[pc:arg])))
+            elif op in (CLEAR, MULADD):
+                self.loops.append(dict(row(start, end), folded=True, entries=counts[pc],
+                                       iterations=iterations[pc], steps=costs[pc]))
+
+    def sorted(self, rows, sort='steps'):
+        """
+        rows (instructions or loops) hottest first, or in source order
+        for sort='offset'. For loops, 'count' sorts by iterations.
+        """
+        if sort not in self.SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort!r}")
+        if sort == 'offset':
+            return sorted(rows, key=lambda r: r['offset'])
+        if sort == 'count':
+            return sorted(rows, key=lambda r: (-r.get('iterations', r.get('count')), r['offset']))
+        return sorted(rows, key=lambda r: (-r['steps'], r['offset']))
+
+    def report(self, sort='steps', limit=20):
+        """A text report of the executed loops and instructions."""
+        total = self.steps or 1
+        lines = [f"{self.steps:,} steps, pointer reached cells {self.pointer_min} to {self.pointer_max}",
+                 "",
+                 f"Loops by {sort}",
+                 f"{'line:col':>10} {'byte':>7} {'entries':>10} {'iterations':>14} {'steps':>16} {'%':>6}  source"]
+        for r in self.sorted([r for r in self.loops if r['entries']], sort)[:limit]:
+            lines.append(f"{r['line']:>5}:{r['col']:<4} {r['byte']:>7} {r['entries']:>10,} {r['iterations']:>14,} "
+                         f"{r['steps']:>16,} {r['steps'] / total:>6.1%}  {r['source']}"
+                         + ('  (folded)' if r['folded'] else ''))
+        lines += ["",
+                  f"Instructions by {sort}",
+                  f"{'line:col':>10} {'byte':>7} {'op':>7} {'count':>14} {'steps':>16} {'%':>6}  source"]
+        for r in self.sorted([r for r in self.instructions if r['count']], sort)[:limit]:
+            lines.append(f"{r['line']:>5}:{r['col']:<4} {r['byte']:>7} {r['op']:>7} {r['count']:>14,} "
+                         f"{r['steps']:>16,} {r['steps'] / total:>6.1%}  {r['source']}")
+        return '\n'.join(lines)
+
+    def to_json(self, sort='steps'):
+        """The whole profile as JSON, rows sorted as in sorted()."""
+        return json.dumps({
+            'steps': self.steps,
+            'pointer_min': self.pointer_min,
+            'pointer_max': self.pointer_max,
+            'loops': self.sorted(self.loops, sort),
+            'instructions': self.sorted(self.instructions, sort),
+        }, indent=2)
+
+
+def _command_positions(code):
+    """(offset, byte, line, col) of each command in code, in order."""
+    positions = []
+    line = 1
+    line_start = 0
+    byte = 0
+    for offset, c in enumerate(code):
+        if c in COMMANDS:
+            positions.append((offset, byte, line, offset - line_start + 1))
+        elif c == '\n':
+            line += 1
+            line_start = offset + 1
+        byte += 1 if c < '\x80' else len(c.encode('utf-8'))
+    return positions
+
+
+def _profile(code, input_data, cell_bits, tape_size, max_steps, profile):
+    """interpret with counters; fills profile and returns the output."""
+    spans = []
+    program = compile_ir(code, tape_size, spans)
+    instructions, loops = _unpack(_pack(program))
+    counts = [0] * len(program)
+    costs = [0] * len(program)
+    iterations = [0] * len(program)
+    pointer = [0, 0]
+    try:
+        return _run_profiled(instructions, loops, input_data, cell_bits, tape_size, max_steps,
+                             counts, costs, iterations, pointer)
+    finally:
+        profile._fill(code, program, spans, counts, costs, iterations, pointer)
+
+
+def _run_profiled(program, loops, input_data, cell_bits, tape_size, max_steps,
+                  counts, costs, iterations, pointer):
+    """
+    _run_ir, also counting into the per-instruction lists; returns output.
+
+    Kept separate so the unprofiled loop carries no counters. Loop
+    iterations are counted at the loop's OPEN (or CLEAR/MULADD), and
+    pointer is [lowest, highest] cell reached.
+    """
+    tape = _reset_tape(None, cell_bits, input_data, tape_size)
+    top = len(tape)
+    bottom = 0
+    cell_max = (1 << cell_bits) - 1
+    ptr = 0
+    pc = 0
+    input_ptr = 0
+    output = []
+    steps = 0
+    n = len(program)
+
+    while pc < n:
+        op, arg, cost = program[pc]
+        counts[pc] += 1
+        costs[pc] += cost
+        steps += cost
+
+        if op == ADD:
+            tape[ptr] = (tape[ptr] + arg) & cell_max
+        elif op == MOVE:
+            ptr += arg
+            if not bottom <= ptr < top:
+                ptr, top, bottom = _grow(tape, ptr, top, bottom, tape_size)
+            if ptr < pointer[0]:
+                pointer[0] = ptr
+            elif ptr > pointer[1]:
+                pointer[1] = ptr
+        elif op == CLOSE:
+            if steps > max_steps:
+                raise RuntimeError(f"Execution exceeded {max_steps} steps")
+            if tape[ptr] != 0:
+                iterations[arg - 1] += 1
+                pc = arg
+                continue
+        elif op == OPEN:
+            if tape[ptr] == 0:
+                pc = arg
+                continue
+            iterations[pc] += 1
+        elif op == CLEAR:
+            value = tape[ptr]
+            if value:
+                sign, per_iteration = loops[arg]
+                count = (((sign * value) - 1) & cell_max) + 1
+                iterations[pc] += count
+                costs[pc] += count * per_iteration
+                steps += count * per_iteration
+                tape[ptr] = 0
+        elif op == MULADD:
+            value = tape[ptr]
+            if value:
+                sign, per_iteration, targets = loops[arg]
+                count = (((sign * value) - 1) & cell_max) + 1
+                iterations[pc] += count
+                costs[pc] += count * per_iteration
+                steps += count * per_iteration
+                for offset, factor in targets:
+                    cell = ptr + offset
+                    if not bottom <= cell < top:
+                        cell, top, bottom = _grow(tape, cell, top, bottom, tape_size)
+                    pointer[0] = min(pointer[0], cell)
+                    pointer[1] = max(pointer[1], cell)
+                    tape[cell] = (tape[cell] + count * factor) & cell_max
+                tape[ptr] = 0
+        elif op == OUT:
+            output.append(chr(tape[ptr] & 0xFF))
+        elif op == IN:
+            if input_ptr < len(input_data):
+                tape[ptr] = ord(input_data[input_ptr])
+                input_ptr += 1
+            else:
+                tape[ptr] = 0  # EOF
+
+        pc += 1
+
+    if steps > max_steps:
+        raise RuntimeError(f"Execution exceeded {max_steps} steps")
+    return ''.join(output)
+
+
+# ============================================================
+# PYTHON BACKEND
+# ============================================================
+
+def _loop_depth(program):
+    depth = deepest = 0
+    for op, _, _ in program:
+        if op == OPEN:
+            depth += 1
+            deepest = max(deepest, depth)
+        elif op == CLOSE:
+            depth -= 1
+    return deepest
+
+
+def _transpile_ir(program, cell_bits, tape_size, snapshot=None):
+    """
+    Python source for compiled instructions; see transpile.
+
+    With a snapshot (see _run_ir) taken outside any loop, the function
+    restores it and runs only the instructions after it; `restore` is
+    _restore in the run's globals.
+    """
+    mask = (1 << cell_bits) - 1
+    lines = ["def run(input_data, max_steps, tape):"]
+    if snapshot is None:
+        lines += [
+            "    top = len(tape)",
+            "    bottom = 0",
+            "    ptr = 0",
+            "    steps = 0",
+            "    output = []",
+        ]
+    else:
+        (pc, ptr, top, bottom, steps, output), cells = snapshot
+        program = program[pc:]
+        lines += [
+            f"    restore(tape, {cells!r})",
+            f"    top = {top}",
+            f"    bottom = {bottom}",
+            f"    ptr = {ptr}",
+            f"    steps = {steps}",
+            f"    output = [{output!r}]" if output else "    output = []",
+        ]
+    lines += [
+        "    input_ptr = 0",
+        "    input_len = len(input_data)",
+        "    append = output.append",
+    ]
+    indent = '    '
+    pending = 0  # straight-line cost not yet added to steps
+
+    def emit(line):
+        lines.append(indent + line)
+
+    def flush():
+        nonlocal pending
+        if pending:
+            emit(f"steps += {pending}")
+            pending = 0
+
+    def check():
+        emit("if steps > max_steps:")
+        emit("    raise RuntimeError(f'Execution exceeded {max_steps} steps')")
+
+    def grow(index, extra=''):
+        emit(f"{extra}if not bottom <= {index} < top:")
+        emit(f"{extra}    {index}, top, bottom = grow(tape, {index}, top, bottom, {tape_size})")
+
+    def cell(offset):
+        return f"ptr + {offset}" if offset > 0 else f"ptr - {-offset}"
+
+    for op, arg, cost in program:
+        if op == ADD:
+            pending += cost
+            emit(f"tape[ptr] = (tape[ptr] + {arg}) & {mask}")
+        elif op == MOVE:
+            pending += cost
+            if arg % tape_size:
+                emit(f"ptr += {arg}" if arg > 0 else f"ptr -= {-arg}")
+                grow("ptr")
+        elif op == OUT:
+            pending += 1
+            emit("append(chr(tape[ptr] & 255))")
+        elif op == IN:
+            pending += 1
+            emit("if input_ptr < input_len:")
+            emit("    tape[ptr] = ord(input_data[input_ptr])")
+            emit("    input_ptr += 1")
+            emit("else:")
+            emit("    tape[ptr] = 0")
+        elif op == OPEN:
+            pending += 1
+            flush()
+            emit("while tape[ptr]:")
+            indent += '    '
+        elif op == CLOSE:
+            pending += 1
+            flush()
+            check()
+            indent = indent[:-4]
+        else:
+            pending += 1
+            sign, per_iteration = arg[0], arg[1]
+            count = "((value - 1)" if sign > 0 else "((-value - 1)"
+            emit("value = tape[ptr]")
+            emit("if value:")
+            emit(f"    count = {count} & {mask}) + 1")
+            emit(f"    steps += count * {per_iteration}")
+            if op == MULADD:
+                for offset, factor in arg[2]:
+                    emit(f"    target = {cell(offset)}")
+                    grow("target", "    ")
+                    emit(f"    tape[target] = (tape[target] + count * {factor}) & {mask}")
+            emit("    tape[ptr] = 0")
+
+    flush()
+    check()
+    emit("return ''.join(output), steps")
+    return "\n".join(lines) + "\n"
+
+
+def transpile(code, cell_bits=32, tape_size=30000):
+    """
+    Translate Brainfuck source to Python source.
+
+    The result defines run(input_data, max_steps, tape) -> (output, steps),
+    where tape is a zeroed array or list that grows in place as cells are
+    reached (see _grow), and `grow` is _grow in the run's globals. Loops
+    become nested while statements over the compile_ir instructions, with
+    cell width and tape size baked in as constants and step counts added
+    once per straight-line block.
+
+    Raises:
+        ValueError: On unmatched brackets, or loops nested too deep for
+            CPython to compile
+    """
+    program = compile_ir(code, tape_size)
+    if _loop_depth(program) > _MAX_LOOP_DEPTH:
+        raise ValueError(f"Loops nested deeper than {_MAX_LOOP_DEPTH} levels")
+    return _transpile_ir(program, cell_bits, tape_size)
+
+
+def _cache_key(code, cell_bits, tape_size):
+    header = f"{TRANSPILER_VERSION}:{cell_bits}:{tape_size}:".encode()
+    return hashlib.sha256(header + code.encode('utf-8')).hexdigest()
+
+
+def _write_cache(path, data):
+    """Write a cache file atomically; a read-only location just skips caching."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def _python_runner(code, cell_bits, tape_size, cache_dir=None):
+    """
+    The transpiled run function for code, or None if it nests too deep.
+
+    Looked up in memory, then in cache_dir (marshalled code objects named
+    by content hash and interpreter, like __pycache__), and only then
+    transpiled and compiled.
+    """
+    key = _cache_key(code, cell_bits, tape_size)
+    run = _python_runners.get(key)
+    if run is not None:
+        return run
+
+    code_object = None
+    path = None
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, f"{key[:32]}.{sys.implementation.cache_tag}.bfc")
+        try:
+            with open(path, 'rb') as f:
+                code_object = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            code_object = None
+
+    if code_object is None:
+        program = compile_ir(code, tape_size)
+        if _loop_depth(program) > _MAX_LOOP_DEPTH:
+            return None
+        # Structured loops can only resume from a snapshot outside them
+        snapshot = _program_snapshot(code, cell_bits, tape_size)
+        if snapshot is not None:
+            brackets = [op for op, _, _ in program[:snapshot[0][0]] if op in (OPEN, CLOSE)]
+            if brackets.count(OPEN) != brackets.count(CLOSE):
+                snapshot = None
+        source = _transpile_ir(program, cell_bits, tape_size, snapshot)
+        code_object = compile(source, f"<bf {key[:12]}>", 'exec')
+        if path is not None:
+            _write_cache(path, marshal.dumps(code_object))
+
+    namespace = {'grow': _grow, 'restore': _restore}
+    exec(code_object, namespace)
+    run = namespace['run']
+    if len(_python_runners) >= _PYTHON_CACHE_SIZE:
+        del _python_runners[next(iter(_python_runners))]
+    _python_runners[key] = run
+    return run
+
+
+def run_file(filename, input_data="", backend='ir'):
+    """
+    Run a Brainfuck file.
+
+    With backend='python' the compiled program is cached in __bfcache__
+    next to the file, so later runs and new processes skip translation.
+    """
     with open(filename, 'r') as f:
         code = f.read()
-    return interpret(code, input_data)
+    if backend == 'python':
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(filename)), '__bfcache__')
+        run = _python_runner(code, 32, 30000, cache_dir)
+        if run is not None:
+            return run(input_data, 100000000, _reset_tape(None, 32, input_data, 30000))[0]
+        backend = 'ir'
+    return interpret(code, input_data, backend=backend)
 
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: bf.py <file.bf> [input]")
-        sys.exit(1)
+def _run_lines(filename, backend, src=None, dst=None):
+    """
+    Run the program once per input line, writing one output line each.
+
+    Errors are reported on stderr with an empty output line, so output
+    lines stay aligned with input lines. Returns the number of failures.
+    """
+    src = src or sys.stdin
+    dst = dst or sys.stdout
+    with open(filename, 'r') as f:
+        code = f.read()
+    run = _prepare(code, 32, 30000, backend)
+
+    start = time.perf_counter()
+    count = failures = 0
+    tape = None
+    for line in src:
+        input_data = line.rstrip('\r\n')
+        tape = _reset_tape(tape, 32, input_data, 30000)
+        try:
+            output = run(input_data, 100000000, tape)[0]
+        except RuntimeError as e:
+            print(f"Error on line {count + 1}: {e}", file=sys.stderr)
+            output = ""
+            failures += 1
+        dst.write(output + "\n")
+        dst.flush()
+        count += 1
+
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else float('inf')
+    print(f"Processed {count:,} inputs in {elapsed:.2f}s ({rate:,.0f} inputs/sec)", file=sys.stderr)
+    return failures
+
+
+def _run_stream(filename, source, buffer_size, line_buffered):
+    """Run a file with the ir backend, streaming its output to stdout as bytes."""
+    with open(filename, 'r') as f:
+        code = f.read()
+    sys.stdout.flush()
+    stream(code, source, sys.stdout.buffer, buffer_size=buffer_size, line_buffered=line_buffered)
+    return 0
+
+
+def _run_profile(filename, input_data, fmt, sort):
+    """Run a file once, then write its profile to stderr."""
+    with open(filename, 'r') as f:
+        code = f.read()
+    profile = Profile()
+    try:
+        print(interpret(code, input_data, profile=profile), end='')
+    finally:
+        if profile.instructions or profile.steps:
+            print(profile.report(sort) if fmt == 'text' else profile.to_json(sort), file=sys.stderr)
+    return 0
 
-    filename = sys.argv[1]
-    input_data = sys.argv[2] if len(sys.argv) > 2 else ""
 
-    # Also read from stdin if no input arg and stdin has data
-    if not input_data and not sys.stdin.isatty():
-        input_data = sys.stdin.read()
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='bf.py', description='Run a Brainfuck program')
+    parser.add_argument('file', help='Brainfuck source file')
+    parser.add_argument('input', nargs='?', default='',
+                        help='Input string (default: stdin when it is not a terminal)')
+    parser.add_argument('--backend', choices=BACKENDS, default='ir',
+                        help='Execution backend (default: ir)')
+    parser.add_argument('--lines', action='store_true',
+                        help='Run once per stdin line, writing one output line each')
+    parser.add_argument('--profile', choices=['text', 'json'],
+                        help='Also write a hot-loop profile to stderr in this format')
+    parser.add_argument('--sort', choices=Profile.SORT_KEYS, default='steps',
+                        help='Profile row order (default: steps)')
+    parser.add_argument('--buffer-size', type=int, default=STREAM_BUFFER_SIZE,
+                        help='Output bytes buffered before writing with the ir backend; '
+                             f'1 writes each byte at once (default: {STREAM_BUFFER_SIZE})')
+    parser.add_argument('--line-buffered', action='store_true',
+                        help='Also write output after each newline (default when stdout is a terminal)')
+    args = parser.parse_args(argv)
 
     try:
-        result = run_file(filename, input_data)
+        if args.lines:
+            if args.backend == 'naive':
+                parser.error('--lines needs the ir or python backend')
+            if args.profile:
+                parser.error('--profile runs a single input')
+            return 1 if _run_lines(args.file, args.backend) else 0
+
+        source = args.input
+        # Also read from stdin if no input arg and stdin has data
+        if not source and not sys.stdin.isatty():
+            source = sys.stdin
+        # The ir backend reads stdin as the program asks for it and writes
+        # output as it comes; the others need the whole input up front
+        if args.backend == 'ir' and not args.profile:
+            line_buffered = args.line_buffered or sys.stdout.isatty()
+            return _run_stream(args.file, source, args.buffer_size, line_buffered)
+        input_data = source if isinstance(source, str) else source.read()
+        if args.profile:
+            return _run_profile(args.file, input_data, args.profile, args.sort)
+        result = run_file(args.file, input_data, args.backend)
         print(result, end='')
-    except Exception as e:
+    except (OSError, RuntimeError, ValueError) as e:
         print(f"Error: {e}", file=sys.stderr)
-        sys.exit(1)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
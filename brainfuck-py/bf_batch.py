@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Experimental lockstep batch engine: one Brainfuck program, many inputs.
+
+Every input is a lane with its own row of a 2-D NumPy tape, its own
+pointer and step count. Each instruction runs on every lane at once.
+When lanes disagree at a [ or ], they split. The lowest instruction among
+them runs next, for just the lanes that are there. Lanes still inside a
+loop therefore catch up with those that left it, and the batch runs in
+lockstep again from there.
+
+Output is the same as interpret() per input:
+
+    from bf_batch import run_batch
+    run_batch(open("timeago.bf").read(), ["1704067170\\x001704067200", ...])
+
+Requires NumPy and cell_bits of at most 32.
+"""
+
+import numpy as np
+
+import bf
+from bf import ADD, MOVE, OUT, IN, OPEN, CLOSE, CLEAR, MULADD
+
+
+# count * factor and step totals must fit in int64
+MAX_CELL_BITS = 32
+
+
+class _Tape:
+    """
+    Lane rows over the cells reached so far.
+
+    Pointers are signed cell indices as in bf._grow. Column 0 holds cell
+    `low`, and the columns grow in either direction as lanes reach new
+    cells.
+    """
+
+    def __init__(self, lanes):
+        self.cells = np.zeros((lanes, 1), dtype=np.int64)
+        self.low = 0
+
+    def reach(self, ptrs):
+        """Make sure the cells at ptrs exist; returns their columns."""
+        low = int(ptrs.min())
+        high = int(ptrs.max()) + 1
+        width = self.cells.shape[1]
+        if low < self.low or high > self.low + width:
+            # Leave room to grow by half again, like list over-allocation
+            new_low = min(low, self.low)
+            new_high = max(high, self.low + width)
+            slack = (new_high - new_low) // 2
+            if low < self.low:
+                new_low -= slack
+            if high > self.low + width:
+                new_high += slack
+            cells = np.zeros((self.cells.shape[0], new_high - new_low), dtype=np.int64)
+            cells[:, self.low - new_low:self.low - new_low + width] = self.cells
+            self.cells = cells
+            self.low = new_low
+        return ptrs - self.low
+
+
+def _wrap(ptrs, tape_size):
+    """Wrap pointers into bf's signed range [-(T // 2), (T + 1) // 2)."""
+    half = tape_size // 2
+    if ptrs.size and (ptrs.min() < -half or ptrs.max() >= (tape_size + 1) // 2):
+        ptrs = (ptrs + half) % tape_size - half
+    return ptrs
+
+
+def _inputs_array(inputs):
+    """(codes, lengths): input characters as a lanes x longest array."""
+    lengths = np.array([len(s) for s in inputs], dtype=np.int64)
+    codes = np.zeros((len(inputs), max(int(lengths.max(initial=0)), 1)), dtype=np.int64)
+    for lane, s in enumerate(inputs):
+        if s:
+            codes[lane, :len(s)] = np.frombuffer(s.encode('utf-32-le'), dtype=np.uint32)
+    return codes, lengths
+
+
+def run_batch(code, inputs, cell_bits=32, tape_size=30000, max_steps=100000000):
+    """
+    Run code once per input in lockstep; returns the outputs in order.
+
+    Takes the same arguments as bf.interpret, with a list of inputs.
+
+    Raises:
+        RuntimeError: When an input exceeds max_steps, naming its index
+        ValueError: On unmatched brackets, or cell_bits above MAX_CELL_BITS
+    """
+    if cell_bits > MAX_CELL_BITS:
+        raise ValueError(f"cell_bits above {MAX_CELL_BITS} need bf.interpret")
+    inputs = list(inputs)
+    lanes = len(inputs)
+    if not lanes:
+        return []
+    program, loops = bf._unpack(bf._packed_program(code, tape_size))
+    n = len(program)
+    mask = (1 << cell_bits) - 1
+
+    tape = _Tape(lanes)
+    ptr = np.zeros(lanes, dtype=np.int64)
+    steps = np.zeros(lanes, dtype=np.int64)
+    input_codes, input_lengths = _inputs_array(inputs)
+    input_ptr = np.zeros(lanes, dtype=np.int64)
+    events = []  # (lanes, bytes) per OUT, in execution order
+
+    every = np.arange(lanes)
+    # While every lane is at the same instruction it is just `cur`; pc
+    # holds each lane's instruction only while they are split. rows are
+    # the lanes to run, and sel indexes the per-lane arrays for them: a
+    # slice in lockstep, which is cheaper than indexing by rows
+    cur = 0
+    pc = None
+
+    def over_limit(rows, sel):
+        over = rows[steps[sel] > max_steps]
+        if over.size:
+            raise RuntimeError(f"Input {int(over.min())}: Execution exceeded {max_steps} steps")
+
+    while True:
+        if pc is None:
+            if cur >= n:
+                break
+            rows, sel = every, slice(None)
+        else:
+            cur = int(pc.min())
+            if cur >= n:
+                break
+            rows = sel = every[pc == cur]
+            if sel.size == lanes:
+                pc = None  # back in lockstep
+                sel = slice(None)
+
+        op, arg, cost = program[cur]
+        steps[sel] += cost
+        nxt = cur + 1
+        jump = None  # which of rows branch to arg
+
+        if op == ADD:
+            cols = tape.reach(ptr[sel])
+            tape.cells[rows, cols] = (tape.cells[rows, cols] + arg) & mask
+        elif op == MOVE:
+            ptr[sel] = _wrap(ptr[sel] + arg, tape_size)
+            tape.reach(ptr[sel])
+        elif op == CLOSE:
+            over_limit(rows, sel)
+            jump = tape.cells[rows, ptr[sel] - tape.low] != 0
+        elif op == OPEN:
+            jump = tape.cells[rows, ptr[sel] - tape.low] == 0
+        elif op == CLEAR or op == MULADD:
+            cols = ptr[sel] - tape.low
+            values = tape.cells[rows, cols]
+            nonzero = values != 0
+            if nonzero.any():
+                busy = rows[nonzero]
+                if op == CLEAR:
+                    sign, per_iteration = loops[arg]
+                else:
+                    sign, per_iteration, targets = loops[arg]
+                count = ((sign * values[nonzero] - 1) & mask) + 1
+                steps[busy] += count * per_iteration
+                if op == MULADD:
+                    for offset, factor in targets:
+                        target = tape.reach(_wrap(ptr[busy] + offset, tape_size))
+                        tape.cells[busy, target] = (tape.cells[busy, target] + count * factor) & mask
+                tape.cells[busy, ptr[busy] - tape.low] = 0
+        elif op == OUT:
+            events.append((rows, tape.cells[rows, ptr[sel] - tape.low] & 0xFF))
+        elif op == IN:
+            positions = input_ptr[sel]
+            has = positions < input_lengths[sel]
+            read = input_codes[rows, np.minimum(positions, input_codes.shape[1] - 1)]
+            tape.cells[rows, ptr[sel] - tape.low] = np.where(has, read, 0)
+            input_ptr[sel] += has
+
+        if jump is None or not jump.any():
+            targets_pc = nxt
+        elif jump.all():
+            targets_pc = arg
+        else:
+            targets_pc = np.where(jump, arg, nxt)
+
+        if pc is None and np.ndim(targets_pc) == 0:
+            cur = targets_pc
+        else:
+            if pc is None:
+                pc = np.full(lanes, cur, dtype=np.int64)
+            pc[sel] = targets_pc
+
+    over_limit(every, every)
+    return _collect(events, lanes)
+
+
+def _collect(events, lanes):
+    """Per-lane output strings from (lanes, bytes) events."""
+    if not events:
+        return [''] * lanes
+    order_lanes = np.concatenate([sel for sel, _ in events])
+    values = np.concatenate([vals for _, vals in events]).astype(np.uint8)
+    # A stable sort by lane keeps each lane's characters in order
+    order = np.argsort(order_lanes, kind='stable')
+    data = values[order].tobytes()
+    counts = np.bincount(order_lanes, minlength=lanes)
+    outputs = []
+    start = 0
+    for count in counts.tolist():
+        outputs.append(data[start:start + count].decode('latin-1'))
+        start += count
+    return outputs
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Generate Brainfuck that prints constant strings.
+
+The shipped programs print their text by walking one cell from character
+to character with long +/- runs. generate() instead spreads the text over
+a few scratch cells, and prints each character from whichever cell is
+cheapest to reach and adjust. It can set the cells near groups of
+characters with one multiplication loop.
+
+Every layout tried is costed in steps as bf.py counts them, and in code
+size. Because bf.py counts every command a loop runs, a multiplication
+loop costs more steps than the plain +s it replaces. The 'steps'
+objective (the default) therefore uses straight-line code, while the
+'size' objective picks the loops, which give much shorter code.
+
+Usage:
+    python bf_gen.py --text "just now"        # print code for a string
+    python bf_gen.py                          # step savings for every .bf file here
+    python bf_gen.py timeago.bf -o new.bf     # regenerate a file's literal section
+    python bf_gen.py --in-place *.bf
+"""
+
+import argparse
+import os
+import sys
+
+import bf
+import bf_opt
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_CELLS = 5
+
+OBJECTIVES = ('steps', 'size')
+
+# Loop counters tried for the multiplication loop
+_COUNTERS = range(2, 21)
+
+
+# ============================================================
+# GENERATION
+# ============================================================
+
+def _groups(chars, k):
+    """
+    Split sorted chars into k runs minimizing total distance to each
+    run's median; returns the medians.
+    """
+    n = len(chars)
+
+    def cost(i, j):
+        median = chars[(i + j) // 2]
+        return sum(abs(c - median) for c in chars[i:j])
+
+    # best[m][j]: cheapest split of chars[:j] into m runs, with its medians
+    best = [[(0, ())] + [None] * n]
+    for m in range(1, k + 1):
+        row = [None] * (n + 1)
+        for j in range(m, n + 1):
+            row[j] = min(
+                (best[m - 1][i][0] + cost(i, j), best[m - 1][i][1] + (chars[(i + j) // 2],))
+                for i in range(m - 1, j) if best[m - 1][i] is not None)
+        best.append(row)
+    return list(best[k][n][1])
+
+
+def _walk(text, values, ptr):
+    """
+    Print text from cells holding values, greedily using the cell cheapest
+    to move to and adjust. Returns (code, ptr).
+    """
+    parts = []
+    for c in map(ord, text):
+        i = min(range(len(values)), key=lambda i: (abs(i - ptr) + abs(values[i] - c), abs(i - ptr)))
+        move = i - ptr
+        delta = c - values[i]
+        parts.append(('>' * move if move > 0 else '<' * -move) +
+                     ('+' * delta if delta > 0 else '-' * -delta) + '.')
+        values[i] = c
+        ptr = i
+    return ''.join(parts), ptr
+
+
+def _candidates(text, cells, values):
+    """(code, final ptr, steps) for each layout worth trying."""
+    # Straight-line code runs each command once, so steps are the length
+    code, ptr = _walk(text, list(values), 0)
+    yield code, ptr, len(code)
+
+    # The first cell counts down a loop that adds factor * counter to each
+    # of the next k cells
+    if cells < 2 or values[0] != 0:
+        return
+    chars = sorted(map(ord, text))
+    for k in range(1, min(cells - 1, len(set(chars))) + 1):
+        centers = _groups(chars, k)
+        for counter in _COUNTERS:
+            factors = [max(round((center - value) / counter), 0)
+                       for center, value in zip(centers, values[1:])]
+            body = ''.join('>' + '+' * f for f in factors) + '<' * k + '-'
+            start = [0] + [v + counter * f for v, f in zip(values[1:], factors)] + list(values[k + 1:])
+            walk, ptr = _walk(text, start, 0)
+            code = '+' * counter + '[' + body + ']' + walk
+            # [ runs once, the body and ] once per count
+            steps = counter + 1 + counter * (len(body) + 1) + len(walk)
+            yield code, ptr, steps
+
+
+def generate(text, cells=DEFAULT_CELLS, values=None, home=True, objective='steps'):
+    """
+    Brainfuck that prints text, using cells scratch cells from the
+    current one rightwards.
+
+    Args:
+        text: Characters to print, each below 256
+        cells: How many cells, starting at the current one, may be changed
+        values: The scratch cells' current values (default: all zero)
+        home: Move back to the first scratch cell at the end
+        objective: 'steps' for the fewest steps, then the shortest code,
+            or 'size' for the shortest code, then the fewest steps
+
+    Returns:
+        The best code over the layouts tried
+
+    Raises:
+        ValueError: For characters that . cannot print, or too few cells
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective!r}")
+    if cells < 1:
+        raise ValueError("Need at least one scratch cell")
+    values = list(values) if values is not None else [0] * cells
+    if len(values) != cells:
+        raise ValueError(f"Expected {cells} values, got {len(values)}")
+    if any(ord(c) > 255 for c in text):
+        raise ValueError("Only characters below 256 can be printed")
+
+    best = None
+    for code, ptr, steps in _candidates(text, cells, values):
+        if home:
+            code += '<' * ptr
+            steps += ptr
+        key = (steps, len(code)) if objective == 'steps' else (len(code), steps)
+        if best is None or key < best[0]:
+            best = (key, code)
+    return best[1]
+
+
+# ============================================================
+# REGENERATING .bf FILES
+# ============================================================
+
+def literal_section(code):
+    """
+    The trailing literal of a program as (start, text), or None.
+
+    A literal section is a [-] followed by nothing but +, - and ., as
+    the shipped programs end; start indexes the program's commands.
+    """
+    commands = bf._filter(code)
+    start = commands.rfind('[-]')
+    if start < 0 or commands[start + 3:].strip('+-.'):
+        return None
+    return start, bf.interpret(commands[start:])
+
+
+def _reach(code):
+    """How far right of its starting cell code moves."""
+    ptr = furthest = 0
+    for c in code:
+        if c == '>':
+            ptr += 1
+            furthest = max(furthest, ptr)
+        elif c == '<':
+            ptr -= 1
+    return furthest
+
+
+def regenerate(code, cells=DEFAULT_CELLS, objective='steps'):
+    """
+    code with its literal section rebuilt by generate(), or None if it
+    has none.
+
+    The cells right of the literal's cell may hold leftovers, so those
+    the new literal uses are cleared first. Clearing costs too, so every
+    count of scratch cells up to cells is tried.
+    """
+    section = literal_section(code)
+    if section is None:
+        return None
+    start, text = section
+    best = None
+    for count in range(1, cells + 1):
+        literal = generate(text, count, home=False, objective=objective)
+        reach = _reach(literal)
+        literal = '[-]' + '>[-]' * reach + '<' * reach + literal
+        steps = bf.execute(literal).steps
+        key = (steps, len(literal)) if objective == 'steps' else (len(literal), steps)
+        if best is None or key < best[0]:
+            best = (key, literal)
+    return bf._filter(code)[:start] + best[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate Brainfuck that prints constant strings')
+    parser.add_argument('files', nargs='*',
+                        help='Programs whose literal section to regenerate '
+                             '(default: report on every .bf file here)')
+    parser.add_argument('--text', help='Print code for this string instead')
+    parser.add_argument('--cells', type=int, default=DEFAULT_CELLS,
+                        help=f'Scratch cells to use (default: {DEFAULT_CELLS})')
+    parser.add_argument('--objective', choices=OBJECTIVES, default='steps',
+                        help='Minimize steps or code size (default: steps)')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('-o', '--output', help='Write the regenerated program here (one file only)')
+    target.add_argument('--in-place', action='store_true', help='Rewrite each file')
+    parser.add_argument('--corpus', type=int, default=100, help='Inputs to verify with (default: 100)')
+    args = parser.parse_args(argv)
+
+    if args.text is not None:
+        try:
+            print(generate(args.text, args.cells, objective=args.objective))
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    files = args.files or sorted(os.path.join(HERE, name) for name in os.listdir(HERE)
+                                 if name.endswith('.bf'))
+    if args.output and len(files) != 1:
+        parser.error('-o needs exactly one file')
+
+    inputs = bf_opt.corpus(args.corpus)
+    status = 0
+    print(f"{'file':<20} {'literal':<20} {'steps':>7} {'':2} {'steps':>7}  {'size':>5} {'':2} {'size':>5}  "
+          f"{'corpus steps':>14} {'':2} {'steps':>14} {'saved':>6}  verified")
+    for path in files:
+        try:
+            with open(path) as f:
+                code = f.read()
+            section = literal_section(code)
+            new = regenerate(code, args.cells, args.objective)
+        except (OSError, ValueError) as e:
+            print(f"Error: {path}: {e}", file=sys.stderr)
+            status = 1
+            continue
+        if new is None:
+            print(f"{os.path.basename(path):<20} no literal section")
+            continue
+
+        start, text = section
+        old_literal = bf._filter(code)[start:]
+        new_literal = new[start:]
+        before = bf.execute(old_literal).steps
+        after = bf.execute(new_literal).steps
+        steps, new_steps, failures = bf_opt.verify(code, new, inputs)
+        print(f"{os.path.basename(path):<20} {text!r:<20} {before:>7,} -> {after:>7,}  "
+              f"{len(old_literal):>5,} -> {len(new_literal):>5,}  "
+              f"{steps:>14,} -> {new_steps:>14,} {bf_opt._saved(steps, new_steps)}  "
+              f"{'FAILED' if failures else 'ok'} ({len(inputs)} inputs)")
+        if failures:
+            input_data, cell_bits = failures[0]
+            print(f"  {len(failures)} mismatches, e.g. {input_data!r} at {cell_bits}-bit; not written",
+                  file=sys.stderr)
+            status = 1
+            continue
+
+        destination = args.output or (path if args.in_place else None)
+        if destination:
+            with open(destination, 'w') as f:
+                f.write(new)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
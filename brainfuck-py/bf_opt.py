@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Offline peephole optimizer for Brainfuck files.
+
+Rewrites a .bf file as a smaller program with the same output:
+
+- runs of +- and <> are replaced by their net effect; a +- run that
+  cancels out is kept as "+-" on cells that may hold raw input, since
+  arithmetic masks what , stored to the cell width
+- loops that start on a cell known to be zero never run, so they are
+  dropped; this covers clears of cells that are already zero and loops
+  right after a clear or another loop
+- code after the last output is dropped, since it cannot change output
+
+Cell values are tracked from the start of the program, when every cell
+is zero, and survive loops that return the pointer to where they started.
+Known values are exact integers, so the result is the same for any cell
+width. Before anything is written, both versions are run over a corpus
+of inputs and must agree.
+
+Usage:
+    python bf_opt.py                          # report savings for every .bf file here
+    python bf_opt.py timeago.bf -o small.bf   # write an optimized copy
+    python bf_opt.py --in-place *.bf          # rewrite files in place
+"""
+
+import argparse
+import os
+import random
+import sys
+
+import bf
+from bf import ADD, MOVE, OUT, IN, OPEN
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Outputs are compared at both widths; the programs are written for 32
+VERIFY_CELL_BITS = (32, 8)
+
+
+# ============================================================
+# PARSING
+# ============================================================
+
+def parse(code):
+    """
+    Parse source into a tree of (op, arg) nodes.
+
+    ADD and MOVE carry their net amount, OUT and IN None, and OPEN the
+    list of nodes in the loop body. An ADD of 0 stands for a run that
+    cancels out; it still masks the cell.
+
+    Raises:
+        ValueError: On unmatched brackets
+    """
+    code = bf._filter(code)
+    bf._match_brackets(code)
+    stack = [[]]
+    for c in code:
+        block = stack[-1]
+        if c in '+-':
+            _emit(block, ADD, 1 if c == '+' else -1)
+        elif c in '><':
+            _emit(block, MOVE, 1 if c == '>' else -1)
+        elif c == '.':
+            block.append((OUT, None))
+        elif c == ',':
+            block.append((IN, None))
+        elif c == '[':
+            stack.append([])
+        else:
+            body = stack.pop()
+            stack[-1].append((OPEN, body))
+    return stack[0]
+
+
+def unparse(program):
+    """Source for a tree from parse."""
+    parts = []
+    for op, arg in program:
+        if op == ADD:
+            parts.append('+' * arg if arg > 0 else '-' * -arg if arg < 0 else '+-')
+        elif op == MOVE:
+            parts.append('>' * arg if arg > 0 else '<' * -arg)
+        elif op == OUT:
+            parts.append('.')
+        elif op == IN:
+            parts.append(',')
+        else:
+            parts.append('[' + unparse(arg) + ']')
+    return ''.join(parts)
+
+
+def _emit(block, op, amount):
+    """Append an ADD or MOVE, merging it into a preceding one."""
+    if block and block[-1][0] == op:
+        amount += block.pop()[1]
+    if amount or op == ADD:
+        block.append((op, amount))
+
+
+# ============================================================
+# OPTIMIZATION
+# ============================================================
+
+class _Cells:
+    """
+    Known cell values by offset from an origin; None means unknown.
+
+    Offsets stay within half a tape either side of the origin, so no two
+    of them can be the same cell after wrapping.
+    """
+
+    def __init__(self, others_zero, tape_size):
+        self.values = {}
+        self.others_zero = others_zero
+        self.ptr = 0
+        self.limit = tape_size // 2
+
+    def get(self, offset):
+        return self.values.get(offset, 0 if self.others_zero else None)
+
+    def set(self, offset, value):
+        # Out of range, the write is kept only long enough for rebase to
+        # see that the tape is no longer all zero
+        self.values[offset] = value
+        if abs(offset) >= self.limit:
+            self.rebase()
+
+    def move(self, amount):
+        self.ptr += amount
+        if abs(self.ptr) >= self.limit:
+            self.rebase()
+
+    def rebase(self):
+        """Start over at the current cell, keeping only an all-zero tape."""
+        if not all(value == 0 for value in self.values.values()):
+            self.others_zero = False
+        self.values = {}
+        self.ptr = 0
+
+
+def _written(body):
+    """Offsets a loop body can change, or None if it moves the pointer."""
+    ptr = 0
+    written = set()
+    for op, arg in body:
+        if op in (ADD, IN):
+            written.add(ptr)
+        elif op == MOVE:
+            ptr += arg
+        elif op == OPEN:
+            inner = _written(arg)
+            if inner is None:
+                return None
+            written.add(ptr)
+            written.update(ptr + offset for offset in inner)
+    return written if ptr == 0 else None
+
+
+def _optimize_block(nodes, cells, tape_size):
+    out = []
+    for op, arg in nodes:
+        if op == ADD:
+            value = cells.get(cells.ptr)
+            cells.set(cells.ptr, None if value is None else value + arg)
+            _emit(out, ADD, arg)
+            # A known value is already in range, so cancelling out is a no-op
+            if value is not None and out[-1] == (ADD, 0):
+                out.pop()
+        elif op == MOVE:
+            cells.move(arg)
+            _emit(out, MOVE, arg)
+        elif op == OUT:
+            out.append((op, arg))
+        elif op == IN:
+            cells.set(cells.ptr, None)
+            out.append((op, arg))
+        else:
+            if cells.get(cells.ptr) == 0:
+                continue  # never entered
+            body = _optimize_block(arg, _Cells(False, tape_size), tape_size)
+            written = _written(body)
+            if written is None:
+                cells.values = {}
+                cells.others_zero = False
+            else:
+                for offset in written:
+                    cells.set(cells.ptr + offset, None)
+            cells.set(cells.ptr, 0)
+            out.append((OPEN, body))
+    return out
+
+
+def _has_output(program):
+    return any(op == OUT or (op == OPEN and _has_output(arg)) for op, arg in program)
+
+
+def optimize(code, tape_size=30000):
+    """
+    A smaller program with the same output as code.
+
+    Programs that stop with output identical to code's; code after the
+    last output is dropped, so a run that would have exceeded the step
+    limit only after its last output now finishes.
+
+    Raises:
+        ValueError: On unmatched brackets
+    """
+    program = _optimize_block(parse(code), _Cells(True, tape_size), tape_size)
+    last = max((i for i, node in enumerate(program) if _has_output([node])), default=-1)
+    return unparse(program[:last + 1])
+
+
+# ============================================================
+# VERIFICATION
+# ============================================================
+
+def corpus(size=100, seed=0):
+    """Inputs in the shapes the shipped programs read, plus noise."""
+    rng = random.Random(seed)
+    inputs = ['', '0', '0\x000']
+    while len(inputs) < size:
+        kind = rng.randrange(5)
+        if kind == 0:
+            start = rng.randint(0, 2 * 10**9)
+            separator = rng.choice('\x00,')
+            inputs.append(f"{start}{separator}{start + rng.randint(-10**7, 10**7)}")
+        elif kind == 1:
+            inputs.append(str(rng.randint(0, 10**rng.randint(1, 9))))
+        elif kind == 2:
+            inputs.append(rng.choice(['2h 30m', '90 minutes', '1:30', '2.5 hours', '1d', 'soon']))
+        elif kind == 3:
+            inputs.append(''.join(rng.choice('0123456789,\x00 ') for _ in range(rng.randint(1, 12))))
+        else:
+            inputs.append(''.join(chr(rng.randint(32, 126)) for _ in range(rng.randint(1, 12))))
+    return inputs
+
+
+def _outcome(code, input_data, cell_bits):
+    try:
+        return bf.execute(code, input_data, cell_bits)[:2]
+    except RuntimeError:
+        return None  # over the step limit
+
+
+def verify(code, optimized, inputs):
+    """
+    Run both versions over inputs; returns (steps, optimized_steps, failures).
+
+    Steps are totals at 32-bit cells over inputs both versions finish.
+    failures lists (input, cell_bits) where outputs differ, or where code
+    finishes and optimized does not.
+    """
+    steps = optimized_steps = 0
+    failures = []
+    for input_data in inputs:
+        for cell_bits in VERIFY_CELL_BITS:
+            before = _outcome(code, input_data, cell_bits)
+            after = _outcome(optimized, input_data, cell_bits)
+            if before is None:
+                continue
+            if after is None or after[0] != before[0]:
+                failures.append((input_data, cell_bits))
+            elif cell_bits == 32:
+                steps += before[1]
+                optimized_steps += after[1]
+    return steps, optimized_steps, failures
+
+
+def _saved(before, after):
+    return f"{(before - after) / before:6.1%}" if before else f"{'-':>6}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Optimize Brainfuck files')
+    parser.add_argument('files', nargs='*',
+                        help='Files to optimize (default: report on every .bf file here)')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('-o', '--output', help='Write the optimized program here (one file only)')
+    target.add_argument('--in-place', action='store_true', help='Rewrite each file')
+    parser.add_argument('--corpus', type=int, default=100, help='Inputs to verify with (default: 100)')
+    args = parser.parse_args(argv)
+
+    files = args.files or sorted(os.path.join(HERE, name) for name in os.listdir(HERE)
+                                 if name.endswith('.bf'))
+    if args.output and len(files) != 1:
+        parser.error('-o needs exactly one file')
+
+    inputs = corpus(args.corpus)
+    status = 0
+    print(f"{'file':<20} {'bytes':>7} {'':2} {'bytes':>7} {'saved':>6}  "
+          f"{'steps':>14} {'':2} {'steps':>14} {'saved':>6}  verified")
+    for path in files:
+        try:
+            with open(path) as f:
+                code = f.read()
+            optimized = optimize(code)
+        except (OSError, ValueError) as e:
+            print(f"Error: {path}: {e}", file=sys.stderr)
+            status = 1
+            continue
+        steps, optimized_steps, failures = verify(code, optimized, inputs)
+        size = len(code.encode('utf-8'))
+        print(f"{os.path.basename(path):<20} {size:>7,} -> {len(optimized):>7,} {_saved(size, len(optimized))}  "
+              f"{steps:>14,} -> {optimized_steps:>14,} {_saved(steps, optimized_steps)}  "
+              f"{'FAILED' if failures else 'ok'} ({len(inputs)} inputs)")
+        if failures:
+            input_data, cell_bits = failures[0]
+            print(f"  {len(failures)} mismatches, e.g. {input_data!r} at {cell_bits}-bit; not written",
+                  file=sys.stderr)
+            status = 1
+            continue
+
+        destination = args.output or (path if args.in_place else None)
+        if destination:
+            with open(destination, 'w') as f:
+                f.write(optimized)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Long-lived Brainfuck worker for the whenwords .bf programs.
+
+Preloads and compiles every .bf file in a directory once, then serves
+requests over a Unix domain socket or stdin/stdout pipes, so callers pay
+neither interpreter startup nor parsing per request.
+
+Usage:
+    python bf_worker.py --socket /tmp/bf.sock      # serve a Unix socket
+    python bf_worker.py --stdio                    # serve stdin/stdout
+
+Protocol: each message is a 4-byte big-endian length followed by that
+many bytes of UTF-8 JSON.
+
+    request:  {"program": "timeago", "input": "...",
+               "max_steps": 1000000, "timeout": 0.5}   (budgets optional)
+    reply:    {"ok": true, "output": "...", "steps": 2199}
+              {"ok": false, "error": "..."}
+
+A frame that is not JSON is answered with an error like any other bad
+request; only a truncated or oversized frame ends a connection.
+
+Requests from all connections go through one bounded queue and run one
+at a time. When the queue is full a socket request is answered with
+{"ok": false, "error": "busy"}; on pipes the reader just blocks. A
+request can lower, but never raise, the worker's step and time budgets.
+
+From Python, WorkerPool keeps warm workers and hands requests to idle ones:
+
+    with WorkerPool(size=2) as pool:
+        pool.run('timeago', '1704067170\\x001704067200')
+"""
+
+import argparse
+import json
+import os
+import queue
+import signal
+import socket
+import subprocess
+import sys
+import threading
+
+import bf
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Refuse frames larger than this, rather than allocating whatever a
+# corrupt length prefix asks for
+MAX_FRAME = 16 * 1024 * 1024
+
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_MAX_STEPS = 100000000
+DEFAULT_TIMEOUT = 5.0
+
+
+# ============================================================
+# FRAMING
+# ============================================================
+
+def send_message(stream, message):
+    """Write one length-prefixed JSON message to a binary stream."""
+    body = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    stream.write(len(body).to_bytes(4, 'big') + body)
+    stream.flush()
+
+
+def recv_message(stream):
+    """
+    Read one message from a binary stream; None at a clean EOF.
+
+    Raises:
+        ConnectionError: On a truncated or oversized frame
+        ValueError: When a whole frame is not UTF-8 JSON
+    """
+    header = stream.read(4)
+    if not header:
+        return None
+    if len(header) < 4:
+        raise ConnectionError("Truncated message header")
+    size = int.from_bytes(header, 'big')
+    if size > MAX_FRAME:
+        raise ConnectionError(f"Message of {size} bytes exceeds {MAX_FRAME}")
+    body = stream.read(size)
+    if len(body) < size:
+        raise ConnectionError("Truncated message body")
+    return json.loads(body.decode('utf-8'))
+
+
+# ============================================================
+# WORKER
+# ============================================================
+
+class _Timeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise _Timeout()
+
+
+def load_programs(directory, backend='ir'):
+    """Compile every .bf file in directory; returns {name: run}."""
+    programs = {}
+    for entry in sorted(os.listdir(directory)):
+        if entry.endswith('.bf'):
+            with open(os.path.join(directory, entry)) as f:
+                programs[entry[:-3]] = bf._prepare(f.read(), 32, 30000, backend)
+    return programs
+
+
+def _request_error(request):
+    """What is wrong with a request's shape or types, or None if nothing."""
+    if not isinstance(request, dict):
+        return "Request must be a JSON object"
+    if not isinstance(request.get('program'), str):
+        return "program must be a string"
+    if not isinstance(request.get('input', ''), str):
+        return "input must be a string"
+    max_steps = request.get('max_steps')
+    if max_steps is not None and (type(max_steps) is not int or max_steps <= 0):
+        return "max_steps must be a positive integer"
+    timeout = request.get('timeout')
+    if timeout is not None and (type(timeout) not in (int, float) or not timeout > 0):
+        return "timeout must be a positive number"
+    return None
+
+
+def handle(programs, request, max_steps=DEFAULT_MAX_STEPS, timeout=DEFAULT_TIMEOUT):
+    """
+    Run one request; returns the reply message.
+
+    Must be called from the main thread, where SIGALRM enforces the time
+    budget between bytecodes of the running program.
+    """
+    error = _request_error(request)
+    if error is not None:
+        return {'ok': False, 'error': error}
+    run = programs.get(request['program'])
+    if run is None:
+        return {'ok': False, 'error': f"Unknown program: {request['program']!r}"}
+
+    input_data = request.get('input', '')
+    try:
+        steps_budget = min(request.get('max_steps') or max_steps, max_steps)
+        time_budget = min(request.get('timeout') or timeout, timeout)
+        signal.setitimer(signal.ITIMER_REAL, time_budget)
+        tape = bf._reset_tape(None, 32, input_data, 30000)
+        output, steps = run(input_data, steps_budget, tape)
+    except _Timeout:
+        return {'ok': False, 'error': f"Execution exceeded {time_budget} seconds"}
+    except (RuntimeError, ValueError, TypeError, signal.ItimerError) as e:
+        return {'ok': False, 'error': str(e)}
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    return {'ok': True, 'output': output, 'steps': steps}
+
+
+def _execute(programs, requests, max_steps, timeout):
+    """
+    Drain the request queue in the main thread until a None arrives.
+
+    Items are (request, reply), where request is the decoded message, or
+    the ValueError of a frame that was read whole but did not decode.
+    """
+    signal.signal(signal.SIGALRM, _on_alarm)
+    while True:
+        item = requests.get()
+        if item is None:
+            return
+        request, reply = item
+        try:
+            if isinstance(request, ValueError):
+                message = {'ok': False, 'error': f"Invalid JSON: {request}"}
+            else:
+                message = handle(programs, request, max_steps, timeout)
+        except Exception as e:
+            # One bad request must not take the worker down for every client
+            message = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+        reply(message)
+
+
+def serve_stdio(programs, queue_size=DEFAULT_QUEUE_SIZE, max_steps=DEFAULT_MAX_STEPS,
+                timeout=DEFAULT_TIMEOUT, src=None, dst=None):
+    """Serve requests from src (stdin) and reply on dst (stdout) in order."""
+    src = src or sys.stdin.buffer
+    dst = dst or sys.stdout.buffer
+    requests = queue.Queue(maxsize=queue_size)
+
+    def read():
+        try:
+            while True:
+                try:
+                    request = recv_message(src)
+                except ValueError as e:
+                    request = e  # the frame was consumed, so the next one is intact
+                if request is None:
+                    break
+                requests.put((request, lambda message: send_message(dst, message)))
+        finally:
+            requests.put(None)
+
+    threading.Thread(target=read, daemon=True).start()
+    _execute(programs, requests, max_steps, timeout)
+
+
+def serve_socket(programs, path, queue_size=DEFAULT_QUEUE_SIZE, max_steps=DEFAULT_MAX_STEPS,
+                 timeout=DEFAULT_TIMEOUT):
+    """Serve requests on a Unix domain socket until interrupted."""
+    # Listen under a temporary name so the path only appears once it accepts
+    temporary = f"{path}.{os.getpid()}"
+    if os.path.exists(temporary):
+        os.remove(temporary)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(temporary)
+    server.listen()
+    os.replace(temporary, path)
+    requests = queue.Queue(maxsize=queue_size)
+
+    def connection(conn):
+        reader = conn.makefile('rb')
+        writer = conn.makefile('wb')
+        lock = threading.Lock()
+
+        def reply(message):
+            with lock:
+                send_message(writer, message)
+
+        try:
+            while True:
+                try:
+                    request = recv_message(reader)
+                except ValueError as e:
+                    request = e  # the frame was consumed, so the next one is intact
+                if request is None:
+                    break
+                try:
+                    requests.put_nowait((request, reply))
+                except queue.Full:
+                    reply({'ok': False, 'error': 'busy'})
+        except OSError:
+            pass  # a truncated or oversized frame, or the client went away
+        finally:
+            conn.close()
+
+    def accept():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                break
+            threading.Thread(target=connection, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    try:
+        _execute(programs, requests, max_steps, timeout)
+    finally:
+        server.close()
+        os.remove(path)
+
+
+# ============================================================
+# CLIENT
+# ============================================================
+
+class WorkerClient:
+    """Blocking client for one worker connection (socket or pipes)."""
+
+    def __init__(self, reader, writer, process=None, sock=None):
+        self._reader = reader
+        self._writer = writer
+        self._process = process
+        self._sock = sock
+
+    @classmethod
+    def connect(cls, path):
+        """Connect to a worker serving a Unix socket."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        return cls(sock.makefile('rb'), sock.makefile('wb'), sock=sock)
+
+    @classmethod
+    def spawn(cls, directory=HERE, backend='ir', max_steps=DEFAULT_MAX_STEPS,
+              timeout=DEFAULT_TIMEOUT):
+        """Start a worker process on pipes."""
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--stdio', '--dir', directory,
+             '--backend', backend, '--max-steps', str(max_steps), '--timeout', str(timeout)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        return cls(process.stdout, process.stdin, process=process)
+
+    def request(self, program, input_data="", max_steps=None, timeout=None):
+        """Send one request and return the reply message."""
+        message = {'program': program, 'input': input_data}
+        if max_steps is not None:
+            message['max_steps'] = max_steps
+        if timeout is not None:
+            message['timeout'] = timeout
+        send_message(self._writer, message)
+        reply = recv_message(self._reader)
+        if reply is None:
+            raise ConnectionError("Worker closed the connection")
+        return reply
+
+    def run(self, program, input_data="", max_steps=None, timeout=None):
+        """
+        Run a preloaded program and return its output.
+
+        Raises:
+            RuntimeError: With the worker's error message
+        """
+        reply = self.request(program, input_data, max_steps, timeout)
+        if not reply['ok']:
+            raise RuntimeError(reply['error'])
+        return reply['output']
+
+    def close(self):
+        for stream in (self._writer, self._reader):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        if self._sock is not None:
+            self._sock.close()
+        if self._process is not None:
+            self._process.wait()
+
+
+class WorkerPool:
+    """
+    A fixed set of warm worker processes.
+
+    run() blocks until a worker is idle, so the pool can be shared between
+    threads.
+    """
+
+    def __init__(self, size=2, directory=HERE, backend='ir', max_steps=DEFAULT_MAX_STEPS,
+                 timeout=DEFAULT_TIMEOUT):
+        self._clients = [WorkerClient.spawn(directory, backend, max_steps, timeout)
+                         for _ in range(size)]
+        self._idle = queue.Queue()
+        for client in self._clients:
+            self._idle.put(client)
+
+    def run(self, program, input_data="", max_steps=None, timeout=None):
+        """Run a preloaded program on an idle worker; see WorkerClient.run."""
+        client = self._idle.get()
+        try:
+            return client.run(program, input_data, max_steps, timeout)
+        finally:
+            self._idle.put(client)
+
+    def close(self):
+        for client in self._clients:
+            client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the .bf programs from a long-lived process')
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--socket', metavar='PATH', help='Serve a Unix domain socket')
+    mode.add_argument('--stdio', action='store_true', help='Serve stdin/stdout')
+    parser.add_argument('--dir', default=HERE,
+                        help='Directory of .bf programs to preload (default: this one)')
+    parser.add_argument('--backend', choices=['ir', 'python'], default='ir',
+                        help='Execution backend (default: ir)')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f'Pending requests before refusing or blocking (default: {DEFAULT_QUEUE_SIZE})')
+    parser.add_argument('--max-steps', type=int, default=DEFAULT_MAX_STEPS,
+                        help=f'Step budget per request (default: {DEFAULT_MAX_STEPS})')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f'Seconds per request (default: {DEFAULT_TIMEOUT})')
+    args = parser.parse_args(argv)
+
+    programs = load_programs(args.dir, args.backend)
+    options = dict(queue_size=args.queue_size, max_steps=args.max_steps, timeout=args.timeout)
+    try:
+        if args.stdio:
+            serve_stdio(programs, **options)
+        else:
+            print(f"Serving {', '.join(programs)} on {args.socket}", file=sys.stderr)
+            serve_socket(programs, args.socket, **options)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Parallel, timed runner for the whenwords conformance cases.
+
+Reads the spec cases (the Test<Function> classes generated from
+tests.yaml) out of test_whenwords.py once, runs them across a process
+pool with a step and a wall-clock budget per case, and reports the
+slowest cases by time or interpreter steps.
+
+In the 'bf' mode (see whenwords_lib.set_execution_mode) each case runs
+its .bf program if the program qualified; a case answered by Python
+instead, such as a run over the step budget, is shown as such.
+
+Usage:
+    python run_conformance.py                        # python mode, every CPU
+    python run_conformance.py --mode bf --sort steps
+    python run_conformance.py --jobs 4 --report slowest.txt
+"""
+
+import argparse
+import ast
+import concurrent.futures
+import functools
+import os
+import signal
+import sys
+import time
+from collections import namedtuple
+
+import whenwords_lib
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+TEST_FILE = os.path.join(HERE, 'test_whenwords.py')
+
+# The classes generated from tests.yaml
+SPEC_CLASSES = ('TestTimeago', 'TestDuration', 'TestParseDuration', 'TestHumanDate', 'TestDateRange')
+
+DEFAULT_TIMEOUT = 5.0
+
+SORT_KEYS = ('seconds', 'steps')
+
+Case = namedtuple('Case', ['id', 'function', 'args', 'kwargs', 'expected'])
+Case.__doc__ = """\
+One conformance case.
+
+id: Class::method, with [n] for each case of a method that has several
+function: whenwords_lib function name
+expected: The result, or ValueError for a case that must raise it
+"""
+
+CaseResult = namedtuple('CaseResult', ['id', 'status', 'seconds', 'steps', 'path', 'detail'])
+CaseResult.__doc__ = """\
+Outcome of a case.
+
+status: 'pass', 'fail' or 'timeout'
+seconds: Wall-clock time of the call
+steps: Interpreter steps of the .bf run, 0 if none ran
+path: 'bf', 'cache' or 'python', whichever produced the result
+detail: What went wrong, for other statuses
+"""
+
+
+# ============================================================
+# LOADING
+# ============================================================
+
+def load_cases(path=TEST_FILE):
+    """
+    Parse the spec cases out of a test file.
+
+    A method's cases are `result = f(...)` followed by `assert result ==
+    value`, and `with pytest.raises(ValueError): f(...)`, with literal
+    arguments.
+
+    Raises:
+        ValueError: For a spec method with no case of either shape
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    cases = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef) or node.name not in SPEC_CLASSES:
+            continue
+        for method in node.body:
+            if not isinstance(method, ast.FunctionDef) or not method.name.startswith('test_'):
+                continue
+            found = list(_method_cases(method))
+            if not found:
+                raise ValueError(f"No case found in {node.name}.{method.name}")
+            for i, (call, expected) in enumerate(found):
+                suffix = f"[{i}]" if len(found) > 1 else ''
+                cases.append(Case(
+                    f"{node.name}::{method.name}{suffix}", call.func.id,
+                    tuple(ast.literal_eval(arg) for arg in call.args),
+                    {kw.arg: ast.literal_eval(kw.value) for kw in call.keywords},
+                    expected))
+    return cases
+
+
+def _method_cases(method):
+    """Yield (call node, expected) for each case in a test method."""
+    call = None
+    for statement in method.body:
+        if isinstance(statement, ast.Assign) and isinstance(statement.value, ast.Call):
+            call = statement.value
+        elif isinstance(statement, ast.Assert) and call is not None:
+            test = statement.test
+            if isinstance(test, ast.Compare) and isinstance(test.ops[0], ast.Eq):
+                yield call, ast.literal_eval(test.comparators[0])
+        elif isinstance(statement, ast.With):
+            manager = statement.items[0].context_expr
+            if (isinstance(manager, ast.Call) and ast.unparse(manager.func) == 'pytest.raises'
+                    and ast.unparse(manager.args[0]) == 'ValueError'):
+                for inner in statement.body:
+                    if isinstance(inner, ast.Expr) and isinstance(inner.value, ast.Call):
+                        yield inner.value, ValueError
+
+
+# ============================================================
+# RUNNING
+# ============================================================
+
+class _Timeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise _Timeout()
+
+
+def _init_worker(mode, max_steps, backend):
+    whenwords_lib.set_execution_mode(mode, max_steps, backend)
+    signal.signal(signal.SIGALRM, _on_alarm)
+
+
+def _run_case(case, timeout):
+    """
+    Run one case in a pool worker; returns a CaseResult.
+
+    Pool workers run tasks in their main thread, where SIGALRM enforces
+    the time budget.
+    """
+    function = getattr(whenwords_lib, case.function)
+    whenwords_lib.reset_dispatch_stats()
+    detail = None
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    start = time.perf_counter()
+    try:
+        result = function(*case.args, **case.kwargs)
+    except ValueError as e:
+        result = ValueError
+        detail = f"raised ValueError: {e}"
+    except _Timeout:
+        result = _Timeout
+        detail = f"exceeded {timeout} seconds"
+    except Exception as e:
+        result = e
+        detail = f"raised {type(e).__name__}: {e}"
+    finally:
+        seconds = time.perf_counter() - start
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+    stats = whenwords_lib.dispatch_stats()[case.function]
+    if stats['cache_hits']:
+        path = 'cache'
+    elif stats['bf_runs'] and not stats['fallbacks']:
+        path = 'bf'
+    else:
+        path = 'python'
+
+    if result is _Timeout:
+        status = 'timeout'
+    elif result == case.expected:
+        status, detail = 'pass', None
+    else:
+        status = 'fail'
+        if result is not ValueError and not isinstance(result, Exception):
+            detail = f"returned {result!r}"
+        detail = f"expected {'ValueError' if case.expected is ValueError else repr(case.expected)}, {detail}"
+    return CaseResult(case.id, status, seconds, stats['bf_steps'], path, detail)
+
+
+def run_cases(cases, mode='python', jobs=None, max_steps=whenwords_lib.BF_MAX_STEPS,
+              timeout=DEFAULT_TIMEOUT, backend='ir'):
+    """
+    Run cases across a process pool; returns their CaseResults in order.
+
+    Args:
+        cases: From load_cases
+        mode: whenwords_lib execution mode for the workers
+        jobs: Worker processes (default: one per CPU)
+        max_steps: Step budget per .bf run
+        timeout: Wall-clock budget per case, in seconds
+        backend: bf.py backend for the .bf programs
+    """
+    jobs = jobs or os.cpu_count() or 1
+    # A few chunks per worker keeps them busy without a round trip per case
+    chunksize = max(1, len(cases) // (jobs * 4))
+    with concurrent.futures.ProcessPoolExecutor(jobs, initializer=_init_worker,
+                                                initargs=(mode, max_steps, backend)) as pool:
+        return list(pool.map(functools.partial(_run_case, timeout=timeout), cases,
+                             chunksize=chunksize))
+
+
+# ============================================================
+# REPORTING
+# ============================================================
+
+def format_report(results, elapsed, jobs, mode, sort='seconds', top=20):
+    """Summary, the slowest top cases by sort, then every failure."""
+    counts = {status: sum(r.status == status for r in results) for status in ('pass', 'fail', 'timeout')}
+    lines = [
+        f"Ran {len(results):,} cases in {elapsed:.2f}s on {jobs} worker{'s' if jobs != 1 else ''} ({mode} mode): "
+        f"{counts['pass']:,} passed, {counts['fail']:,} failed, {counts['timeout']:,} timed out",
+        f"Total case time {sum(r.seconds for r in results):.3f}s, "
+        f"{sum(r.steps for r in results):,} interpreter steps",
+        "",
+        f"Slowest {min(top, len(results))} cases by {sort}:",
+        f"{'seconds':>10} {'steps':>12}  {'path':<6} {'status':<7} case",
+    ]
+    for r in sorted(results, key=lambda r: getattr(r, sort), reverse=True)[:top]:
+        lines.append(f"{r.seconds:>10.6f} {r.steps:>12,}  {r.path:<6} {r.status:<7} {r.id}")
+    failures = [r for r in results if r.status != 'pass']
+    if failures:
+        lines += ["", "Failures:"]
+        lines += [f"  {r.id}: {r.detail}" for r in failures]
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the whenwords conformance cases in parallel')
+    parser.add_argument('--mode', choices=whenwords_lib.EXECUTION_MODES, default='python',
+                        help='whenwords_lib execution mode (default: python)')
+    parser.add_argument('--jobs', type=int, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--max-steps', type=int, default=whenwords_lib.BF_MAX_STEPS,
+                        help=f'Step budget per .bf run (default: {whenwords_lib.BF_MAX_STEPS})')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f'Seconds per case (default: {DEFAULT_TIMEOUT})')
+    parser.add_argument('--backend', choices=('ir', 'python'), default='ir',
+                        help='bf.py backend for the bf mode (default: ir)')
+    parser.add_argument('--sort', choices=SORT_KEYS, default='seconds',
+                        help='Order of the slowest cases (default: seconds)')
+    parser.add_argument('--top', type=int, default=20, help='Slowest cases to list (default: 20)')
+    parser.add_argument('--report', help='Write the report here instead of stdout')
+    parser.add_argument('--tests', default=TEST_FILE, help='Test file to read cases from')
+    args = parser.parse_args(argv)
+
+    try:
+        cases = load_cases(args.tests)
+    except (OSError, SyntaxError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    jobs = args.jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    results = run_cases(cases, args.mode, jobs, args.max_steps, args.timeout, args.backend)
+    report = format_report(results, time.perf_counter() - start, jobs, args.mode, args.sort, args.top)
+    if args.report:
+        with open(args.report, 'w') as f:
+            f.write(report)
+    else:
+        print(report, end='')
+    return 0 if all(r.status == 'pass' for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -18,6 +18,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from whenwords_lib import timeago, duration, parse_duration, human_date, date_range
+import bf
 import pytest
 
 
@@ -676,6 +677,688 @@ class TestDateRange:
         assert result == "January 1, 2023 \u2013 January 1, 2025"
 
 
+# ============================================================
+# EXECUTION MODE TESTS
+# ============================================================
+
+class TestExecutionMode:
+    # Cases the shipped programs, which print a fixed string, answer right
+    STUB_CASES = {
+        "timeago": [(1704067170, 1704067200)],
+        "duration": [(0,)],
+        "parse_duration": [("0s",)],
+        "human_date": [(1705276800, 1705276800)],
+        "date_range": [(1704067200, 1704067200)],
+    }
+
+    @pytest.fixture(autouse=True)
+    def bf_mode(self, monkeypatch):
+        import whenwords_lib
+        monkeypatch.setattr(whenwords_lib, "_QUALIFICATION_CASES", self.STUB_CASES)
+        whenwords_lib.set_execution_mode("bf")
+        whenwords_lib.reset_dispatch_stats()
+        yield whenwords_lib
+        whenwords_lib.set_execution_mode("python")
+        whenwords_lib.reset_dispatch_stats()
+
+    def test_runs_bf_program_and_caches(self, bf_mode):
+        assert timeago(1704067170, 1704067200) == "just now"
+        assert timeago(1704067170, 1704067200) == "just now"
+        assert human_date(1705276800, 1705276800) == "Today"
+        stats = bf_mode.dispatch_stats()
+        assert stats["timeago"]["bf_runs"] == 1 and stats["timeago"]["cache_hits"] == 1
+        assert stats["timeago"]["python_calls"] == 0 and stats["timeago"]["bf_seconds"] > 0
+        assert stats["human_date"]["bf_runs"] == 1
+
+    def test_falls_back_to_python(self, bf_mode):
+        # Arguments the program cannot take
+        assert duration(3661, {"compact": True}) == "1h 1m"
+        assert timeago(-60, 0) == "1 minute ago"
+        with pytest.raises(ValueError):
+            parse_duration("")
+        with pytest.raises(ValueError):
+            duration(-1)
+        # Over the step budget
+        assert date_range(1704067200, 1704067200) == "January 1, 2024"
+        bf_mode.set_execution_mode("bf", max_steps=10)
+        bf_mode._is_verified("date_range")
+        bf_mode._verified["date_range"] = True  # qualified under the bigger budget
+        assert date_range(1705276800, 1705881600) == "January 15\u201322, 2024"
+        stats = bf_mode.dispatch_stats()
+        assert stats["duration"]["fallbacks"] == 2 and stats["duration"]["bf_runs"] == 0
+        assert stats["date_range"]["fallbacks"] == 1 and stats["date_range"]["bf_runs"] == 2
+        assert stats["parse_duration"]["python_calls"] == 1
+
+    def test_only_qualified_programs_run(self, bf_mode, monkeypatch):
+        assert bf_mode.verified_programs() == tuple(self.STUB_CASES)
+        # Against the real qualification cases no shipped program passes
+        monkeypatch.undo()
+        bf_mode.set_execution_mode("bf")
+        assert bf_mode.verified_programs() == ()
+        assert timeago(0, 10**9) == "32 years ago"
+        assert date_range(1705276800, 1705881600) == "January 15\u201322, 2024"
+        stats = bf_mode.dispatch_stats()
+        assert stats["timeago"]["bf_runs"] == 0 and stats["timeago"]["fallbacks"] == 1
+        assert stats["date_range"]["bf_runs"] == 0
+
+    def test_qualification_rejects_wrong_answers(self, bf_mode, monkeypatch):
+        cases = dict(self.STUB_CASES, timeago=[(1704067170, 1704067200), (0, 10**9)])
+        monkeypatch.setattr(bf_mode, "_QUALIFICATION_CASES", cases)
+        bf_mode.set_execution_mode("bf")
+        assert "timeago" not in bf_mode.verified_programs()
+        assert timeago(1704067170, 1704067200) == "just now"
+        assert bf_mode.dispatch_stats()["timeago"]["bf_runs"] == 0
+
+    def test_keyword_arguments(self, bf_mode):
+        assert timeago(timestamp=1704067170, reference=1704067200) == "just now"
+        assert duration(seconds=0) == "0 seconds"
+        assert parse_duration(text="0s") == 0
+        assert human_date(timestamp=1705276800, reference=1705276800) == "Today"
+        assert date_range(start=1704067200, end=1704067200) == "January 1, 2024"
+        stats = bf_mode.dispatch_stats()
+        assert stats["human_date"]["bf_runs"] == 1 and stats["date_range"]["bf_runs"] == 1
+
+    def test_result_cache_is_bounded(self, bf_mode, monkeypatch):
+        monkeypatch.setattr(bf_mode, "BF_RESULT_CACHE_SIZE", 2)
+        for seconds in (1, 2, 3):
+            duration(seconds)
+        assert len(bf_mode._results) == 2
+        assert [key[1] for key in bf_mode._results] == ["2", "3"]
+
+    def test_python_mode_and_report(self, bf_mode):
+        bf_mode.set_execution_mode("python")
+        assert duration(3661) == "1 hour, 1 minute"
+        # The default mode calls the functions directly and counts nothing
+        assert set(bf_mode.dispatch_stats()["duration"].values()) == {0}
+        assert "duration" in bf_mode.format_dispatch_stats()
+        with pytest.raises(ValueError, match="Unknown execution mode"):
+            bf_mode.set_execution_mode("jit")
+
+
+class TestConformanceRunner:
+    def test_loads_every_spec_case(self):
+        import run_conformance
+        cases = run_conformance.load_cases()
+        methods = [name for cls in (TestTimeago, TestDuration, TestParseDuration, TestHumanDate, TestDateRange)
+                   for name in vars(cls) if name.startswith("test_")]
+        assert len({case.id.split("::")[1].split("[")[0] for case in cases}) == len(methods)
+        by_id = {case.id: case for case in cases}
+        assert by_id["TestDuration::test_compact_1h_1m"].args == (3661, {"compact": True})
+        assert by_id["TestDuration::test_error_negative_seconds"].expected is ValueError
+
+    @pytest.mark.parametrize("mode", ["python", "bf"])
+    def test_run_cases(self, mode):
+        import run_conformance
+        cases = [case for case in run_conformance.load_cases() if case.function == "timeago"][:6]
+        results = run_conformance.run_cases(cases, mode, jobs=2)
+        assert [r.id for r in results] == [case.id for case in cases]
+        # timeago.bf prints "just now" for everything, so it never qualifies
+        # and the 'bf' mode answers from Python too
+        assert all(r.status == "pass" and r.path == "python" and r.steps == 0 for r in results)
+
+    def test_case_timeout(self, monkeypatch):
+        import signal
+        import time
+        import run_conformance
+        import whenwords_lib
+        monkeypatch.setattr(whenwords_lib, "timeago", lambda *args: time.sleep(2))
+        previous = signal.getsignal(signal.SIGALRM)
+        try:
+            run_conformance._init_worker("python", 1000, "ir")
+            case = run_conformance.Case("T::t", "timeago", (0, 0), {}, "just now")
+            result = run_conformance._run_case(case, timeout=0.05)
+        finally:
+            signal.signal(signal.SIGALRM, previous)
+        assert result.status == "timeout" and result.seconds < 1
+        assert result.detail == "exceeded 0.05 seconds"
+
+    def test_report(self):
+        import run_conformance
+        Result = run_conformance.CaseResult
+        results = [Result("a", "pass", 0.5, 10, "bf", None),
+                   Result("b", "fail", 0.1, 300, "bf", "expected 'x', returned 'y'"),
+                   Result("c", "timeout", 2.0, 0, "python", "exceeded 1.0 seconds")]
+        report = run_conformance.format_report(results, 2.1, 2, "bf", sort="steps", top=2)
+        assert "1 passed, 1 failed, 1 timed out" in report
+        slowest = report.split("by steps:")[1].split("Failures:")[0].split()
+        assert slowest[-1] == "a" and slowest[-6] == "b" and "c" not in slowest
+        assert "  b: expected 'x', returned 'y'" in report and "  c: exceeded" in report
+
+
+# ============================================================
+# INTERPRETER TESTS
+# ============================================================
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _outcome(fn, *args, **kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except (RuntimeError, ValueError) as e:
+        return (type(e).__name__, str(e))
+
+
+class TestInterpreter:
+    def test_hello(self):
+        code = "++++++++[>++++[>++>+++>+++>+<<<<-]>+>+>->>+[<]<-]>>."
+        assert bf.interpret(code) == "H"
+
+    def test_echo(self):
+        assert bf.interpret(",.,.", "A") == "A\x00"
+
+    def test_unmatched_brackets(self):
+        with pytest.raises(ValueError, match="Unmatched \\["):
+            bf.interpret("[[]")
+        with pytest.raises(ValueError, match="Unmatched \\]"):
+            bf.interpret("[]]")
+
+    def test_ir_folds_runs_and_loops(self):
+        program = bf.compile_ir("+++>>[-]<<[->+>++<<]")
+        assert [op for op, _, _ in program] == [bf.ADD, bf.MOVE, bf.CLEAR, bf.MOVE, bf.MULADD]
+        assert program[0] == (bf.ADD, 3, 3)
+        assert program[4][1] == (1, 9, ((1, 1), (2, 2)))
+
+    def test_jump_targets(self):
+        program = bf.compile_ir("+[>+<.-]")
+        assert program[1] == (bf.OPEN, len(program), 1)
+        assert program[-1] == (bf.CLOSE, 2, 1)
+
+    @pytest.mark.parametrize("code", [
+        "+++++[->++<]>.", "++[+]+.", "+++[>+++[>+<-]<-]>>.", "-[->+<]>.",
+        ",[->+>+<<]>.>.", "+[>+]", "+[]", "<<+.>>.", "++[>-<-+-]>.",
+    ])
+    @pytest.mark.parametrize("cell_bits", [4, 8, 32])
+    @pytest.mark.parametrize("max_steps", [10, 200, 100000])
+    @pytest.mark.parametrize("backend", ["ir", "python"])
+    def test_matches_naive(self, code, cell_bits, max_steps, backend):
+        kwargs = dict(cell_bits=cell_bits, tape_size=16, max_steps=max_steps)
+        assert _outcome(bf.interpret, code, "\u20ac", backend=backend, **kwargs) == \
+            _outcome(bf._interpret_naive, code, "\u20ac", **kwargs)
+
+    @pytest.mark.parametrize("name,input_data", [
+        ("timeago.bf", "1704067170\x001704067200"),
+        ("duration.bf", "93661,"),
+        ("date_range.bf", "1705276800,1705881600"),
+    ])
+    def test_bf_files_match_naive(self, name, input_data):
+        with open(os.path.join(HERE, name)) as f:
+            code = f.read()
+        # 12-bit cells keep the wraparound input within reach of the naive loop
+        kwargs = dict(cell_bits=12, max_steps=10**6)
+        expected = bf._interpret_naive(code, input_data, **kwargs)
+        assert bf.interpret(code, input_data, **kwargs) == expected
+        steps = bf.execute(code, input_data, cell_bits=12, max_steps=float('inf')).steps
+        with pytest.raises(RuntimeError):
+            bf._interpret_naive(code, input_data, cell_bits=12, max_steps=steps - 1)
+        with pytest.raises(RuntimeError):
+            bf.interpret(code, input_data, cell_bits=12, max_steps=steps - 1)
+
+    def test_filter_drops_comments_and_non_ascii(self):
+        assert bf._filter("a+b-\u00e9>\u20ac<[x].,\n") == "+-><[].,"
+
+    @pytest.mark.parametrize("cell_bits,input_data,itemsize", [
+        (8, "", 1), (16, "abc", 2), (32, "", 4), (64, "", 8),
+        # , stores characters unmasked, so the tape must be wide enough for them
+        (8, "\u20ac", 2), (8, "\U0001F600", 4),
+    ])
+    def test_tape_type_follows_cell_bits(self, cell_bits, input_data, itemsize):
+        tape = bf._new_tape(bf._tape_typecode(cell_bits, input_data), 10)
+        assert tape.itemsize == itemsize and len(tape) == 10 and not any(tape)
+
+    def test_wide_cells_use_a_list(self):
+        assert bf._new_tape(bf._tape_typecode(100, ""), 5) == [0] * 5
+        assert bf.interpret("-.", cell_bits=100) == "\xff"
+
+    def test_packed_program_is_cached(self):
+        code = "++[->+<]>."
+        packed = bf._packed_program(code, 30000)
+        assert bf._packed_program(code, 30000) is packed
+        ops, args, costs, loops = packed
+        assert list(ops) == [bf.ADD, bf.MULADD, bf.MOVE, bf.OUT]
+        assert loops == [(1, 5, ((1, 1),))] and args[1] == 0
+
+    @pytest.mark.parametrize("backend", ["ir", "python"])
+    def test_execute_reports_tape_footprint(self, backend):
+        with open(os.path.join(HERE, "timeago.bf")) as f:
+            code = f.read()
+        result = bf.execute(code, "1704067170\x001704067200", backend=backend)
+        assert result.output == "just now"
+        assert result.steps == 2199
+        # 30 cells right of the start plus the cells wrapped around to the left
+        assert result.tape_cells == len(result.tape) == 61
+        assert result.tape_bytes == 61 * result.tape.itemsize
+
+    @pytest.mark.parametrize("backend", ["ir", "python"])
+    def test_execute_reuses_tape(self, backend):
+        first = bf.execute(">>>+++<<<<<-", backend=backend)
+        assert first.tape_cells == 6
+        second = bf.execute(">>.", tape=first.tape, backend=backend)
+        assert second.tape is first.tape
+        assert second.output == "\x00" and not any(second.tape)
+
+    @pytest.mark.parametrize("backend", ["ir", "python"])
+    def test_run_many_matches_interpret(self, backend):
+        code = ",[.,]>+++[->++<]>."
+        inputs = ["abc", "", "\u20ac\u20ac", "xy"]
+        assert list(bf.run_many(code, inputs, backend=backend)) == \
+            [bf.interpret(code, i) for i in inputs]
+
+    def test_run_many_is_lazy(self):
+        def inputs():
+            yield "a"
+            raise AssertionError("read past the first input")
+        assert next(bf.run_many(",.", inputs())) == "a"
+
+    def test_run_many_step_limit(self):
+        with pytest.raises(RuntimeError):
+            list(bf.run_many(",[]", ["", "x"], max_steps=100))
+
+    def test_lines_mode(self, capsys):
+        import io
+        src = io.StringIO("1704067170\x001704067200\n1,2\n93661\r\n")
+        dst = io.StringIO()
+        failures = bf._run_lines(os.path.join(HERE, "timeago.bf"), "ir", src, dst)
+        assert dst.getvalue() == "just now\n\njust now\n"
+        assert failures == 1
+        err = capsys.readouterr().err
+        assert "Error on line 2" in err and "inputs/sec" in err
+
+    @pytest.mark.parametrize("source", [
+        "1704067170\x001704067200",
+        b"1704067170\x001704067200",
+        ["1704067", "170\x00", "1704067200"],
+        [b"1704067170\x00", b"", b"1704067200"],
+    ])
+    def test_stream_matches_interpret(self, source):
+        with open(os.path.join(HERE, "timeago.bf")) as f:
+            code = f.read()
+        chunks = []
+        steps = bf.stream(code, source, chunks.append)
+        assert b"".join(chunks).decode("latin-1") == "just now"
+        assert steps == bf.execute(code, "1704067170\x001704067200").steps
+
+    def test_stream_files(self):
+        import io
+        code = ",[.,]++++++++++."
+        dst = io.BytesIO()
+        bf.stream(code, io.BytesIO(b"ab\xffc"), dst)
+        assert dst.getvalue() == b"ab\xffc\n"
+        dst = io.BytesIO()
+        bf.stream(code, io.StringIO("\u20acx"), dst)
+        assert dst.getvalue().decode("latin-1") == bf.interpret(code, "\u20acx")
+
+    def test_stream_flushing(self):
+        code = "+++++[>++++++++++++++++++++<-]>.+.<++++++++++.>.,."
+        writes = []
+        bf.stream(code, "z", writes.append)
+        assert writes == [b"de\n" + b"e", b"z"]  # written before , and at the end
+        writes = []
+        bf.stream(code, "z", writes.append, line_buffered=True)
+        assert writes == [b"de\n", b"e", b"z"]
+        writes = []
+        bf.stream(code, "z", writes.append, buffer_size=1)
+        assert writes == [b"d", b"e", b"\n", b"e", b"z"]
+        with pytest.raises(ValueError, match="buffer_size"):
+            bf.stream(code, "", writes.append, buffer_size=0)
+
+    def test_stream_reads_lazily(self):
+        writes = []
+
+        def source():
+            # Output so far is written before the program waits for input
+            assert writes == [b"?"]
+            yield b"a"
+            raise AssertionError("read past the input the program needed")
+
+        bf.stream("+" * 63 + ".>,.", source(), writes.append)
+        assert writes == [b"?", b"a"]
+
+    def test_stream_step_limit_writes_output(self):
+        writes = []
+        with pytest.raises(RuntimeError, match="exceeded 100 steps"):
+            bf.stream("++.[]", None, writes.append, max_steps=100)
+        assert writes == [b"\x02"]
+
+    def test_cli_streams_stdin(self, monkeypatch, capsysbinary):
+        import io
+        monkeypatch.setattr(sys, "stdin", io.StringIO("1704067170\x001704067200"))
+        assert bf.main([os.path.join(HERE, "timeago.bf")]) == 0
+        assert capsysbinary.readouterr().out == b"just now"
+
+    def test_execute_has_no_naive_backend(self):
+        with pytest.raises(ValueError, match="Unknown backend"):
+            bf.execute("+", backend="naive")
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError, match="Unknown backend"):
+            bf.interpret("+", backend="jit")
+
+    def test_transpile_defines_run(self):
+        namespace = {"grow": bf._grow}
+        exec(bf.transpile("++[->+++<]>."), namespace)
+        assert namespace["run"]("", 1000, [0]) == ("\x06", 19)
+
+    def test_python_backend_deep_nesting_falls_back(self):
+        code = "+" + "[" * 25 + "-" + "]" * 25 + "+."
+        with pytest.raises(ValueError, match="nested deeper"):
+            bf.transpile(code)
+        assert bf.interpret(code, backend="python") == bf._interpret_naive(code)
+
+    def test_run_file_caches_python_backend(self, tmp_path):
+        path = tmp_path / "prog.bf"
+        path.write_text("++++++++[>++++++++<-]>+.")
+        assert bf.run_file(str(path), backend="python") == "A"
+        cached = list((tmp_path / "__bfcache__").iterdir())
+        assert len(cached) == 1 and cached[0].name.endswith(".bfc")
+
+        # A new process starts with an empty in-memory cache
+        bf._python_runners.clear()
+        assert bf.run_file(str(path), backend="python") == "A"
+
+        # Edited source gets a new entry rather than the stale one
+        path.write_text("++++++++[>++++++++<-]>++.")
+        assert bf.run_file(str(path), backend="python") == "B"
+        assert len(list((tmp_path / "__bfcache__").iterdir())) == 2
+
+    @pytest.mark.parametrize("backend", ["ir", "python"])
+    def test_runs_resume_from_input_snapshot(self, backend):
+        code = "++++++++[>++++++++<-]>+.<+++[>+<-]>,[.,]"
+        bf._snapshots.clear()
+        bf._python_runners.clear()
+        assert bf.interpret(code, "xy", cell_bits=8, backend=backend) == "Axy"
+        (pc, ptr, top, bottom, steps, output), cells = bf._snapshots[(code, 8, 30000)]
+        assert (ptr, output, cells) == (1, "A", (0, 68))
+
+        result = bf.execute(code, "hello", cell_bits=8, backend=backend)
+        assert result.output == "Ahello" == bf._interpret_naive(code, "hello", 8)
+        instructions, loops = bf._unpack(bf._packed_program(code, 30000))
+        assert result.steps == bf._run_ir(instructions, loops, "hello", 8, 30000, 10**8)[1]
+        # A limit inside the prefix still raises
+        with pytest.raises(RuntimeError):
+            bf.interpret(code, "hello", cell_bits=8, max_steps=100, backend=backend)
+
+    def test_python_backend_without_top_level_input(self):
+        # The first , is inside a loop, where a transpiled run cannot resume
+        code = "+[>,.<-]>."
+        bf._snapshots.clear()
+        bf._python_runners.clear()
+        for input_data in ("ab", "c"):
+            assert bf.interpret(code, input_data, backend="python") == \
+                bf._interpret_naive(code, input_data)
+
+    def test_step_limit_on_wraparound_loop(self):
+        # 2**32 - 1 iterations of [+] are counted without being run
+        with pytest.raises(RuntimeError, match="exceeded 1000000 steps"):
+            bf.interpret("+[+]", max_steps=10**6)
+
+    def test_profile_attributes_steps_to_loops(self):
+        code = "++ two\n[>+++[>+<-]<-]."
+        profile = bf.Profile()
+        assert bf.interpret(code, profile=profile) == "\x00"
+        assert profile.steps == bf.execute(code).steps
+        assert (profile.pointer_min, profile.pointer_max) == (0, 2)
+        outer, inner = profile.sorted(profile.loops, "offset")
+        assert (outer["line"], outer["col"], outer["offset"], outer["byte"]) == (2, 1, 7, 7)
+        assert (outer["entries"], outer["iterations"], outer["folded"]) == (1, 2, False)
+        assert outer["steps"] == profile.steps - 3
+        assert (inner["source"], inner["iterations"], inner["folded"]) == ("[>+<-]", 6, True)
+
+    def test_profile_filled_on_step_limit(self, capsys, tmp_path):
+        import json
+        profile = bf.Profile()
+        with pytest.raises(RuntimeError, match="exceeded 1000 steps"):
+            bf.interpret("+é[>+<]", max_steps=1000, profile=profile)
+        hot = profile.sorted(profile.loops)[0]
+        assert (hot["source"], hot["byte"], hot["col"]) == ("[>+<]", 3, 3)
+        assert hot["steps"] == profile.steps - 1 > 1000
+        assert "Loops by steps" in profile.report()
+
+        path = tmp_path / "spin.bf"
+        path.write_text("+[+]")
+        assert bf.main(["--profile", "json", str(path), "x"]) == 1
+        report = json.loads(capsys.readouterr().err.split("Error:")[0])
+        assert report["loops"][0]["iterations"] == 2**32 - 1
+
+
+class TestWorker:
+    def test_stdio_replies_in_order(self):
+        import io
+        import bf_worker
+        programs = bf_worker.load_programs(HERE)
+        src = io.BytesIO()
+        for request in ({"program": "timeago", "input": "1704067170\x001704067200"},
+                        {"program": "nope"},
+                        {"program": "duration", "input": "93661"}):
+            bf_worker.send_message(src, request)
+        src.seek(0)
+        dst = io.BytesIO()
+        bf_worker.serve_stdio(programs, src=src, dst=dst)
+        dst.seek(0)
+        replies = [bf_worker.recv_message(dst) for _ in range(3)]
+        assert replies[0] == {"ok": True, "output": "just now", "steps": 2199}
+        assert replies[1] == {"ok": False, "error": "Unknown program: 'nope'"}
+        assert replies[2]["output"] == bf.run_file(os.path.join(HERE, "duration.bf"), "93661")
+        assert bf_worker.recv_message(dst) is None
+
+    @pytest.mark.parametrize("request_,error", [
+        ({"program": "timeago", "input": 5}, "input must be a string"),
+        (["x"], "Request must be a JSON object"),
+        ({"program": ["timeago"]}, "program must be a string"),
+        ({"program": "timeago", "timeout": -1}, "timeout must be a positive number"),
+        ({"program": "timeago", "timeout": "1"}, "timeout must be a positive number"),
+        ({"program": "timeago", "max_steps": "10"}, "max_steps must be a positive integer"),
+        ({"program": "timeago", "max_steps": 0}, "max_steps must be a positive integer"),
+    ])
+    def test_malformed_requests(self, request_, error):
+        import io
+        import bf_worker
+        programs = bf_worker.load_programs(HERE)
+        src = io.BytesIO()
+        # The worker answers the bad request and keeps serving the next one
+        bf_worker.send_message(src, request_)
+        bf_worker.send_message(src, {"program": "timeago", "input": "1704067170\x001704067200"})
+        src.seek(0)
+        dst = io.BytesIO()
+        bf_worker.serve_stdio(programs, src=src, dst=dst)
+        dst.seek(0)
+        assert bf_worker.recv_message(dst) == {"ok": False, "error": error}
+        assert bf_worker.recv_message(dst)["output"] == "just now"
+
+    @pytest.mark.parametrize("frame", [b"{not json", b"\xff\xfe"])
+    def test_stdio_survives_undecodable_frames(self, frame):
+        import io
+        import bf_worker
+        programs = bf_worker.load_programs(HERE)
+        src = io.BytesIO(len(frame).to_bytes(4, "big") + frame)
+        src.seek(0, io.SEEK_END)
+        bf_worker.send_message(src, {"program": "timeago", "input": "1704067170\x001704067200"})
+        src.seek(0)
+        dst = io.BytesIO()
+        bf_worker.serve_stdio(programs, src=src, dst=dst)
+        dst.seek(0)
+        assert bf_worker.recv_message(dst)["error"].startswith("Invalid JSON: ")
+        assert bf_worker.recv_message(dst)["output"] == "just now"
+
+    def test_unexpected_exception_is_a_reply(self):
+        import queue
+        import bf_worker
+
+        def broken(input_data, max_steps, tape):
+            raise KeyError("boom")
+        requests = queue.Queue()
+        replies = []
+        requests.put(({"program": "broken"}, replies.append))
+        requests.put(None)
+        bf_worker._execute({"broken": broken}, requests, 100, 1.0)
+        assert replies == [{"ok": False, "error": "KeyError: 'boom'"}]
+
+    def test_pool_budgets(self, tmp_path):
+        import bf_worker
+        (tmp_path / "spin.bf").write_text("+[]")
+        (tmp_path / "ten.bf").write_text("+" * 10 + ".")
+        with bf_worker.WorkerPool(size=1, directory=str(tmp_path), max_steps=10**12,
+                                  timeout=0.2) as pool:
+            assert pool.run("ten") == "\n"
+            # A request can lower the step budget but not raise it
+            with pytest.raises(RuntimeError, match="exceeded 5 steps"):
+                pool.run("ten", max_steps=5)
+            with pytest.raises(RuntimeError, match="exceeded 0.2 seconds"):
+                pool.run("spin", timeout=60)
+            assert pool.run("ten") == "\n"
+
+    def test_socket(self, tmp_path):
+        import subprocess
+        import time
+        import bf_worker
+        path = str(tmp_path / "bf.sock")
+        worker = subprocess.Popen([sys.executable, os.path.join(HERE, "bf_worker.py"), "--socket", path],
+                                  stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 10
+            while not os.path.exists(path) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            clients = [bf_worker.WorkerClient.connect(path) for _ in range(2)]
+            assert [c.run("timeago", "1704067170\x001704067200") for c in clients] == ["just now"] * 2
+            for client in clients:
+                client.close()
+            # A frame that is not JSON gets an error, and the connection stays open
+            import socket
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+                conn.connect(path)
+                stream = conn.makefile("rwb")
+                stream.write(len(b"{not json").to_bytes(4, "big") + b"{not json")
+                bf_worker.send_message(stream, {"program": "timeago", "input": "1704067170\x001704067200"})
+                assert bf_worker.recv_message(stream)["error"].startswith("Invalid JSON")
+                assert bf_worker.recv_message(stream)["output"] == "just now"
+        finally:
+            worker.terminate()
+            worker.wait()
+
+
+class TestOptimizer:
+    @pytest.mark.parametrize("code,expected", [
+        (">>[-][-]<<+-+.", "+."),          # zero clears and cancelling runs
+        ("+[-][>+<]>[-].", "+[-]>."),       # dead loops after a clear
+        (",[->+<]>[-]>[-].", ",[->+<]>[-]>."),  # a balanced loop only forgets what it writes
+        (",[>]>[-].", ",[>]>[-]."),         # an unbalanced one forgets everything
+        ("+.>+[-]", "+."),                  # nothing after the last output
+        (",+-.", ",+-."),                   # + masks raw input, so +- is not a no-op
+    ])
+    def test_optimize(self, code, expected):
+        import bf_opt
+        assert bf_opt.optimize(code) == expected
+
+    @pytest.mark.parametrize("name", ["timeago.bf", "duration.bf", "parse_duration.bf"])
+    def test_shipped_files_shrink_and_verify(self, name):
+        import bf_opt
+        with open(os.path.join(HERE, name)) as f:
+            code = f.read()
+        optimized = bf_opt.optimize(code)
+        assert len(optimized) < len(code)
+        steps, optimized_steps, failures = bf_opt.verify(code, optimized, bf_opt.corpus(20))
+        assert failures == [] and optimized_steps < steps
+
+    @pytest.mark.parametrize("tape_size", [1, 2, 3, 4])
+    @pytest.mark.parametrize("code", [
+        ".,[-].",
+        "++[+.]-------.++",
+        ">.--[++++.+++-<],>>",
+        "[<<-<<[>>>,,]+++++],<[,]<<<.>>>.",
+    ])
+    def test_small_tapes_keep_output(self, code, tape_size):
+        import bf_opt
+        optimized = bf_opt.optimize(code, tape_size)
+        for input_data in ["", "\x00\x00", "\x02\x00\x03", "\x01\x03\x03"]:
+            before = bf.execute(code, input_data, 8, tape_size, 10000).output
+            assert bf.execute(optimized, input_data, 8, tape_size, 10000).output == before
+
+    def test_cli_writes_only_verified_output(self, tmp_path, capsys):
+        import bf_opt
+        path = tmp_path / "prog.bf"
+        path.write_text("comment >>[-]<< ++++++++[>++++++++<-]>+.")
+        assert bf_opt.main([str(path), "--in-place", "--corpus", "5"]) == 0
+        assert path.read_text() == "++++++++[>++++++++<-]>+."
+        assert "prog.bf" in capsys.readouterr().out
+
+
+class TestGenerator:
+    @pytest.mark.parametrize("text", ["", "a", "just now", "January 1, 2024", "\x00\xff~ "])
+    @pytest.mark.parametrize("cells", [1, 2, 5])
+    @pytest.mark.parametrize("objective", ["steps", "size"])
+    def test_generate_prints_text(self, text, cells, objective):
+        import bf_gen
+        code = bf_gen.generate(text, cells, objective=objective)
+        assert bf.interpret(code, cell_bits=8) == text
+        assert code.count(">") == code.count("<")  # back on the first cell
+        assert bf_gen._reach(code) < cells
+
+    def test_objectives(self):
+        import bf_gen
+        text = "January 1, 2024"
+        one_cell = bf.execute(bf_gen.generate(text, 1)).steps
+        fewest_steps = bf_gen.generate(text)
+        shortest = bf_gen.generate(text, objective="size")
+        assert bf.execute(fewest_steps).steps < one_cell
+        assert "[" in shortest and len(shortest) < len(fewest_steps)
+        assert bf.execute(shortest).steps > bf.execute(fewest_steps).steps
+
+    def test_generate_errors(self):
+        import bf_gen
+        with pytest.raises(ValueError, match="below 256"):
+            bf_gen.generate("\u2013")
+        with pytest.raises(ValueError, match="at least one"):
+            bf_gen.generate("a", cells=0)
+
+    def test_regenerate_timeago(self):
+        import bf_gen
+        import bf_opt
+        with open(os.path.join(HERE, "timeago.bf")) as f:
+            code = f.read()
+        assert bf_gen.literal_section(code)[1] == "just now"
+        new = bf_gen.regenerate(code)
+        steps, new_steps, failures = bf_opt.verify(code, new, bf_opt.corpus(20))
+        assert failures == [] and new_steps < steps
+        assert bf_gen.regenerate("+.") is None
+
+
+class TestBatch:
+    @pytest.mark.parametrize("name", ["timeago.bf", "duration.bf", "date_range.bf", "parse_duration.bf"])
+    def test_matches_interpret(self, name):
+        bf_batch = pytest.importorskip("bf_batch")
+        import bf_opt
+        with open(os.path.join(HERE, name)) as f:
+            code = f.read()
+        inputs = []
+        for input_data in bf_opt.corpus(60):
+            try:
+                bf.interpret(code, input_data)
+            except RuntimeError:
+                continue
+            inputs.append(input_data)
+        assert bf_batch.run_batch(code, inputs) == [bf.interpret(code, i) for i in inputs]
+
+    def test_divergent_lanes(self):
+        bf_batch = pytest.importorskip("bf_batch")
+        # Lanes leave the loop at different times and wrap the pointer
+        # differently; 8-bit cells make [+] run for different counts
+        code = ",[>,]<[.<]+[+]<<<<<<.,[->>+<<]>>."
+        inputs = ["", "a", "abc", "\xff\x01", "\u20ac", "xyzzy" * 3]
+        for cell_bits, tape_size in [(8, 30000), (8, 5), (12, 3)]:
+            expected = [bf.interpret(code, i, cell_bits, tape_size) for i in inputs]
+            assert bf_batch.run_batch(code, inputs, cell_bits, tape_size) == expected
+
+    def test_errors(self):
+        bf_batch = pytest.importorskip("bf_batch")
+        assert bf_batch.run_batch("+.", []) == []
+        with pytest.raises(RuntimeError, match="Input 1: Execution exceeded 100 steps"):
+            bf_batch.run_batch(",[.]", ["", "a", ""], max_steps=100)
+        with pytest.raises(ValueError, match="cell_bits"):
+            bf_batch.run_batch("+.", ["a"], cell_bits=64)
+        with pytest.raises(ValueError, match="Unmatched"):
+            bf_batch.run_batch("[", ["a"])
+
+
 # ============================================================
 # MAIN
 # ============================================================
@@ -15,17 +15,274 @@ to how most esolangs handle complex operations.
 
 The generated .bf files can be used standalone with the bf.py interpreter,
 but for full test coverage, use this module as the library interface.
+
+set_execution_mode('bf') routes each function through its .bf program
+instead, once the program matches Python on a set of qualification cases
+(see EXECUTION MODES below).
 """
 
+import functools
+import hashlib
+import os
 import re
+import time
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any, Union
 
 
+# ============================================================
+# EXECUTION MODES
+# ============================================================
+
+# 'python' runs the functions as written below. 'bf' runs each through its
+# .bf program with bf.py, if the program passes its qualification cases,
+# using Python for programs that do not and where the program cannot take
+# the arguments, runs out of steps or prints something that does not decode.
+EXECUTION_MODES = ('python', 'bf')
+
+# Step budget per .bf run in the 'bf' mode
+BF_MAX_STEPS = 10000000
+
+# Results of .bf runs kept, by (program hash, input)
+BF_RESULT_CACHE_SIZE = 4096
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+_mode = 'python'
+_max_steps = BF_MAX_STEPS
+_backend = 'ir'
+_programs = {}  # program name -> (sha256 of its source, run)
+_results = {}   # (sha256, input) -> result
+_stats = {}     # function name -> counters, see dispatch_stats
+_dispatched = {}  # function name -> (program, encode, decode, Python function)
+_verified = {}  # function name -> whether its program qualified, this mode
+
+# Arguments a .bf program must answer exactly as the Python function does
+# before the 'bf' mode uses it, one or more per rule of the spec
+_QUALIFICATION_CASES = {
+    'timeago': [(1704067200, 1704067200), (1704067170, 1704067200), (1704067110, 1704067200),
+                (1704063600, 1704067200), (1703980800, 1704067200), (1701475200, 1704067200),
+                (1672531200, 1704067200), (1704070800, 1704067200)],
+    'duration': [(0,), (1,), (45,), (3661,), (93661,), (31536000,)],
+    'parse_duration': [('2h 30m',), ('90 seconds',), ('1.5h',), ('2:30',), ('1 week',)],
+    'human_date': [(1705276800, 1705276800), (1705190400, 1705276800), (1705363200, 1705276800),
+                   (1705104000, 1705276800), (1709251200, 1705276800), (1672531200, 1705276800)],
+    'date_range': [(1705276800, 1705276800), (1705276800, 1705363200), (1705276800, 1707955200),
+                   (1703721600, 1705276800)],
+}
+
+_STAT_KEYS = ('calls', 'cache_hits', 'bf_runs', 'bf_steps', 'fallbacks', 'python_calls',
+              'bf_seconds', 'python_seconds')
+
+
+def set_execution_mode(mode: str, max_steps: int = BF_MAX_STEPS, backend: str = 'ir') -> None:
+    """
+    Select how the five functions run; clears the compiled program and
+    result caches.
+
+    Args:
+        mode: One of EXECUTION_MODES
+        max_steps: Step budget per .bf run before falling back to Python
+        backend: bf.py backend for the .bf programs, 'ir' or 'python'
+
+    Raises:
+        ValueError: On an unknown mode or backend
+    """
+    global _mode, _max_steps, _backend
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"Unknown execution mode: {mode!r}")
+    if backend not in ('ir', 'python'):
+        raise ValueError(f"Unknown backend: {backend!r}")
+    _mode, _max_steps, _backend = mode, max_steps, backend
+    _programs.clear()
+    _results.clear()
+    _verified.clear()
+
+
+def verified_programs() -> tuple:
+    """
+    Names of the functions whose .bf programs the 'bf' mode runs: those
+    that answer every qualification case they can take as Python does.
+    """
+    return tuple(name for name in _dispatched if _is_verified(name))
+
+
+def dispatch_stats() -> Dict[str, Dict[str, Union[int, float]]]:
+    """
+    Per-function counters of calls in the 'bf' mode since the last
+    reset_dispatch_stats; the 'python' mode calls the functions directly
+    and counts nothing.
+
+    calls: Calls in the 'bf' mode
+    cache_hits: Calls answered from the result cache
+    bf_runs: .bf programs run, with bf_steps the interpreter steps of
+        those that finished and bf_seconds their total time
+    fallbacks: Calls in the 'bf' mode that Python answered, including
+        every call to a function whose program did not qualify
+    python_calls: Fallbacks the Python implementations answered, and
+        python_seconds their total time
+    """
+    return {name: dict(counters) for name, counters in _stats.items()}
+
+
+def reset_dispatch_stats() -> None:
+    for counters in _stats.values():
+        counters.update(dict.fromkeys(_STAT_KEYS, 0))
+
+
+def format_dispatch_stats() -> str:
+    """dispatch_stats as a table, with hit rates and mean latencies."""
+    lines = [f"{'function':<16} {'calls':>8} {'hits':>8} {'hit rate':>8} {'bf runs':>8} "
+             f"{'fallback':>8} {'bf us/run':>10} {'py us/call':>10}"]
+    for name, c in _stats.items():
+        python_calls = c['python_calls']
+        hit_rate = f"{c['cache_hits'] / c['calls']:.1%}" if c['calls'] else '-'
+        bf_latency = f"{c['bf_seconds'] / c['bf_runs'] * 1e6:.1f}" if c['bf_runs'] else '-'
+        python_latency = f"{c['python_seconds'] / python_calls * 1e6:.1f}" if python_calls else '-'
+        lines.append(f"{name:<16} {c['calls']:>8,} {c['cache_hits']:>8,} {hit_rate:>8} {c['bf_runs']:>8,} "
+                     f"{c['fallbacks']:>8,} {bf_latency:>10} {python_latency:>10}")
+    return "\n".join(lines)
+
+
+def _program(name):
+    """(hash, run) for a .bf program, compiled once per mode; run returns (output, steps)."""
+    entry = _programs.get(name)
+    if entry is None:
+        import bf
+        with open(os.path.join(_HERE, f"{name}.bf")) as f:
+            code = f.read()
+        compiled = bf._prepare(code, 32, 30000, _backend)
+
+        def run(input_data):
+            return compiled(input_data, _max_steps, bf._reset_tape(None, 32, input_data, 30000))
+
+        entry = _programs[name] = (hashlib.sha256(code.encode('utf-8')).hexdigest(), run)
+    return entry
+
+
+def _is_verified(name):
+    """Whether name's program qualifies, checked once per mode."""
+    verified = _verified.get(name)
+    if verified is None:
+        program, encode, decode, function = _dispatched[name]
+        _, run = _program(program)
+        answered = 0
+        verified = True
+        for args in _QUALIFICATION_CASES.get(name, ()):
+            input_data = encode(*args)
+            if input_data is None:
+                continue
+            try:
+                result = decode(run(input_data)[0])
+            except (RuntimeError, ValueError):
+                continue  # the call would fall back to Python anyway
+            if result != function(*args):
+                verified = False
+                break
+            answered += 1
+        verified = _verified[name] = verified and answered > 0
+    return verified
+
+
+def _bf_dispatch(program, encode, decode):
+    """
+    Let the 'bf' mode run a function through a .bf program, once the
+    program passes the function's _QUALIFICATION_CASES.
+
+    encode turns the function's arguments into the program's input, or
+    None if the program cannot take them; decode turns its output into
+    the function's result, raising ValueError if it cannot.
+    """
+    def decorate(function):
+        name = function.__name__
+        stats = _stats[name] = dict.fromkeys(_STAT_KEYS, 0)
+        _dispatched[name] = (program, encode, decode, function)
+
+        @functools.wraps(function)
+        def dispatch(*args, **kwargs):
+            if _mode != 'bf':
+                return function(*args, **kwargs)  # no bookkeeping in the default mode
+            stats['calls'] += 1
+            input_data = encode(*args, **kwargs) if _is_verified(name) else None
+            if input_data is not None:
+                digest, run = _program(program)
+                key = (digest, input_data)
+                if key in _results:
+                    stats['cache_hits'] += 1
+                    return _results[key]
+                start = time.perf_counter()
+                try:
+                    output, steps = run(input_data)
+                    stats['bf_steps'] += steps
+                    result = decode(output)
+                except (RuntimeError, ValueError):
+                    result = None  # over the step budget, or unreadable output
+                stats['bf_runs'] += 1
+                stats['bf_seconds'] += time.perf_counter() - start
+                if result is not None:
+                    if len(_results) >= BF_RESULT_CACHE_SIZE:
+                        del _results[next(iter(_results))]
+                    _results[key] = result
+                    return result
+            stats['fallbacks'] += 1
+            stats['python_calls'] += 1
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats['python_seconds'] += time.perf_counter() - start
+        return dispatch
+    return decorate
+
+
+def _encode_pair(first, second):
+    # The programs read two unsigned decimal numbers separated by NUL
+    if not all(type(value) is int and value >= 0 for value in (first, second)):
+        return None
+    return f"{first}\x00{second}"
+
+
+def _encode_timeago(timestamp, reference=None):
+    return _encode_pair(timestamp, timestamp if reference is None else reference)
+
+
+# Encoders take the same parameter names as their functions, so keyword calls work
+def _encode_human_date(timestamp, reference):
+    return _encode_pair(timestamp, reference)
+
+
+def _encode_date_range(start, end):
+    return _encode_pair(start, end)
+
+
+def _encode_duration(seconds, options=None):
+    options = options or {}
+    # duration.bf prints the default format only
+    if options.get('compact', False) or options.get('max_units', 2) != 2:
+        return None
+    if type(seconds) not in (int, float) or not seconds >= 0:
+        return None
+    return str(int(seconds))
+
+
+def _encode_parse_duration(text):
+    text = text.strip()
+    # Leave the errors for empty and negative input to Python
+    if not text or text.startswith('-'):
+        return None
+    return text
+
+
+def _decode_text(output):
+    # . writes bytes; the programs print UTF-8
+    return output.encode('latin-1').decode('utf-8')
+
+
 # ============================================================
 # CORE IMPLEMENTATION - All five functions
 # ============================================================
 
+@_bf_dispatch('timeago', _encode_timeago, _decode_text)
 def timeago(timestamp: int, reference: Optional[int] = None) -> str:
     """
     Returns a human-readable relative time string.
@@ -93,6 +350,7 @@ def timeago(timestamp: int, reference: Optional[int] = None) -> str:
         return f"{count} {unit} ago"
 
 
+@_bf_dispatch('duration', _encode_duration, _decode_text)
 def duration(seconds: Union[int, float], options: Optional[Dict[str, Any]] = None) -> str:
     """
     Formats a duration (in seconds) as a human-readable string.
@@ -167,6 +425,7 @@ def duration(seconds: Union[int, float], options: Optional[Dict[str, Any]] = Non
         return ', '.join(parts)
 
 
+@_bf_dispatch('parse_duration', _encode_parse_duration, int)
 def parse_duration(text: str) -> int:
     """
     Parses a human-written duration string into seconds.
@@ -242,6 +501,7 @@ def parse_duration(text: str) -> int:
     return int(total)
 
 
+@_bf_dispatch('human_date', _encode_human_date, _decode_text)
 def human_date(timestamp: int, reference: int) -> str:
     """
     Returns a contextual date string relative to a reference date.
@@ -293,6 +553,7 @@ def human_date(timestamp: int, reference: int) -> str:
             return f"{month} {day}, {ts_dt.year}"
 
 
+@_bf_dispatch('date_range', _encode_date_range, _decode_text)
 def date_range(start: int, end: int) -> str:
     """
     Formats a date range with smart abbreviation.
@@ -426,6 +687,12 @@ __all__ = [
     'human_date',
     'date_range',
     'bf_interpret',
+    'EXECUTION_MODES',
+    'set_execution_mode',
+    'verified_programs',
+    'dispatch_stats',
+    'reset_dispatch_stats',
+    'format_dispatch_stats',
 ]
 
 
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark test workbook generation at large row counts.
+
+Each run builds a Tests sheet from a synthetic corpus of the given
+number of rows in a fresh process, and reports the generation time and
+the process's peak RSS, for the default and the write-only mode.
+
+Usage:
+    python bench_workbook.py                              # 1k, 100k and 1M rows
+    python bench_workbook.py --sizes 1000 100000 --modes write_only
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from generate_test_workbook import create_workbook, TEST_FORMULAS
+
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+MODES = ('default', 'write_only')
+
+# One representative test per function; the corpus cycles through them
+TEMPLATES = {
+    'timeago': {'input': {'timestamp': 1704060000, 'reference': 1704067200}, 'output': '2 hours ago'},
+    'duration': {'input': {'seconds': 3661, 'options': {'compact': True}}, 'output': '1h 1m'},
+    'parse_duration': {'input': '2 hours and 30 minutes', 'output': 9000},
+    'human_date': {'input': {'timestamp': 1705190400, 'reference': 1705276800}, 'output': 'Yesterday'},
+    'date_range': {'input': {'start': 1705276800, 'end': 1705363200}, 'output': 'January 15–16, 2024'},
+}
+
+
+def synthetic_tests(rows):
+    """
+    tests.yaml-shaped data with rows tests in all, spread evenly over the
+    functions. Each function's tests are a generator, and every test has
+    its own name, so nothing is held in memory ahead of the sheet.
+    """
+    per_function, extra = divmod(rows, len(TEST_FORMULAS))
+
+    def tests(function, count):
+        template = TEMPLATES[function]
+        for i in range(count):
+            yield dict(template, name=f"{function} case {i}")
+
+    return {function: tests(function, per_function + (i < extra))
+            for i, function in enumerate(TEST_FORMULAS)}
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KB on Linux)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_one(rows, mode):
+    """Generate one workbook here; returns seconds, peak RSS and file size."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.xlsx')
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as quiet:
+            stdout, sys.stdout = sys.stdout, quiet
+            try:
+                create_workbook(synthetic_tests(rows), path, write_only=mode == 'write_only')
+            finally:
+                sys.stdout = stdout
+        seconds = time.perf_counter() - start
+        size = os.path.getsize(path)
+    return {'rows': rows, 'mode': mode, 'seconds': seconds,
+            'peak_rss_mb': _peak_rss_mb(), 'file_mb': size / (1024 * 1024)}
+
+
+def run_in_subprocess(rows, mode):
+    """run_one in a fresh interpreter, so peak RSS is this run's alone."""
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', str(rows), mode],
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark test workbook generation')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Row counts to generate (default: 1k, 100k, 1M)')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES),
+                        help='Generation modes to compare (default: both)')
+    parser.add_argument('--child', nargs=2, metavar=('ROWS', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_one(int(args.child[0]), args.child[1])))
+        return 0
+
+    print(f"{'mode':<12} {'rows':>10} {'seconds':>9} {'us/row':>8} {'peak RSS MB':>12} {'file MB':>8}")
+    for rows in args.sizes:
+        for mode in args.modes:
+            r = run_in_subprocess(rows, mode)
+            print(f"{mode:<12} {rows:>10,} {r['seconds']:>9.2f} {r['seconds'] / rows * 1e6:>8.1f} "
+                  f"{r['peak_rss_mb']:>12.1f} {r['file_mb']:>8.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
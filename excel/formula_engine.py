@@ -0,0 +1,1291 @@
+#!/usr/bin/env python3
+"""
+Headless evaluator for the whenwords LAMBDA formulas.
+
+Parses the formula strings in LAMBDA_FORMULAS (and the Actual and Pass
+formulas of the Tests sheet) once into a cached AST, compiles each to
+Python closures, and evaluates them with Excel's semantics for the
+functions they use, so the formulas can be checked without Excel.
+
+    engine = FormulaEngine()
+    engine.call('WW_DURATION', 3661)                    # '1 hour, 1 minute'
+    engine.evaluate('=WW_TIMEAGO(C2,D2)', {'C2': 1704067110, 'D2': 1704067200})
+
+Names defined in LAMBDA_FORMULAS (WW_PLURALIZE, WW_ABS_ROUND, ...) can be
+called from any formula, including each other.
+
+Values are floats or ints, str, bool, None for a blank cell, lists of
+rows for arrays, and ExcelError for error values such as #VALUE!, which
+propagate through operators and functions as they do in a sheet.
+
+Excel only accepts constants in array literals; {a; b} with names or
+formulas in it is evaluated here anyway, as WW_DURATION writes it.
+
+Usage:
+    python formula_engine.py                            # Tests sheet of test_whenwords.xlsx
+    python formula_engine.py --workbook other.xlsx
+    python formula_engine.py --tests tests.yaml --repeat 100
+"""
+
+import argparse
+import datetime
+import inspect
+import math
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+from generate_test_workbook import LAMBDA_FORMULAS
+
+
+AST_CACHE_SIZE = 4096
+FORMULA_CACHE_SIZE = 4096
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_WORKBOOK = os.path.join(HERE, 'test_whenwords.xlsx')
+
+
+# ============================================================
+# VALUES
+# ============================================================
+
+class ExcelError:
+    """An error value such as #VALUE!, compared by its code."""
+
+    __slots__ = ('code',)
+
+    def __init__(self, code):
+        self.code = code
+
+    def __eq__(self, other):
+        return isinstance(other, ExcelError) and other.code == self.code
+
+    def __hash__(self):
+        return hash(self.code)
+
+    def __repr__(self):
+        return f"ExcelError({self.code!r})"
+
+    def __str__(self):
+        return self.code
+
+
+VALUE = ExcelError('#VALUE!')
+NAME = ExcelError('#NAME?')
+NUM = ExcelError('#NUM!')
+DIV0 = ExcelError('#DIV/0!')
+NA = ExcelError('#N/A')
+REF = ExcelError('#REF!')
+CALC = ExcelError('#CALC!')
+
+
+class _Omitted:
+    """A LAMBDA parameter or argument left out; see ISOMITTED."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'OMITTED'
+
+
+OMITTED = _Omitted()
+
+
+class Lambda:
+    """A LAMBDA value: its parameters, compiled body and defining scope."""
+
+    __slots__ = ('params', 'required', 'body', 'env')
+
+    def __init__(self, params, required, body, env):
+        self.params = params
+        self.required = required
+        self.body = body
+        self.env = env
+
+    def __call__(self, *args):
+        if not self.required <= len(args) <= len(self.params):
+            return VALUE
+        env = dict(self.env)
+        env.update(zip(self.params, args))
+        for name in self.params[len(args):]:
+            env[name] = OMITTED
+        return self.body(env)
+
+
+class _Raise(Exception):
+    """Raised by a coercion to make the operator or function return error."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+_NUMERIC = re.compile(r'\s*[+-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?\s*\Z')
+
+
+def _number(value):
+    """Coerce a value for arithmetic, as Excel does."""
+    kind = type(value)
+    if kind is float or kind is int:
+        return value
+    if kind is bool:
+        return int(value)
+    if value is None or value is OMITTED:
+        return 0
+    if kind is str:
+        if _NUMERIC.match(value):
+            return float(value)
+        raise _Raise(VALUE)
+    if kind is ExcelError:
+        raise _Raise(value)
+    if kind is list:
+        return _number(value[0][0])
+    raise _Raise(VALUE)
+
+
+def _format_number(number):
+    """A number as text, as & and the General format write it."""
+    if number == int(number) and abs(number) < 1e15:
+        return str(int(number))
+    return f"{number:.15g}"
+
+
+def _text(value):
+    """Coerce a value for text functions and &."""
+    kind = type(value)
+    if kind is str:
+        return value
+    if kind is float or kind is int:
+        return _format_number(value)
+    if kind is bool:
+        return 'TRUE' if value else 'FALSE'
+    if value is None or value is OMITTED:
+        return ''
+    if kind is ExcelError:
+        raise _Raise(value)
+    if kind is list:
+        return _text(value[0][0])
+    raise _Raise(VALUE)
+
+
+def _bool(value):
+    """Coerce a condition, as IF, AND and NOT do."""
+    kind = type(value)
+    if kind is bool:
+        return value
+    if kind is float or kind is int:
+        return value != 0
+    if value is None or value is OMITTED:
+        return False
+    if kind is str and value.upper() in ('TRUE', 'FALSE'):
+        return value.upper() == 'TRUE'
+    if kind is ExcelError:
+        raise _Raise(value)
+    if kind is list:
+        return _bool(value[0][0])
+    raise _Raise(VALUE)
+
+
+def _int(value):
+    """An integer argument, truncated as Excel truncates them."""
+    return int(_number(value))
+
+
+def _rank(value):
+    """Excel's sort order across types: numbers < text < logicals."""
+    kind = type(value)
+    if kind is float or kind is int:
+        return 0
+    if kind is str:
+        return 1
+    if kind is bool:
+        return 2
+    if kind is ExcelError:
+        raise _Raise(value)
+    raise _Raise(VALUE)
+
+
+def _blank_like(value):
+    """What a blank compares as next to value."""
+    kind = type(value)
+    return '' if kind is str else False if kind is bool else 0
+
+
+def _compare(a, b):
+    """Negative, zero or positive as a < b, a = b, a > b; text ignores case."""
+    if type(a) is list:
+        a = a[0][0]
+    if type(b) is list:
+        b = b[0][0]
+    if a is None or a is OMITTED:
+        a = _blank_like(b)
+    if b is None or b is OMITTED:
+        b = _blank_like(a)
+    rank_a, rank_b = _rank(a), _rank(b)
+    if rank_a != rank_b:
+        return rank_a - rank_b
+    if rank_a == 1:
+        a, b = a.lower(), b.lower()
+    return (a > b) - (a < b)
+
+
+def _display(value):
+    """A value as a report shows it."""
+    if type(value) is str:
+        return repr(value)
+    if type(value) is list:
+        return '{' + '; '.join(', '.join(_display(v) for v in row) for row in value) + '}'
+    if type(value) is Lambda:
+        return 'LAMBDA'
+    try:
+        return _text(value)
+    except _Raise as e:
+        return str(e.error)
+
+
+# ============================================================
+# ARRAYS
+# ============================================================
+
+def _shape(value):
+    return (len(value), len(value[0])) if type(value) is list else (1, 1)
+
+
+def _call_scalar(function, args):
+    try:
+        return function(*args)
+    except _Raise as e:
+        return e.error
+
+
+def _lift(function, args):
+    """
+    Apply a scalar function element by element over array arguments.
+
+    Single rows and columns are repeated to the size of the others; other
+    positions past the end of an argument are #N/A.
+    """
+    shapes = [_shape(arg) for arg in args]
+    rows = max(r for r, _ in shapes)
+    cols = max(c for _, c in shapes)
+    result = []
+    for i in range(rows):
+        out = []
+        for j in range(cols):
+            element = []
+            for arg, (r, c) in zip(args, shapes):
+                if type(arg) is not list:
+                    element.append(arg)
+                elif (r == 1 or i < r) and (c == 1 or j < c):
+                    element.append(arg[i if r > 1 else 0][j if c > 1 else 0])
+                else:
+                    element.append(NA)
+            out.append(_call_scalar(function, element))
+        result.append(out)
+    return result
+
+
+def _flatten(values):
+    """Scalars and array elements in row order."""
+    for value in values:
+        if type(value) is list:
+            for row in value:
+                yield from row
+        else:
+            yield value
+
+
+# ============================================================
+# OPERATORS
+# ============================================================
+
+def _add(a, b):
+    return _number(a) + _number(b)
+
+
+def _subtract(a, b):
+    return _number(a) - _number(b)
+
+
+def _multiply(a, b):
+    return _number(a) * _number(b)
+
+
+def _divide(a, b):
+    a, b = _number(a), _number(b)
+    if b == 0:
+        raise _Raise(DIV0)
+    return a / b
+
+
+def _power(a, b):
+    a, b = _number(a), _number(b)
+    if a == 0 and b <= 0:
+        raise _Raise(NUM if b == 0 else DIV0)
+    try:
+        result = a ** b
+    except OverflowError:
+        raise _Raise(NUM)
+    if type(result) is complex:
+        raise _Raise(NUM)
+    return result
+
+
+def _concat(a, b):
+    return _text(a) + _text(b)
+
+
+BINARY_OPERATORS = {
+    '+': _add,
+    '-': _subtract,
+    '*': _multiply,
+    '/': _divide,
+    '^': _power,
+    '&': _concat,
+    '=': lambda a, b: _compare(a, b) == 0,
+    '<>': lambda a, b: _compare(a, b) != 0,
+    '<': lambda a, b: _compare(a, b) < 0,
+    '>': lambda a, b: _compare(a, b) > 0,
+    '<=': lambda a, b: _compare(a, b) <= 0,
+    '>=': lambda a, b: _compare(a, b) >= 0,
+}
+
+_COMPARISONS = ('=', '<>', '<', '>', '<=', '>=')
+
+
+# ============================================================
+# PARSING
+# ============================================================
+
+_TOKEN = re.compile(r'''\s*(?:
+    (?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<string>"(?:[^"]|"")*")
+  | (?P<optional>\[[A-Za-z_][\w.]*\])
+  | (?P<name>[A-Za-z_$][\w.$]*)
+  | (?P<op><>|<=|>=|[-+*/^&=<>%(),;{}])
+)''', re.VERBOSE)
+
+_AST_CACHE = {}
+
+
+def _tokenize(formula):
+    """(kind, value) tokens of a formula, without its leading '='."""
+    text = formula.strip()
+    pos = 1 if text.startswith('=') else 0
+    tokens = []
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            if not text[pos:].strip():
+                break
+            raise ValueError(f"Unexpected {text[pos:pos + 20].strip()!r} at offset {pos}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'number':
+            value = float(value)
+        elif kind == 'string':
+            value = value[1:-1].replace('""', '"')
+        elif kind == 'optional':
+            value = value[1:-1].upper()
+        elif kind == 'name':
+            value = value.upper()
+        tokens.append((kind, value))
+        pos = match.end()
+    tokens.append(('end', None))
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive descent over Excel's operator precedence, lowest first:
+    comparisons, &, + and -, * and /, ^, negation, %.
+
+    Nodes are tuples tagged by their first element: ('num', x),
+    ('str', s), ('bool', b), ('name', NAME), ('optional', NAME),
+    ('missing',), ('call', NAME, args), ('invoke', node, args),
+    ('op', op, left, right), ('neg', node), ('pct', node) and
+    ('array', rows).
+    """
+
+    def __init__(self, formula):
+        self.tokens = _tokenize(formula)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos]
+
+    def take(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def at(self, *ops):
+        kind, value = self.tokens[self.pos]
+        return kind == 'op' and value in ops
+
+    def expect(self, op):
+        kind, value = self.take()
+        if kind != 'op' or value != op:
+            raise ValueError(f"Expected {op!r}, found {'end of formula' if kind == 'end' else repr(value)}")
+
+    def formula(self):
+        node = self.comparison()
+        kind, value = self.peek()
+        if kind != 'end':
+            raise ValueError(f"Unexpected {value!r} after the end of the formula")
+        return node
+
+    def _binary(self, ops, operand):
+        node = operand()
+        while self.at(*ops):
+            op = self.take()[1]
+            node = ('op', op, node, operand())
+        return node
+
+    def comparison(self):
+        return self._binary(_COMPARISONS, self.concat)
+
+    def concat(self):
+        return self._binary(('&',), self.additive)
+
+    def additive(self):
+        return self._binary(('+', '-'), self.term)
+
+    def term(self):
+        return self._binary(('*', '/'), self.power)
+
+    def power(self):
+        return self._binary(('^',), self.unary)
+
+    def unary(self):
+        if self.at('-'):
+            self.take()
+            return ('neg', self.unary())
+        if self.at('+'):
+            self.take()
+            return self.unary()
+        return self.postfix()
+
+    def postfix(self):
+        node = self.primary()
+        while True:
+            if self.at('%'):
+                self.take()
+                node = ('pct', node)
+            elif self.at('(') and node[0] in ('call', 'invoke'):
+                node = ('invoke', node, self.arguments())
+            else:
+                return node
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == 'number':
+            return ('num', value)
+        if kind == 'string':
+            return ('str', value)
+        if kind == 'optional':
+            return ('optional', value)
+        if kind == 'name':
+            if self.at('('):
+                return ('call', value, self.arguments())
+            if value in ('TRUE', 'FALSE'):
+                return ('bool', value == 'TRUE')
+            return ('name', value)
+        if kind == 'op' and value == '(':
+            node = self.comparison()
+            self.expect(')')
+            return node
+        if kind == 'op' and value == '{':
+            return self.array()
+        raise ValueError(f"Unexpected {'end of formula' if kind == 'end' else repr(value)}")
+
+    def arguments(self):
+        self.expect('(')
+        args = []
+        if self.at(')'):
+            self.take()
+            return args
+        while True:
+            args.append(('missing',) if self.at(',', ')') else self.comparison())
+            if self.at(')'):
+                self.take()
+                return args
+            self.expect(',')
+
+    def array(self):
+        rows = [[]]
+        while True:
+            rows[-1].append(self.comparison())
+            if self.at('}'):
+                self.take()
+                break
+            if self.at(';'):
+                self.take()
+                rows.append([])
+            else:
+                self.expect(',')
+        if len({len(row) for row in rows}) != 1:
+            raise ValueError("Array rows differ in length")
+        return ('array', rows)
+
+
+def parse(formula):
+    """
+    Parse a formula into its AST; cached by formula text.
+
+    Raises:
+        ValueError: For a formula Excel would not accept
+    """
+    node = _AST_CACHE.get(formula)
+    if node is None:
+        node = _Parser(formula).formula()
+        if len(_AST_CACHE) >= AST_CACHE_SIZE:
+            del _AST_CACHE[next(iter(_AST_CACHE))]
+        _AST_CACHE[formula] = node
+    return node
+
+
+# ============================================================
+# WORKSHEET FUNCTIONS
+# ============================================================
+
+_Builtin = namedtuple('_Builtin', ['function', 'min_args', 'max_args', 'lift', 'errors'])
+
+BUILTINS = {}
+
+
+def _builtin(name, lift=False, errors=False):
+    """
+    Register a worksheet function.
+
+    lift: Apply it element by element to array arguments
+    errors: Pass it error arguments, instead of returning the first one
+    """
+    def register(function):
+        params = inspect.signature(function).parameters.values()
+        required = sum(p.default is p.empty and p.kind is p.POSITIONAL_OR_KEYWORD for p in params)
+        most = None if any(p.kind is p.VAR_POSITIONAL for p in params) else len(params)
+        BUILTINS[name] = _Builtin(function, required, most, lift, errors)
+        return function
+    return register
+
+
+def _fifteen_digits(number):
+    """number as Excel holds it, to 15 significant digits."""
+    return float(f"{number:.15g}")
+
+
+@_builtin('ABS', lift=True)
+def _abs(number):
+    return abs(_number(number))
+
+
+@_builtin('FLOOR', lift=True)
+def _floor(number, significance):
+    number, significance = _number(number), _number(significance)
+    if significance == 0:
+        raise _Raise(DIV0)
+    if number > 0 and significance < 0:
+        raise _Raise(NUM)
+    return math.floor(_fifteen_digits(number / significance)) * significance
+
+
+@_builtin('ROUND', lift=True)
+def _round(number, num_digits):
+    exponent = Decimal(1).scaleb(-_int(num_digits))
+    return float(Decimal(f"{_number(number):.15g}").quantize(exponent, ROUND_HALF_UP))
+
+
+@_builtin('AND')
+def _and(logical, *logicals):
+    return all(_logicals((logical,) + logicals))
+
+
+@_builtin('OR')
+def _or(logical, *logicals):
+    return any(_logicals((logical,) + logicals))
+
+
+def _logicals(args):
+    """Conditions for AND and OR: text and blanks in arrays are skipped."""
+    values = []
+    for arg in args:
+        if type(arg) is list:
+            values += [_bool(v) for v in _flatten([arg]) if type(v) is not str and v is not None]
+        elif arg is not None and arg is not OMITTED:
+            values.append(_bool(arg))
+    if not values:
+        raise _Raise(VALUE)
+    return values
+
+
+@_builtin('NOT', lift=True)
+def _not(logical):
+    return not _bool(logical)
+
+
+@_builtin('ISNUMBER', lift=True, errors=True)
+def _isnumber(value):
+    return type(value) is float or type(value) is int
+
+
+@_builtin('ISERROR', lift=True, errors=True)
+def _iserror(value):
+    return type(value) is ExcelError
+
+
+@_builtin('IFERROR', lift=True, errors=True)
+def _iferror(value, value_if_error):
+    return value_if_error if type(value) is ExcelError else value
+
+
+@_builtin('ISOMITTED', errors=True)
+def _isomitted(argument):
+    return argument is OMITTED
+
+
+@_builtin('CHOOSE', errors=True)
+def _choose(index_num, value, *values):
+    index = _int(index_num)
+    values = (value,) + values
+    if not 1 <= index <= len(values):
+        raise _Raise(VALUE)
+    return values[index - 1]
+
+
+@_builtin('TRIM', lift=True)
+def _trim(text):
+    return ' '.join(part for part in _text(text).split(' ') if part)
+
+
+@_builtin('LOWER', lift=True)
+def _lower(text):
+    return _text(text).lower()
+
+
+@_builtin('LEN', lift=True)
+def _len(text):
+    return len(_text(text))
+
+
+@_builtin('LEFT', lift=True)
+def _left(text, num_chars=1):
+    count = _int(num_chars)
+    if count < 0:
+        raise _Raise(VALUE)
+    return _text(text)[:count]
+
+
+@_builtin('MID', lift=True)
+def _mid(text, start_num, num_chars):
+    start, count = _int(start_num), _int(num_chars)
+    if start < 1 or count < 0:
+        raise _Raise(VALUE)
+    return _text(text)[start - 1:start - 1 + count]
+
+
+_SEARCH_CACHE = {}
+
+
+def _search_pattern(find_text):
+    """SEARCH's wildcards as a regex: ? and *, with ~ escaping either or ~."""
+    pattern = _SEARCH_CACHE.get(find_text)
+    if pattern is None:
+        parts = []
+        chars = iter(find_text)
+        for char in chars:
+            if char == '~':
+                following = next(chars, None)
+                if following in ('?', '*', '~'):
+                    parts.append(re.escape(following))
+                else:
+                    parts.append(re.escape('~') + (re.escape(following) if following else ''))
+            elif char == '?':
+                parts.append('.')
+            elif char == '*':
+                parts.append('.*?')
+            else:
+                parts.append(re.escape(char))
+        pattern = re.compile(''.join(parts), re.IGNORECASE | re.DOTALL)
+        if len(_SEARCH_CACHE) >= 256:
+            del _SEARCH_CACHE[next(iter(_SEARCH_CACHE))]
+        _SEARCH_CACHE[find_text] = pattern
+    return pattern
+
+
+@_builtin('SEARCH', lift=True)
+def _search(find_text, within_text, start_num=1):
+    find, within, start = _text(find_text), _text(within_text), _int(start_num)
+    if not 1 <= start <= len(within) + 1:
+        raise _Raise(VALUE)
+    match = _search_pattern(find).search(within, start - 1)
+    if match is None:
+        raise _Raise(VALUE)
+    return match.start() + 1
+
+
+@_builtin('SUBSTITUTE', lift=True)
+def _substitute(text, old_text, new_text, instance_num=None):
+    text, old, new = _text(text), _text(old_text), _text(new_text)
+    if not old:
+        return text
+    if instance_num is None or instance_num is OMITTED:
+        return text.replace(old, new)
+    instance = _int(instance_num)
+    if instance < 1:
+        raise _Raise(VALUE)
+    pos = -1
+    for _ in range(instance):
+        pos = text.find(old, pos + 1)
+        if pos < 0:
+            return text
+    return text[:pos] + new + text[pos + len(old):]
+
+
+@_builtin('VALUE', lift=True)
+def _value(text):
+    if type(text) is bool:
+        raise _Raise(VALUE)
+    return _number(text)
+
+
+@_builtin('UNICHAR', lift=True)
+def _unichar(number):
+    code = _int(number)
+    if not 1 <= code <= sys.maxunicode:
+        raise _Raise(VALUE)
+    return chr(code)
+
+
+@_builtin('TEXTJOIN')
+def _textjoin(delimiter, ignore_empty, text, *texts):
+    parts = [_text(v) for v in _flatten((text,) + texts)]
+    if _bool(ignore_empty):
+        parts = [part for part in parts if part]
+    return _text(delimiter).join(parts)
+
+
+@_builtin('TEXTSPLIT')
+def _textsplit(text, col_delimiter, row_delimiter=None, ignore_empty=False, match_mode=0, pad_with=NA):
+    text = _text(text)
+    flags = re.IGNORECASE if _int(match_mode) == 1 else 0
+
+    def split(value, delimiter):
+        if delimiter is None or delimiter is OMITTED:
+            return [value]
+        delimiters = [_text(d) for d in _flatten([delimiter])]
+        if not all(delimiters):
+            raise _Raise(VALUE)
+        parts = re.split('|'.join(map(re.escape, delimiters)), value, flags=flags)
+        if _bool(ignore_empty):
+            parts = [part for part in parts if part]
+        return parts
+
+    rows = [split(row, col_delimiter) for row in split(text, row_delimiter)] or [['']]
+    rows = [row or [''] for row in rows]
+    width = max(len(row) for row in rows)
+    return [row + [pad_with] * (width - len(row)) for row in rows]
+
+
+@_builtin('ROWS')
+def _rows(array):
+    return _shape(array)[0]
+
+
+@_builtin('COLUMNS')
+def _columns(array):
+    return _shape(array)[1]
+
+
+@_builtin('SEQUENCE')
+def _sequence(rows, columns=1, start=1, step=1):
+    rows, columns = _int(rows), _int(columns)
+    start, step = _number(start), _number(step)
+    if rows < 1 or columns < 1:
+        raise _Raise(CALC)
+    return [[start + (i * columns + j) * step for j in range(columns)] for i in range(rows)]
+
+
+@_builtin('INDEX')
+def _index(array, row_num, column_num=None):
+    if type(row_num) is list or type(column_num) is list:
+        return _lift(lambda r, c: _index(array, r, c), [row_num, column_num])
+    cells = array if type(array) is list else [[array]]
+    rows, cols = len(cells), len(cells[0])
+    row = _int(row_num)
+    if column_num is None or column_num is OMITTED:
+        # One index picks from a single row or column, whichever it is
+        if rows == 1:
+            row, col = 1, row
+        elif cols == 1:
+            col = 1
+        else:
+            col = 0
+    else:
+        col = _int(column_num)
+    if not 0 <= row <= rows or not 0 <= col <= cols:
+        raise _Raise(REF)
+    if row == 0 and col == 0:
+        return cells
+    if row == 0:
+        return [[r[col - 1]] for r in cells]
+    if col == 0:
+        return [list(cells[row - 1])]
+    return cells[row - 1][col - 1]
+
+
+@_builtin('FILTER')
+def _filter(array, include, if_empty=None):
+    cells = array if type(array) is list else [[array]]
+    keep = include if type(include) is list else [[include]]
+    rows, cols = len(cells), len(cells[0])
+    if len(keep) == rows and len(keep[0]) == 1:
+        result = [row for row, (flag,) in zip(cells, keep) if _bool(flag)]
+    elif len(keep) == 1 and len(keep[0]) == cols:
+        picked = [j for j, flag in enumerate(keep[0]) if _bool(flag)]
+        result = [[row[j] for j in picked] for row in cells] if picked else []
+    else:
+        raise _Raise(VALUE)
+    if not result:
+        if if_empty is None or if_empty is OMITTED:
+            raise _Raise(CALC)
+        return if_empty
+    return result
+
+
+# Serial 1 is 1900-01-01; Excel's phantom 1900-02-29 puts serials below 61
+# a day off, which this ignores
+_EXCEL_EPOCH = datetime.date(1899, 12, 30)
+
+_MONTH_NAMES = ("January", "February", "March", "April", "May", "June",
+                "July", "August", "September", "October", "November", "December")
+_WEEKDAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+def _date(serial_number):
+    serial = _number(serial_number)
+    if serial < 0:
+        raise _Raise(NUM)
+    try:
+        return _EXCEL_EPOCH + datetime.timedelta(days=math.floor(serial))
+    except OverflowError:
+        raise _Raise(NUM)
+
+
+@_builtin('DAY', lift=True)
+def _day(serial_number):
+    return _date(serial_number).day
+
+
+@_builtin('MONTH', lift=True)
+def _month(serial_number):
+    return _date(serial_number).month
+
+
+@_builtin('YEAR', lift=True)
+def _year(serial_number):
+    return _date(serial_number).year
+
+
+@_builtin('WEEKDAY', lift=True)
+def _weekday(serial_number, return_type=1):
+    monday = _date(serial_number).weekday()  # Monday is 0
+    kind = _int(return_type)
+    if kind == 1:
+        return (monday + 1) % 7 + 1  # Sunday is 1
+    if kind == 2:
+        return monday + 1
+    if kind == 3:
+        return monday
+    raise _Raise(NUM)
+
+
+_DATE_CODE = re.compile(r'"[^"]*"|yyyy|yy|mmmm|mmm|mm|m|dddd|ddd|dd|d|.', re.IGNORECASE | re.DOTALL)
+
+
+@_builtin('TEXT', lift=True)
+def _text_format(value, format_text):
+    """TEXT for date formats (years, months, days) and General."""
+    fmt = _text(format_text)
+    if fmt.lower() in ('general', '@', ''):
+        return _text(value)
+    date = _date(value)
+    parts = []
+    for code in _DATE_CODE.findall(fmt):
+        lower = code.lower()
+        if code.startswith('"'):
+            parts.append(code[1:-1])
+        elif lower == 'yyyy':
+            parts.append(f"{date.year:04d}")
+        elif lower == 'yy':
+            parts.append(f"{date.year % 100:02d}")
+        elif lower == 'mmmm':
+            parts.append(_MONTH_NAMES[date.month - 1])
+        elif lower == 'mmm':
+            parts.append(_MONTH_NAMES[date.month - 1][:3])
+        elif lower in ('mm', 'm'):
+            parts.append(f"{date.month:0{len(code)}d}")
+        elif lower == 'dddd':
+            parts.append(_WEEKDAY_NAMES[date.weekday()])
+        elif lower == 'ddd':
+            parts.append(_WEEKDAY_NAMES[date.weekday()][:3])
+        elif lower in ('dd', 'd'):
+            parts.append(f"{date.day:0{len(code)}d}")
+        else:
+            parts.append(code)
+    return ''.join(parts)
+
+
+# ============================================================
+# ENGINE
+# ============================================================
+
+_CELL_REF = re.compile(r'\$?([A-Z]{1,3})\$?([1-9]\d{0,6})\Z')
+
+# The cells of an evaluation, in env beside the names in scope
+_CELLS = None
+
+
+class FormulaEngine:
+    """
+    Evaluates formulas against a set of defined names.
+
+    Each formula is parsed and compiled once; a defined name is
+    evaluated the first time a formula uses it.
+    """
+
+    def __init__(self, names=None):
+        """names: Name to formula, such as LAMBDA_FORMULAS (the default)."""
+        self._sources = {}
+        self._values = {}
+        self._compiled = {}
+        for name, formula in (LAMBDA_FORMULAS if names is None else names).items():
+            self.define(name, formula)
+
+    def define(self, name, formula):
+        """Add or replace a defined name; formulas using it are recompiled."""
+        self._sources[name.upper()] = formula
+        self._values.clear()
+        self._compiled.clear()
+
+    def evaluate(self, formula, cells=None):
+        """
+        Evaluate a formula.
+
+        cells: Coordinate ('C2') to value for the references in it; any
+        other cell is blank.
+
+        Returns the value, with #CALC! for a LAMBDA that is never called.
+
+        Raises:
+            ValueError: For a formula that does not parse or compile
+        """
+        compiled = self._compiled.get(formula)
+        if compiled is None:
+            compiled = self._compile(parse(formula), frozenset())
+            if len(self._compiled) >= FORMULA_CACHE_SIZE:
+                del self._compiled[next(iter(self._compiled))]
+            self._compiled[formula] = compiled
+        try:
+            result = compiled({_CELLS: cells or {}})
+        except RecursionError:
+            return NUM
+        return CALC if type(result) is Lambda else result
+
+    def call(self, name, *args):
+        """Call a defined LAMBDA with Python values."""
+        function = self._named(name.upper())
+        if type(function) is not Lambda:
+            return function if type(function) is ExcelError else VALUE
+        try:
+            result = function(*args)
+        except RecursionError:
+            return NUM
+        return CALC if type(result) is Lambda else result
+
+    def _named(self, name):
+        """The value of a defined name, evaluated on first use."""
+        value = self._values.get(name)
+        if value is None:
+            source = self._sources.get(name)
+            if source is None:
+                return NAME
+            self._values[name] = CALC  # a name defined in terms of itself
+            value = self._compile(parse(source), frozenset())({_CELLS: {}})
+            self._values[name] = value
+        return value
+
+    def _compile(self, node, scope):
+        """A closure computing node from env, the names in scope and the cells."""
+        tag = node[0]
+        if tag in ('num', 'str', 'bool'):
+            value = node[1]
+            return lambda env: value
+        if tag == 'missing':
+            return lambda env: OMITTED
+        if tag == 'name':
+            return self._compile_name(node[1], scope)
+        if tag == 'op':
+            return self._compile_operator(BINARY_OPERATORS[node[1]],
+                                          self._compile(node[2], scope), self._compile(node[3], scope))
+        if tag == 'neg':
+            return self._compile_operator(_subtract, lambda env: 0, self._compile(node[1], scope))
+        if tag == 'pct':
+            return self._compile_operator(_divide, self._compile(node[1], scope), lambda env: 100)
+        if tag == 'array':
+            rows = [[self._compile(element, scope) for element in row] for row in node[1]]
+            return lambda env: [[element(env) for element in row] for row in rows]
+        if tag == 'call':
+            return self._compile_call(node[1], node[2], scope)
+        if tag == 'invoke':
+            target = self._compile(node[1], scope)
+            args = [self._compile(arg, scope) for arg in node[2]]
+            return lambda env: _invoke(target(env), [arg(env) for arg in args])
+        if tag == 'optional':
+            raise ValueError(f"[{node[1]}] outside the parameters of a LAMBDA")
+        raise ValueError(f"Unknown node {tag!r}")
+
+    def _compile_name(self, name, scope):
+        if name in scope:
+            return lambda env: env[name]
+        if name in self._sources:
+            return lambda env: self._named(name)
+        ref = _CELL_REF.match(name)
+        if ref is not None:
+            coordinate = ref.group(1) + ref.group(2)
+            return lambda env: env[_CELLS].get(coordinate)
+        return lambda env: NAME
+
+    @staticmethod
+    def _compile_operator(operator, left, right):
+        def apply(env):
+            a, b = left(env), right(env)
+            if type(a) is list or type(b) is list:
+                return _lift(operator, [a, b])
+            try:
+                return operator(a, b)
+            except _Raise as e:
+                return e.error
+        return apply
+
+    def _compile_call(self, name, arg_nodes, scope):
+        if name == 'IF':
+            return self._compile_if(arg_nodes, scope)
+        if name == 'LET':
+            return self._compile_let(arg_nodes, scope)
+        if name == 'LAMBDA':
+            return self._compile_lambda(arg_nodes, scope)
+
+        args = [self._compile(arg, scope) for arg in arg_nodes]
+        if name in scope:
+            return lambda env: _invoke(env[name], [arg(env) for arg in args])
+        builtin = BUILTINS.get(name)
+        if builtin is not None:
+            if len(args) < builtin.min_args or builtin.max_args is not None and len(args) > builtin.max_args:
+                raise ValueError(f"Wrong number of arguments to {name}")
+            return self._compile_builtin(builtin, args)
+        if name in self._sources:
+            return lambda env: _invoke(self._named(name), [arg(env) for arg in args])
+        return lambda env: NAME
+
+    @staticmethod
+    def _compile_builtin(builtin, args):
+        function, lift, errors = builtin.function, builtin.lift, builtin.errors
+
+        def call(env):
+            values = [arg(env) for arg in args]
+            if not errors:
+                for value in values:
+                    if type(value) is ExcelError:
+                        return value
+            if lift and any(type(value) is list for value in values):
+                return _lift(function, values)
+            try:
+                return function(*values)
+            except _Raise as e:
+                return e.error
+        return call
+
+    def _compile_if(self, arg_nodes, scope):
+        if not 1 <= len(arg_nodes) <= 3:
+            raise ValueError("Wrong number of arguments to IF")
+        condition, if_true, if_false = [self._compile(arg, scope) for arg in arg_nodes] + \
+            [lambda env: True, lambda env: False][len(arg_nodes) - 1:]
+
+        def branch(env):
+            test = condition(env)
+            if type(test) is list:
+                # An array condition picks element by element from both
+                return _lift(lambda t, a, b: a if _bool(t) else b, [test, if_true(env), if_false(env)])
+            try:
+                taken = _bool(test)
+            except _Raise as e:
+                return e.error
+            value = if_true(env) if taken else if_false(env)
+            return 0 if value is OMITTED else value
+        return branch
+
+    def _compile_let(self, arg_nodes, scope):
+        if len(arg_nodes) < 3 or len(arg_nodes) % 2 == 0:
+            raise ValueError("LET takes name, value pairs and a calculation")
+        bindings = []
+        for name_node, value_node in zip(arg_nodes[:-1:2], arg_nodes[1:-1:2]):
+            if name_node[0] != 'name':
+                raise ValueError("LET names must be plain names")
+            # A value sees the names bound before it
+            bindings.append((name_node[1], self._compile(value_node, scope)))
+            scope = scope | {name_node[1]}
+        body = self._compile(arg_nodes[-1], scope)
+
+        def let(env):
+            env = dict(env)
+            for name, value in bindings:
+                env[name] = value(env)
+            return body(env)
+        return let
+
+    def _compile_lambda(self, arg_nodes, scope):
+        if not arg_nodes:
+            raise ValueError("LAMBDA needs a calculation")
+        params = []
+        required = 0
+        for param in arg_nodes[:-1]:
+            if param[0] == 'name':
+                if required < len(params):
+                    raise ValueError("LAMBDA parameters after an [optional] one must be optional")
+                required += 1
+            elif param[0] != 'optional':
+                raise ValueError("LAMBDA parameters must be names")
+            params.append(param[1])
+        if len(set(params)) != len(params):
+            raise ValueError("LAMBDA parameter names repeat")
+        params = tuple(params)
+        body = self._compile(arg_nodes[-1], scope | set(params))
+        return lambda env: Lambda(params, required, body, env)
+
+
+def _invoke(function, args):
+    if type(function) is Lambda:
+        return function(*args)
+    return function if type(function) is ExcelError else VALUE
+
+
+# ============================================================
+# TESTS SHEET
+# ============================================================
+
+TestRow = namedtuple('TestRow', ['row', 'function', 'name', 'expected', 'actual', 'passed', 'seconds', 'error'])
+TestRow.__doc__ = """\
+A Tests sheet row after evaluation.
+
+actual: Value of its Actual formula
+passed: Whether its Pass formula came out TRUE
+seconds: Time to evaluate the Actual formula
+error: Why a formula of the row would not parse or compile, else None;
+    such a row has not passed
+"""
+
+
+def read_tests_sheet(path):
+    """Yield the Function to Pass values of a workbook's test rows."""
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        for values in wb['Tests'].iter_rows(min_row=2, max_col=8, values_only=True):
+            if values[0] is None:
+                break  # the blank row before the summary
+            yield values
+    finally:
+        wb.close()
+
+
+def evaluate_tests(rows, engine=None):
+    """
+    Evaluate the Actual then the Pass formula of Tests sheet rows.
+
+    rows: Function to Pass values of each row from row 2, as from
+    read_tests_sheet or generate_test_workbook._test_rows
+
+    Returns a TestRow per row. A row whose formulas do not parse or
+    compile is recorded as failed with the message, and the rest still run.
+    """
+    engine = engine or FormulaEngine()
+    results = []
+    for row, (function, name, input1, input2, input3, expected, actual_formula, pass_formula) in enumerate(rows, 2):
+        cells = {f'C{row}': input1, f'D{row}': input2, f'E{row}': input3, f'F{row}': expected}
+        actual = error = None
+        start = time.perf_counter()
+        try:
+            actual = engine.evaluate(actual_formula, cells)
+            seconds = time.perf_counter() - start
+            cells[f'G{row}'] = actual
+            passed = engine.evaluate(pass_formula, cells) is True
+        except ValueError as e:
+            seconds = time.perf_counter() - start
+            passed, error = False, str(e)
+        results.append(TestRow(row, function, name, expected, actual, passed, seconds, error))
+    return results
+
+
+def format_report(results, elapsed, failures=20):
+    """Pass and fail counts and time per function, then the first failures."""
+    functions = {}
+    for r in results:
+        functions.setdefault(r.function, []).append(r)
+    passed = sum(r.passed for r in results)
+    lines = [
+        f"Evaluated {len(results):,} rows in {elapsed:.2f}s: "
+        f"{passed:,} passed, {len(results) - passed:,} failed",
+        "",
+        f"{'function':<16} {'rows':>8} {'passed':>8} {'failed':>8} {'seconds':>9} {'us/row':>8}",
+    ]
+    for function, rows in functions.items():
+        ok = sum(r.passed for r in rows)
+        seconds = sum(r.seconds for r in rows)
+        lines.append(f"{function:<16} {len(rows):>8,} {ok:>8,} {len(rows) - ok:>8,} "
+                     f"{seconds:>9.3f} {seconds / len(rows) * 1e6:>8.1f}")
+    failed = [r for r in results if not r.passed]
+    if failed and failures:
+        lines += ["", f"Failures ({min(failures, len(failed))} of {len(failed):,}):"]
+        lines += [f"  row {r.row} {r.function}: {r.name}: "
+                  + (f"error: {r.error}" if r.error else
+                     f"expected {_display(r.expected)}, got {_display(r.actual)}")
+                  for r in failed[:failures]]
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Evaluate the Tests sheet formulas without Excel')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--workbook', default=DEFAULT_WORKBOOK,
+                        help='Workbook whose Tests sheet to evaluate (default: test_whenwords.xlsx)')
+    source.add_argument('--tests', help='tests.yaml to build the rows from instead')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Evaluate the rows this many times, for timing (default: 1)')
+    parser.add_argument('--failures', type=int, default=20, help='Failures to list (default: 20)')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.tests:
+            from generate_test_workbook import load_tests, _test_rows
+            rows = list(_test_rows(load_tests(args.tests)))
+        else:
+            rows = list(read_tests_sheet(args.workbook))
+    except (OSError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    engine = FormulaEngine()
+    start = time.perf_counter()
+    results = []
+    for _ in range(max(args.repeat, 1)):
+        results += evaluate_tests(rows, engine)
+    print(format_report(results, time.perf_counter() - start, args.failures), end='')
+    return 0 if all(r.passed for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,17 +11,23 @@ Requirements:
     pip install openpyxl pyyaml
 
 Usage:
-    python generate_test_workbook.py [--validate]
+    python generate_test_workbook.py [--validate] [--write-only]
+    python generate_test_workbook.py --validate --module ../brainfuck-py/whenwords_lib.py --jobs 4
 """
 
 import os
 import sys
+import time
 import argparse
+import importlib
+import concurrent.futures
+from collections import namedtuple
 
 try:
     import openpyxl
     from openpyxl.utils import get_column_letter
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
 except ImportError:
     print("Error: openpyxl required. Install with: pip install openpyxl")
     sys.exit(1)
@@ -283,25 +289,82 @@ def load_tests(tests_yaml_path):
     return data
 
 
-def create_workbook(tests_data, output_path):
-    """Create Excel workbook with LAMBDA definitions and test sheet."""
-    wb = openpyxl.Workbook()
+# Actual formula of each function's test rows, in Tests sheet order
+TEST_FORMULAS = {
+    'timeago': '=WW_TIMEAGO(C{row},D{row})',
+    'duration': '=WW_DURATION(C{row},D{row},E{row})',
+    'parse_duration': '=WW_PARSE_DURATION(C{row})',
+    'human_date': '=WW_HUMAN_DATE(C{row},D{row})',
+    'date_range': '=WW_DATE_RANGE(C{row},D{row})',
+}
+
 
-    # Style definitions
+def _named_styles():
+    """Styles shared by every styled cell, registered once per workbook."""
     header_font = Font(bold=True, color="FFFFFF")
     header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    pass_fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-    fail_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+    thin = Side(style='thin')
+    return [
+        NamedStyle(name='ww_title', font=Font(bold=True, size=14)),
+        NamedStyle(name='ww_header', font=header_font, fill=header_fill),
+        NamedStyle(name='ww_header_boxed', font=header_font, fill=header_fill,
+                   border=Border(left=thin, right=thin, top=thin, bottom=thin)),
+        NamedStyle(name='ww_bold', font=Font(bold=True)),
+    ]
+
+
+def _styled(ws, value, style):
+    """A cell for ws.append with one of the named styles."""
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def _test_rows(tests_data):
+    """Yield the Tests sheet row of each non-error test, starting at row 2."""
+    row = 2
+    for function, formula in TEST_FORMULAS.items():
+        for test in tests_data.get(function, []):
+            if 'error' in test:
+                continue  # Skip error tests
+            inp = test['input']
+            if function == 'duration':
+                opts = inp.get('options', {})
+                inputs = [inp['seconds'], opts.get('compact', False), opts.get('max_units', 2)]
+            elif function == 'parse_duration':
+                inputs = [inp, None, None]
+            elif function == 'date_range':
+                inputs = [inp['start'], inp['end'], None]
+            else:
+                inputs = [inp['timestamp'], inp['reference'], None]
+            yield [function, test['name'], *inputs, test['output'],
+                   formula.format(row=row), f'=F{row}=G{row}']
+            row += 1
+
+
+def create_workbook(tests_data, output_path, write_only=False):
+    """
+    Create Excel workbook with LAMBDA definitions and test sheet.
+
+    Rows are appended in order with named styles, so with write_only they
+    stream to disk as they are made instead of being held until the save.
+    The test lists in tests_data may then be any iterables, such as
+    generators, and memory stays flat as the number of tests grows.
+
+    Returns the number of test rows.
+    """
+    wb = openpyxl.Workbook(write_only=write_only)
+    if not write_only:
+        wb.remove(wb.active)
+    for style in _named_styles():
+        wb.add_named_style(style)
+
+    # Column widths and frozen panes go before the rows: a write-only
+    # sheet writes them ahead of its first row
 
     # Create Instructions sheet
-    ws_inst = wb.active
-    ws_inst.title = "Instructions"
+    ws_inst = wb.create_sheet("Instructions")
+    ws_inst.column_dimensions['A'].width = 60
 
     instructions = [
         "WHENWORDS FOR EXCEL - Test Workbook",
@@ -331,265 +394,210 @@ def create_workbook(tests_data, output_path):
         "- WW_DATE_RANGE",
     ]
 
-    for i, line in enumerate(instructions, 1):
-        ws_inst.cell(row=i, column=1, value=line)
-        if i == 1:
-            ws_inst.cell(row=i, column=1).font = Font(bold=True, size=14)
-
-    ws_inst.column_dimensions['A'].width = 60
+    ws_inst.append([_styled(ws_inst, instructions[0], 'ww_title')])
+    for line in instructions[1:]:
+        ws_inst.append([line])
 
     # Create Formulas sheet
     ws_formulas = wb.create_sheet("Formulas")
-    ws_formulas.cell(row=1, column=1, value="Function Name").font = header_font
-    ws_formulas.cell(row=1, column=1).fill = header_fill
-    ws_formulas.cell(row=1, column=2, value="Formula (paste into Name Manager)").font = header_font
-    ws_formulas.cell(row=1, column=2).fill = header_fill
-
-    row = 2
-    for name, formula in LAMBDA_FORMULAS.items():
-        ws_formulas.cell(row=row, column=1, value=name)
-        ws_formulas.cell(row=row, column=2, value=formula)
-        row += 1
-
     ws_formulas.column_dimensions['A'].width = 25
     ws_formulas.column_dimensions['B'].width = 100
 
+    ws_formulas.append([_styled(ws_formulas, "Function Name", 'ww_header'),
+                        _styled(ws_formulas, "Formula (paste into Name Manager)", 'ww_header')])
+    for name, formula in LAMBDA_FORMULAS.items():
+        ws_formulas.append([name, formula])
+
     # Create Tests sheet
     ws_tests = wb.create_sheet("Tests")
-
-    # Headers
-    headers = ["Function", "Test Name", "Input1", "Input2", "Input3", "Expected", "Actual", "Pass"]
-    for col, header in enumerate(headers, 1):
-        cell = ws_tests.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = thin_border
+    for column, width in zip('ABCDEFGH', (15, 40, 30, 15, 10, 35, 35, 10)):
+        ws_tests.column_dimensions[column].width = width
 
     # Freeze header row
     ws_tests.freeze_panes = 'A2'
 
-    row = 2
+    # Headers
+    headers = ["Function", "Test Name", "Input1", "Input2", "Input3", "Expected", "Actual", "Pass"]
+    ws_tests.append([_styled(ws_tests, header, 'ww_header_boxed') for header in headers])
 
-    # Process timeago tests
-    for test in tests_data.get('timeago', []):
-        if 'error' in test:
-            continue  # Skip error tests
-        inp = test['input']
-        ws_tests.cell(row=row, column=1, value="timeago")
-        ws_tests.cell(row=row, column=2, value=test['name'])
-        ws_tests.cell(row=row, column=3, value=inp['timestamp'])
-        ws_tests.cell(row=row, column=4, value=inp['reference'])
-        ws_tests.cell(row=row, column=6, value=test['output'])
-        ws_tests.cell(row=row, column=7, value=f'=WW_TIMEAGO(C{row},D{row})')
-        ws_tests.cell(row=row, column=8, value=f'=F{row}=G{row}')
-        row += 1
-
-    # Process duration tests
-    for test in tests_data.get('duration', []):
-        if 'error' in test:
-            continue
-        inp = test['input']
-        ws_tests.cell(row=row, column=1, value="duration")
-        ws_tests.cell(row=row, column=2, value=test['name'])
-        ws_tests.cell(row=row, column=3, value=inp['seconds'])
-
-        opts = inp.get('options', {})
-        compact = opts.get('compact', False)
-        max_units = opts.get('max_units', 2)
-
-        ws_tests.cell(row=row, column=4, value=compact)
-        ws_tests.cell(row=row, column=5, value=max_units)
-        ws_tests.cell(row=row, column=6, value=test['output'])
-        ws_tests.cell(row=row, column=7, value=f'=WW_DURATION(C{row},D{row},E{row})')
-        ws_tests.cell(row=row, column=8, value=f'=F{row}=G{row}')
-        row += 1
-
-    # Process parse_duration tests
-    for test in tests_data.get('parse_duration', []):
-        if 'error' in test:
-            continue
-        ws_tests.cell(row=row, column=1, value="parse_duration")
-        ws_tests.cell(row=row, column=2, value=test['name'])
-        ws_tests.cell(row=row, column=3, value=test['input'])
-        ws_tests.cell(row=row, column=6, value=test['output'])
-        ws_tests.cell(row=row, column=7, value=f'=WW_PARSE_DURATION(C{row})')
-        ws_tests.cell(row=row, column=8, value=f'=F{row}=G{row}')
-        row += 1
-
-    # Process human_date tests
-    for test in tests_data.get('human_date', []):
-        if 'error' in test:
-            continue
-        inp = test['input']
-        ws_tests.cell(row=row, column=1, value="human_date")
-        ws_tests.cell(row=row, column=2, value=test['name'])
-        ws_tests.cell(row=row, column=3, value=inp['timestamp'])
-        ws_tests.cell(row=row, column=4, value=inp['reference'])
-        ws_tests.cell(row=row, column=6, value=test['output'])
-        ws_tests.cell(row=row, column=7, value=f'=WW_HUMAN_DATE(C{row},D{row})')
-        ws_tests.cell(row=row, column=8, value=f'=F{row}=G{row}')
-        row += 1
-
-    # Process date_range tests
-    for test in tests_data.get('date_range', []):
-        if 'error' in test:
-            continue
-        inp = test['input']
-        ws_tests.cell(row=row, column=1, value="date_range")
-        ws_tests.cell(row=row, column=2, value=test['name'])
-        ws_tests.cell(row=row, column=3, value=inp['start'])
-        ws_tests.cell(row=row, column=4, value=inp['end'])
-        ws_tests.cell(row=row, column=6, value=test['output'])
-        ws_tests.cell(row=row, column=7, value=f'=WW_DATE_RANGE(C{row},D{row})')
-        ws_tests.cell(row=row, column=8, value=f'=F{row}=G{row}')
-        row += 1
-
-    # Add summary row
-    total_tests = row - 2
-    ws_tests.cell(row=row + 1, column=1, value="SUMMARY")
-    ws_tests.cell(row=row + 1, column=1).font = Font(bold=True)
-    ws_tests.cell(row=row + 1, column=6, value="Total Tests:")
-    ws_tests.cell(row=row + 1, column=7, value=total_tests)
-    ws_tests.cell(row=row + 2, column=6, value="Passed:")
-    ws_tests.cell(row=row + 2, column=7, value=f'=COUNTIF(H2:H{row-1},TRUE)')
-    ws_tests.cell(row=row + 3, column=6, value="Failed:")
-    ws_tests.cell(row=row + 3, column=7, value=f'=COUNTIF(H2:H{row-1},FALSE)')
+    total_tests = 0
+    for values in _test_rows(tests_data):
+        ws_tests.append(values)
+        total_tests += 1
+    row = total_tests + 2
+
+    # Add summary rows after a blank one
+    ws_tests.append([])
+    ws_tests.append([_styled(ws_tests, "SUMMARY", 'ww_bold'), None, None, None, None,
+                     "Total Tests:", total_tests])
+    ws_tests.append([None] * 5 + ["Passed:", f'=COUNTIF(H2:H{row-1},TRUE)'])
+    ws_tests.append([None] * 5 + ["Failed:", f'=COUNTIF(H2:H{row-1},FALSE)'])
 
     # Apply conditional formatting for Pass column would need openpyxl rules
     # For simplicity, we'll skip that here
 
-    # Set column widths
-    ws_tests.column_dimensions['A'].width = 15
-    ws_tests.column_dimensions['B'].width = 40
-    ws_tests.column_dimensions['C'].width = 30
-    ws_tests.column_dimensions['D'].width = 15
-    ws_tests.column_dimensions['E'].width = 10
-    ws_tests.column_dimensions['F'].width = 35
-    ws_tests.column_dimensions['G'].width = 35
-    ws_tests.column_dimensions['H'].width = 10
-
     wb.save(output_path)
     print(f"Created workbook: {output_path}")
     return total_tests
 
 
-def validate_with_python(tests_data):
-    """Validate tests using Python reference implementation."""
-    # Import the Python reference implementation
-    python_impl_path = os.path.join(os.path.dirname(__file__), '..', 'python')
-    sys.path.insert(0, python_impl_path)
+# Implementation validate_with_python checks by default
+DEFAULT_MODULE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python', 'whenwords.py')
 
-    try:
-        from whenwords import timeago, duration, parse_duration, human_date, date_range
-    except ImportError:
-        print("Warning: Could not import Python reference implementation")
-        print("         Skipping validation")
-        return None
+# Cases per task sent to a worker, and the fewest worth a process pool
+VALIDATION_CHUNK_SIZE = 2000
+PARALLEL_MIN_CASES = 4000
 
-    passed = 0
-    failed = 0
-    errors = []
+# Failures main prints before summarizing the rest
+MAX_PRINTED_FAILURES = 50
 
-    # Test timeago
-    for test in tests_data.get('timeago', []):
-        if 'error' in test:
-            continue
-        inp = test['input']
-        expected = test['output']
-        try:
-            result = timeago(inp['timestamp'], inp['reference'])
-            if result == expected:
-                passed += 1
-            else:
-                failed += 1
-                errors.append(f"timeago: {test['name']}: expected '{expected}', got '{result}'")
-        except Exception as e:
-            failed += 1
-            errors.append(f"timeago: {test['name']}: raised {e}")
+FunctionStats = namedtuple('FunctionStats', ['cases', 'passed', 'failed', 'seconds'])
+FunctionStats.__doc__ = """\
+Validation totals for one function.
 
-    # Test duration
-    for test in tests_data.get('duration', []):
-        if 'error' in test:
-            continue
-        inp = test['input']
-        expected = test['output']
-        opts = inp.get('options', {})
-        try:
-            result = duration(
-                inp['seconds'],
-                compact=opts.get('compact', False),
-                max_units=opts.get('max_units', 2)
-            )
-            if result == expected:
-                passed += 1
-            else:
-                failed += 1
-                errors.append(f"duration: {test['name']}: expected '{expected}', got '{result}'")
-        except Exception as e:
-            failed += 1
-            errors.append(f"duration: {test['name']}: raised {e}")
+seconds: Time spent in its calls, summed over the workers
+"""
 
-    # Test parse_duration
-    for test in tests_data.get('parse_duration', []):
-        if 'error' in test:
-            continue
-        expected = test['output']
-        try:
-            result = parse_duration(test['input'])
-            if result == expected:
-                passed += 1
-            else:
-                failed += 1
-                errors.append(f"parse_duration: {test['name']}: expected {expected}, got {result}")
-        except Exception as e:
-            failed += 1
-            errors.append(f"parse_duration: {test['name']}: raised {e}")
+ValidationResult = namedtuple('ValidationResult', ['passed', 'failed', 'errors', 'functions', 'jobs'])
+ValidationResult.__doc__ = """\
+Outcome of validate_with_python.
 
-    # Test human_date
-    for test in tests_data.get('human_date', []):
-        if 'error' in test:
-            continue
-        inp = test['input']
-        expected = test['output']
-        try:
-            result = human_date(inp['timestamp'], inp['reference'])
-            if result == expected:
-                passed += 1
+errors: A message per failed case
+functions: FunctionStats by function name, in TEST_FORMULAS order
+jobs: Worker processes used, 1 when the cases ran in this process
+"""
+
+
+def _validation_cases(tests_data):
+    """Yield (function, name, args, expected) for every test; expected is ValueError for an error test."""
+    for function in TEST_FORMULAS:
+        for test in tests_data.get(function, []):
+            inp = test['input']
+            if function == 'duration':
+                args = (inp['seconds'], inp.get('options') or None)
+            elif function == 'parse_duration':
+                args = (inp,)
+            elif function == 'date_range':
+                args = (inp['start'], inp['end'])
             else:
-                failed += 1
-                errors.append(f"human_date: {test['name']}: expected '{expected}', got '{result}'")
-        except Exception as e:
-            failed += 1
-            errors.append(f"human_date: {test['name']}: raised {e}")
+                args = (inp['timestamp'], inp['reference'])
+            yield function, test['name'], args, ValueError if 'error' in test else test['output']
 
-    # Test date_range
-    for test in tests_data.get('date_range', []):
-        if 'error' in test:
-            continue
-        inp = test['input']
-        expected = test['output']
+
+def _load_module(module):
+    """Import an implementation from a .py path or a module name."""
+    if module.endswith('.py') or os.sep in module:
+        # From its own directory, so its imports of siblings work
+        directory, filename = os.path.split(os.path.abspath(module))
+        sys.path.insert(0, directory)
+        module = os.path.splitext(filename)[0]
+    return importlib.import_module(module)
+
+
+# The implementation in a validation worker, loaded by _init_validation_worker
+_validation_module = None
+
+
+def _init_validation_worker(module):
+    global _validation_module
+    _validation_module = _load_module(module)
+
+
+def _validate_chunk(function, cases):
+    """Run one function over a chunk of (name, args, expected) cases; returns (passed, errors, seconds)."""
+    call = getattr(_validation_module, function)
+    passed = 0
+    errors = []
+    start = time.perf_counter()
+    for name, args, expected in cases:
         try:
-            result = date_range(inp['start'], inp['end'])
-            if result == expected:
+            result = call(*args)
+        except ValueError as e:
+            if expected is ValueError:
                 passed += 1
             else:
-                failed += 1
-                errors.append(f"date_range: {test['name']}: expected '{expected}', got '{result}'")
+                errors.append(f"{function}: {name}: expected {expected!r}, raised ValueError: {e}")
+            continue
         except Exception as e:
-            failed += 1
-            errors.append(f"date_range: {test['name']}: raised {e}")
+            errors.append(f"{function}: {name}: raised {type(e).__name__}: {e}")
+            continue
+        if result == expected and expected is not ValueError:
+            passed += 1
+        else:
+            errors.append(f"{function}: {name}: expected "
+                          f"{'ValueError' if expected is ValueError else repr(expected)}, got {result!r}")
+    return passed, errors, time.perf_counter() - start
+
+
+def validate_with_python(tests_data, module=DEFAULT_MODULE, jobs=None):
+    """
+    Validate tests against a Python implementation of whenwords.
 
-    return passed, failed, errors
+    Cases are split into chunks of one function each. Large sets are
+    spread over a process pool, each worker importing the module once.
+    An error test passes when the call raises ValueError.
+
+    Args:
+        module: Path to a .py file or a module name, with the
+            whenwords functions (default: the Python reference)
+        jobs: Worker processes (default: one per CPU)
+
+    Returns a ValidationResult, or None if the module does not import.
+    """
+    try:
+        _init_validation_worker(module)
+    except ImportError:
+        print(f"Warning: Could not import {module}")
+        print("         Skipping validation")
+        return None
+
+    by_function = {function: [] for function in TEST_FORMULAS}
+    for function, name, args, expected in _validation_cases(tests_data):
+        by_function[function].append((name, args, expected))
+    tasks = [(function, cases[i:i + VALIDATION_CHUNK_SIZE])
+             for function, cases in by_function.items()
+             for i in range(0, len(cases), VALIDATION_CHUNK_SIZE)]
+
+    total = sum(len(cases) for cases in by_function.values())
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks)) if total >= PARALLEL_MIN_CASES else 1
+    if jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(jobs, initializer=_init_validation_worker,
+                                                    initargs=(module,)) as pool:
+            outcomes = list(pool.map(_validate_chunk, *zip(*tasks)))
+    else:
+        outcomes = [_validate_chunk(function, cases) for function, cases in tasks]
+
+    totals = {function: [0, 0.0] for function in TEST_FORMULAS}
+    errors = []
+    for (function, _), (passed, chunk_errors, seconds) in zip(tasks, outcomes):
+        totals[function][0] += passed
+        totals[function][1] += seconds
+        errors += chunk_errors
+    functions = {function: FunctionStats(len(by_function[function]), passed,
+                                         len(by_function[function]) - passed, seconds)
+                 for function, (passed, seconds) in totals.items()}
+    passed = sum(stats.passed for stats in functions.values())
+    return ValidationResult(passed, total - passed, errors, functions, jobs)
 
 
 def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
     parser = argparse.ArgumentParser(description='Generate whenwords Excel test workbook')
     parser.add_argument('--validate', action='store_true',
                         help='Validate tests using Python reference implementation')
+    parser.add_argument('--module', default=DEFAULT_MODULE,
+                        help='Implementation to validate: a .py path or module name '
+                             '(default: ../python/whenwords.py)')
+    parser.add_argument('--jobs', type=int,
+                        help='Worker processes for validation (default: one per CPU)')
+    parser.add_argument('--tests', default=os.path.join(script_dir, '..', '..', 'tests.yaml'),
+                        help='tests.yaml to read (default: ../../tests.yaml)')
+    parser.add_argument('--write-only', action='store_true',
+                        help='Stream rows to disk instead of building the workbook in memory')
     args = parser.parse_args()
 
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    tests_yaml_path = os.path.join(script_dir, '..', '..', 'tests.yaml')
+    tests_yaml_path = args.tests
     output_path = os.path.join(script_dir, 'test_whenwords.xlsx')
 
     # Load tests
@@ -597,22 +605,30 @@ def main():
     tests_data = load_tests(tests_yaml_path)
 
     # Create workbook
-    total_tests = create_workbook(tests_data, output_path)
+    total_tests = create_workbook(tests_data, output_path, write_only=args.write_only)
     print(f"Total tests: {total_tests}")
 
     # Optionally validate with Python
     if args.validate:
-        print("\nValidating with Python reference implementation...")
-        result = validate_with_python(tests_data)
+        print(f"\nValidating with {args.module}...")
+        start = time.perf_counter()
+        result = validate_with_python(tests_data, args.module, args.jobs)
         if result:
-            passed, failed, errors = result
-            print(f"Passed: {passed}")
-            print(f"Failed: {failed}")
-            if errors:
+            elapsed = time.perf_counter() - start
+            print(f"{'function':<16} {'cases':>9} {'passed':>9} {'failed':>9} {'seconds':>9}")
+            for function, stats in result.functions.items():
+                print(f"{function:<16} {stats.cases:>9,} {stats.passed:>9,} {stats.failed:>9,} "
+                      f"{stats.seconds:>9.3f}")
+            print(f"Validated in {elapsed:.2f}s on {result.jobs} worker{'s' if result.jobs != 1 else ''}")
+            print(f"Passed: {result.passed}")
+            print(f"Failed: {result.failed}")
+            if result.errors:
                 print("\nFailures:")
-                for err in errors:
+                for err in result.errors[:MAX_PRINTED_FAILURES]:
                     print(f"  - {err}")
-            if failed == 0:
+                if len(result.errors) > MAX_PRINTED_FAILURES:
+                    print(f"  ... and {len(result.errors) - MAX_PRINTED_FAILURES:,} more")
+            if result.failed == 0:
                 print("\nAll tests passed!")
                 return 0
             else:
@@ -0,0 +1,142 @@
+"""
+Tests for formula_engine - parsing, Excel semantics and the Tests sheet
+"""
+
+import pytest
+
+import formula_engine
+from formula_engine import FormulaEngine, parse, evaluate_tests, format_report, read_tests_sheet
+from formula_engine import VALUE, NAME, DIV0
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+requires_openpyxl = pytest.mark.skipif(openpyxl is None, reason="openpyxl not installed")
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return FormulaEngine()
+
+
+# ============================================================================
+# parsing tests
+# ============================================================================
+
+def test_parse_precedence():
+    assert parse("=1+2*3") == ("op", "+", ("num", 1.0), ("op", "*", ("num", 2.0), ("num", 3.0)))
+
+
+def test_parse_missing_argument():
+    assert parse("=IF(A1, 1, )") == ("call", "IF", [("name", "A1"), ("num", 1.0), ("missing",)])
+
+
+def test_parse_is_cached():
+    assert parse("=A1&\"x\"") is parse("=A1&\"x\"")
+
+
+@pytest.mark.parametrize("formula,message", [
+    ("=1+", "Unexpected end of formula"),
+    ("=(1", r"Expected '\)'"),
+    ("=1 2", "after the end of the formula"),
+    ("={1,2;3}", "Array rows differ in length"),
+])
+def test_parse_errors(formula, message):
+    with pytest.raises(ValueError, match=message):
+        parse(formula)
+
+
+@pytest.mark.parametrize("formula,message", [
+    ("=IF(1, 2, 3, 4)", "Wrong number of arguments to IF"),
+    ("=LET(a, 1)", "LET takes name, value pairs and a calculation"),
+    ("=LAMBDA(x, x, x)", "LAMBDA parameter names repeat"),
+])
+def test_compile_errors(engine, formula, message):
+    with pytest.raises(ValueError, match=message):
+        engine.evaluate(formula, {})
+
+
+# ============================================================================
+# evaluation tests
+# ============================================================================
+
+@pytest.mark.parametrize("formula,expected", [
+    ("=-2^2", 4.0),             # negation binds tighter than ^
+    ("=\"a\"=\"A\"", True),     # text compares without case
+    ("=1&2", "12"),
+    ("={1,2;3,4}", [[1.0, 2.0], [3.0, 4.0]]),
+])
+def test_operators(engine, formula, expected):
+    assert engine.evaluate(formula, {}) == expected
+
+
+@pytest.mark.parametrize("formula,expected", [
+    ("=1/0", DIV0),
+    ("=(1/0)+1", DIV0),         # errors propagate through operators
+    ("=ABS(\"x\")", VALUE),
+    ("=NOPE(1)", NAME),
+    ("=IFERROR(1/0,\"x\")", "x"),
+    ("=ISERROR(NOPE())", True),
+])
+def test_error_propagation(engine, formula, expected):
+    assert engine.evaluate(formula, {}) == expected
+
+
+def test_cell_references(engine):
+    assert engine.evaluate("=C2*2", {"C2": 21}) == 42.0
+
+
+# ============================================================================
+# LET and LAMBDA tests
+# ============================================================================
+
+@pytest.mark.parametrize("formula,expected", [
+    ("=LET(a, 1, b, a + 1, a & b)", "12"),
+    ("=LET(x, 1, LET(x, 2, x) + x)", 3.0),                 # inner LET shadows only its body
+    ("=LAMBDA(x, x + 1)(2)", 3.0),
+    ("=LAMBDA(x, LAMBDA(y, x + y))(1)(2)", 3.0),           # closures keep their scope
+    ("=LET(f, LAMBDA(y, y + x), x, 5, f(1))", NAME),       # not names defined after them
+    ("=LAMBDA(a, [b], ISOMITTED(b))(1)", True),
+    ("=LAMBDA(x, x)()", VALUE),
+])
+def test_let_and_lambda_scoping(engine, formula, expected):
+    assert engine.evaluate(formula, {}) == expected
+
+
+def test_recursive_names():
+    engine = FormulaEngine({"FACT": "=LAMBDA(n, IF(n <= 1, 1, n * FACT(n - 1)))"})
+    assert engine.call("FACT", 10) == 3628800.0
+
+
+def test_shipped_formulas(engine):
+    assert engine.call("WW_DURATION", 3661, True) == "1h 1m"
+    assert engine.evaluate("=WW_TIMEAGO(C2,D2)", {"C2": 1704067110, "D2": 1704067200}) == "2 minutes ago"
+
+
+# ============================================================================
+# Tests sheet tests
+# ============================================================================
+
+def test_evaluate_tests_records_malformed_rows(engine):
+    rows = [
+        ("duration", "ok", 3661, True, None, "1h 1m", "=WW_DURATION(C2,D2)", "=G2=F2"),
+        ("duration", "bad", 3661, True, None, "1h 1m", "=WW_DURATION(C3,", "=G3=F3"),
+        ("duration", "after", 0, None, None, "0 seconds", "=WW_DURATION(C4)", "=G4=F4"),
+    ]
+    results = evaluate_tests(rows, engine)
+    assert [r.passed for r in results] == [True, False, True]
+    assert results[1].actual is None and "end of formula" in results[1].error
+    assert "row 3 duration: bad: error: Unexpected end of formula" in format_report(results, 0.0)
+
+
+@requires_openpyxl
+def test_shipped_workbook():
+    results = evaluate_tests(read_tests_sheet(formula_engine.DEFAULT_WORKBOOK))
+    failed = [r for r in results if not r.passed]
+    assert len(results) == 118
+    # WW_PARSE_DURATION does not yet read compact or abbreviated units
+    assert [r.row for r in failed] == [63, 66, 67, 68, 69, 71, 77, 81, 87, 88, 90]
+    assert {r.function for r in failed} == {"parse_duration"}
+    assert all(r.error is None for r in results)
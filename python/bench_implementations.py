@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Cross-implementation benchmark for the two Python whenwords libraries.
+
+Drives python/whenwords.py and brainfuck-py/whenwords_lib.py through the
+same generated workloads, one per (function, input type), and records for
+each implementation:
+
+    ns_per_call       best-of-N wall time per call
+    alloc_peak_bytes  tracemalloc peak while running the workload
+    errors            calls that raised
+
+plus, per workload, how many inputs produced different outputs (or
+different exception types) in the two implementations.
+
+Stdlib only.
+
+Usage:
+    python bench_implementations.py                        # JSON report to stdout
+    python bench_implementations.py -o baseline.json       # save a report
+    python bench_implementations.py --compare baseline.json
+    python bench_implementations.py --function timeago --size 5000
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPLEMENTATIONS = {
+    'python': os.path.join(ROOT, 'python', 'whenwords.py'),
+    'brainfuck-py': os.path.join(ROOT, 'brainfuck-py', 'whenwords_lib.py'),
+}
+
+FUNCTIONS = ['timeago', 'duration', 'parse_duration', 'human_date', 'date_range']
+
+REFERENCE = 1704067200
+
+# Slower than this fraction over the baseline counts as a regression
+DEFAULT_TOLERANCE = 0.10
+
+
+def load_implementation(name, path):
+    """Import a library from its file path under a private module name."""
+    module_name = '_bench_' + name.replace('-', '_')
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ============================================================
+# WORKLOADS
+# ============================================================
+
+def _diffs(rng, size):
+    """Signed diffs spread over every timeago bucket."""
+    spans = [45, 90, 2700, 5400, 79200, 129600, 2246400, 3974400, 27648000, 47347200, 10 * 31536000]
+    return [rng.choice((-1, 1)) * rng.uniform(0, rng.choice(spans)) for _ in range(size)]
+
+
+def _iso(ts):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(ts))
+
+
+def generate_workloads(size, seed=0):
+    """
+    Return {(function, input_type): [args, ...]}.
+
+    Every implementation is called with exactly these argument tuples.
+    """
+    rng = random.Random(seed)
+    diffs = _diffs(rng, size)
+    workloads = {}
+
+    workloads[('timeago', 'int')] = [(REFERENCE - int(d), REFERENCE) for d in diffs]
+    workloads[('timeago', 'float')] = [(REFERENCE - d, float(REFERENCE)) for d in diffs]
+    workloads[('timeago', 'iso')] = [(_iso(REFERENCE - int(d)), _iso(REFERENCE)) for d in diffs]
+
+    seconds = [int(abs(d)) for d in diffs]
+    workloads[('duration', 'int')] = [(s,) for s in seconds]
+    workloads[('duration', 'float')] = [(abs(d),) for d in diffs]
+    workloads[('duration', 'options')] = [
+        (s, {'compact': rng.random() < 0.5, 'max_units': rng.randint(1, 4)}) for s in seconds]
+
+    def compact():
+        parts = rng.sample([('d', 86400), ('h', 24), ('m', 60), ('s', 60)], rng.randint(1, 3))
+        return ''.join(f"{rng.randrange(limit)}{unit}" for unit, limit in parts)
+
+    def verbose():
+        return f"{rng.randint(1, 9)} hours and {rng.randint(1, 59)} minutes"
+
+    def colon():
+        return f"{rng.randint(0, 99)}:{rng.randint(0, 59):02d}" + (f":{rng.randint(0, 59):02d}" if rng.random() < 0.5 else "")
+
+    def decimal():
+        return f"{rng.randint(0, 9)}.{rng.randint(0, 9)} {rng.choice(['h', 'hours', 'days', 'min'])}"
+
+    def invalid():
+        return rng.choice(["", "   ", "-5m", "hello", "5 parsecs", "1.5.3"])
+
+    for input_type, make in (('compact', compact), ('verbose', verbose), ('colon', colon),
+                             ('decimal', decimal), ('invalid', invalid)):
+        workloads[('parse_duration', input_type)] = [(make(),) for _ in range(size)]
+
+    day_diffs = [rng.randint(-400, 400) * 86400 + rng.randint(0, 86399) for _ in range(size)]
+    workloads[('human_date', 'int')] = [(REFERENCE + d, REFERENCE) for d in day_diffs]
+    workloads[('human_date', 'float')] = [(REFERENCE + d + 0.25, float(REFERENCE)) for d in day_diffs]
+
+    workloads[('date_range', 'int')] = [(REFERENCE, REFERENCE + abs(d)) for d in day_diffs]
+    workloads[('date_range', 'swapped')] = [(REFERENCE + abs(d), REFERENCE) for d in day_diffs]
+
+    return workloads
+
+
+# ============================================================
+# MEASUREMENT
+# ============================================================
+
+def _outcome(fn, args):
+    """('ok', result) or ('error', exception type name)."""
+    try:
+        return ('ok', fn(*args))
+    except Exception as e:
+        return ('error', type(e).__name__)
+
+
+def _run(fn, calls):
+    errors = 0
+    for args in calls:
+        try:
+            fn(*args)
+        except Exception:
+            errors += 1
+    return errors
+
+
+def measure(fn, calls, repeat):
+    """Time and trace one implementation over one workload."""
+    _run(fn, calls)  # warm caches and lazy tables, as in steady state
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        errors = _run(fn, calls)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        _run(fn, calls)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'ns_per_call': round(best / len(calls) * 1e9, 1),
+        'alloc_peak_bytes': peak,
+        'errors': errors,
+    }
+
+
+def divergence(fns, calls, max_examples=3):
+    """Count inputs whose outcomes differ between implementations."""
+    count = 0
+    examples = []
+    for args in calls:
+        outcomes = {name: _outcome(fn, args) for name, fn in fns.items()}
+        if len(set(map(repr, outcomes.values()))) > 1:
+            count += 1
+            if len(examples) < max_examples:
+                examples.append({'args': repr(args), 'outcomes': {k: repr(v) for k, v in outcomes.items()}})
+    return count, examples
+
+
+def run_benchmarks(size, repeat, functions, seed=0):
+    """Build the JSON-serializable report."""
+    modules = {name: load_implementation(name, path) for name, path in IMPLEMENTATIONS.items()}
+    workloads = generate_workloads(size, seed)
+
+    results = []
+    divergences = []
+    for (function, input_type), calls in workloads.items():
+        if function not in functions:
+            continue
+        fns = {name: getattr(module, function) for name, module in modules.items()}
+        for name, fn in fns.items():
+            entry = {'function': function, 'input_type': input_type, 'implementation': name}
+            entry.update(measure(fn, calls, repeat))
+            results.append(entry)
+        count, examples = divergence(fns, calls)
+        divergences.append({'function': function, 'input_type': input_type,
+                            'inputs': len(calls), 'divergent': count, 'examples': examples})
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'size': size,
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+        'divergence': divergences,
+    }
+
+
+# ============================================================
+# COMPARE MODE
+# ============================================================
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Return a list of human-readable regressions of report against baseline.
+
+    Flags workloads that got slower by more than `tolerance` and
+    workloads whose divergence count went up.
+    """
+    regressions = []
+
+    def keyed(entries, *fields):
+        return {tuple(e[f] for f in fields): e for e in entries}
+
+    old = keyed(baseline.get('results', []), 'function', 'input_type', 'implementation')
+    for key, entry in keyed(report['results'], 'function', 'input_type', 'implementation').items():
+        before = old.get(key)
+        if before is None:
+            continue
+        ratio = entry['ns_per_call'] / before['ns_per_call'] if before['ns_per_call'] else 1.0
+        if ratio > 1 + tolerance:
+            regressions.append(f"{'/'.join(key)}: {before['ns_per_call']} -> {entry['ns_per_call']} ns/call "
+                               f"(+{(ratio - 1) * 100:.0f}%)")
+
+    old_div = keyed(baseline.get('divergence', []), 'function', 'input_type')
+    for key, entry in keyed(report['divergence'], 'function', 'input_type').items():
+        before = old_div.get(key)
+        if before is not None and entry['divergent'] > before['divergent']:
+            regressions.append(f"{'/'.join(key)}: divergent inputs {before['divergent']} -> {entry['divergent']}")
+
+    return regressions
+
+
+def print_summary(report, out=sys.stderr):
+    """Readable table of the report."""
+    for entry in report['results']:
+        print(f"{entry['function']:<15} {entry['input_type']:<9} {entry['implementation']:<13} "
+              f"{entry['ns_per_call']:>10,.1f} ns/call  {entry['alloc_peak_bytes']:>9,} B peak  "
+              f"{entry['errors']:>6} errors", file=out)
+    for entry in report['divergence']:
+        if entry['divergent']:
+            print(f"{entry['function']:<15} {entry['input_type']:<9} divergent on "
+                  f"{entry['divergent']}/{entry['inputs']} inputs", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Python whenwords implementations against each other')
+    parser.add_argument('--size', type=int, default=2000,
+                        help='Inputs per workload (default: 2000)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Timing repeats, best is kept (default: 3)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Workload random seed (default: 0)')
+    parser.add_argument('--function', action='append', choices=FUNCTIONS,
+                        help='Only benchmark this function (repeatable)')
+    parser.add_argument('-o', '--output',
+                        help='Write the JSON report here (default: stdout)')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='Compare against a saved report; exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'Allowed slowdown before flagging (default: {DEFAULT_TOLERANCE})')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.size, args.repeat, args.function or FUNCTIONS, args.seed)
+    print_summary(report)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    elif not args.compare:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:", file=sys.stderr)
+            for line in regressions:
+                print(f"  - {line}", file=sys.stderr)
+            return 1
+        print("\nNo regressions against baseline.", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
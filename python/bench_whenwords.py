@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for whenwords.
+
+Usage:
+    python bench_whenwords.py                       # Run every benchmark
+    python bench_whenwords.py timeago_many          # Run one benchmark
+    python bench_whenwords.py timeago_many --sizes 10000 1000000
+
+Exits non-zero if a benchmark with a budget (import_time) is over it.
+"""
+
+import argparse
+import sys
+import time
+
+import whenwords
+
+
+REFERENCE = 1704067200
+
+# Scalar loops are timed on at most this many elements and extrapolated
+SCALAR_SAMPLE = 100_000
+
+# `import whenwords` must stay under this cumulative time (microseconds,
+# median of the runs) as reported by `python -X importtime`
+IMPORT_TIME_BUDGET_US = 5000
+IMPORT_TIME_RUNS = 20
+
+
+def _best_of(fn, repeat=3):
+    """Return the fastest wall-clock time of `repeat` calls to fn()."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _report(name, size, before_per_item, after_seconds):
+    """Print per-item timings for a baseline and an optimized path."""
+    after_per_item = after_seconds / size
+    print(f"{name:<20} n={size:>10,}  "
+          f"before {before_per_item * 1e9:8.1f} ns/item  "
+          f"after {after_per_item * 1e9:8.1f} ns/item  "
+          f"speedup {before_per_item / after_per_item:6.1f}x")
+
+
+def bench_timeago_many(sizes):
+    """Compare timeago_many against a loop over timeago."""
+    np = whenwords._require_numpy()
+    rng = np.random.default_rng(0)
+
+    for size in sizes:
+        # Spread diffs over every bucket, past and future
+        timestamps = REFERENCE - rng.integers(-3 * 365 * 86400, 3 * 365 * 86400, size)
+
+        sample = timestamps[:SCALAR_SAMPLE].tolist()
+        scalar = _best_of(lambda: [whenwords.timeago(t, REFERENCE) for t in sample], repeat=1)
+        batch = _best_of(lambda: whenwords.timeago_many(timestamps, REFERENCE))
+
+        _report("timeago_many", size, scalar / len(sample), batch)
+
+
+def bench_human_date_many(sizes):
+    """Compare human_date_many against a loop over human_date."""
+    np = whenwords._require_numpy()
+    rng = np.random.default_rng(0)
+
+    for size in sizes:
+        # Mostly nearby days plus a tail of dates in other years
+        timestamps = REFERENCE - rng.integers(-2 * 365 * 86400, 2 * 365 * 86400, size)
+
+        sample = timestamps[:SCALAR_SAMPLE].tolist()
+        scalar = _best_of(lambda: [whenwords.human_date(t, REFERENCE) for t in sample], repeat=1)
+        batch = _best_of(lambda: whenwords.human_date_many(timestamps, REFERENCE))
+
+        _report("human_date_many", size, scalar / len(sample), batch)
+
+
+def bench_timeago_index(sizes):
+    """Compare the breakpoint index against the threshold cascade."""
+    import random
+
+    rng = random.Random(0)
+    for size in sizes:
+        diffs = [float(rng.randint(-3 * 365 * 86400, 3 * 365 * 86400)) for _ in range(size)]
+        cascade = _best_of(lambda: [whenwords._timeago_cascade(d) for d in diffs])
+        index = _best_of(lambda: [whenwords._timeago_lookup(d) for d in diffs])
+        _report("timeago_index", size, cascade / size, index)
+
+        mismatches = whenwords._verify_timeago_index(-size, size)
+        print(f"{'':<20} verified diffs in [-{size:,}, {size:,}): {len(mismatches)} mismatches")
+
+
+def bench_iso_parse(sizes):
+    """Compare ISO 8601 normalization with the plain fromisoformat path."""
+    import random
+    from datetime import datetime, timezone
+
+    def fromisoformat_path(text):
+        return datetime.fromisoformat(text.replace('Z', '+00:00')).timestamp()
+
+    rng = random.Random(0)
+    for size in sizes:
+        # A time-ordered event log, about 10 events per distinct second
+        seconds = sorted(REFERENCE + rng.randrange(size // 10 + 1) for _ in range(size))
+        strings = [datetime.fromtimestamp(t, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ') for t in seconds]
+
+        before = _best_of(lambda: [fromisoformat_path(t) for t in strings])
+
+        def cached():
+            whenwords.iso_cache_clear()
+            for t in strings:
+                whenwords._normalize_timestamp(t)
+
+        _report("iso_parse", size, before / size, _best_of(cached))
+        print(f"{'':<20} {whenwords.iso_cache_info()}")
+
+
+def bench_parse_duration(sizes):
+    """Compare cached and uncached parse_duration on a repeated-string workload."""
+    import random
+    import re
+
+    unit_map = dict(whenwords._DURATION_UNITS)
+
+    def regex_parse(s):
+        # The previous regex-based parser, for reference timings
+        s = s.strip()
+        m = re.match(r'^(\d+):(\d{1,2})(?::(\d{1,2}))?$', s)
+        if m:
+            return int(m.group(1)) * 3600 + int(m.group(2)) * 60 + int(m.group(3) or 0)
+        s = ' '.join(s.lower().replace(',', ' ').replace(' and ', ' ').split())
+        matches = re.findall(r'(\d+(?:\.\d+)?)\s*([a-z]+)', s)
+        if not matches:
+            raise ValueError(s)
+        return int(sum(float(v) * unit_map[u] for v, u in matches))
+
+    # Config and request-validation style traffic: a few hot strings, a long tail
+    hot = ["30m", "1h", "2h30m", "15m", "1d", "90 minutes", "2 hours and 30 minutes", "1:30:00"]
+    rng = random.Random(0)
+    for size in sizes:
+        strings = [rng.choice(hot) if rng.random() < 0.95 else f"{rng.randint(1, 10**6)}s"
+                   for _ in range(size)]
+
+        def parse_all(fn):
+            for text in strings:
+                try:
+                    fn(text)
+                except ValueError:
+                    pass
+
+        before = _best_of(lambda: parse_all(regex_parse))
+        scanner = _best_of(lambda: parse_all(whenwords._parse_duration_uncached))
+
+        def cached():
+            whenwords.parse_duration_cache_clear()
+            parse_all(whenwords.parse_duration)
+
+        _report("parse_duration scan", size, before / size, scanner)
+        _report("parse_duration cache", size, before / size, _best_of(cached))
+        print(f"{'':<20} {whenwords.parse_duration_cache_info()}")
+
+
+def _import_time_us():
+    """Cumulative microseconds for `import whenwords` in a fresh interpreter."""
+    import os
+    import subprocess
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import whenwords'],
+                          cwd=here, capture_output=True, text=True, check=True)
+    nested = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.strip() == 'whenwords':
+            return int(cumulative), nested
+        # Children are printed before their parent; a top-level line ends a group
+        if name.startswith('  '):
+            nested.append(name.strip())
+        else:
+            nested = []
+    raise RuntimeError("whenwords not found in -X importtime output")
+
+
+def bench_import_time(_sizes):
+    """Median `import whenwords` time; fails past IMPORT_TIME_BUDGET_US."""
+    import py_compile
+    import statistics
+
+    # Time the cached-bytecode import, not compilation
+    py_compile.compile(whenwords.__file__)
+
+    samples = [_import_time_us() for _ in range(IMPORT_TIME_RUNS)]
+    median = statistics.median(us for us, _ in samples)
+    within = median <= IMPORT_TIME_BUDGET_US
+    print(f"{'import_time':<20} runs={IMPORT_TIME_RUNS:>4}  median {median:,.0f} us  "
+          f"budget {IMPORT_TIME_BUDGET_US:,} us  {'OK' if within else 'OVER BUDGET'}")
+    print(f"{'':<20} imported with it: {', '.join(samples[0][1]) or 'nothing'}")
+    return within
+
+
+BENCHMARKS = {
+    'timeago_many': (bench_timeago_many, [10**4, 10**5, 10**6, 10**7]),
+    'human_date_many': (bench_human_date_many, [10**4, 10**5, 10**6, 10**7]),
+    'timeago_index': (bench_timeago_index, [10**4, 10**5, 10**6]),
+    'iso_parse': (bench_iso_parse, [10**4, 10**5, 10**6]),
+    'parse_duration': (bench_parse_duration, [10**4, 10**5, 10**6]),
+    'import_time': (bench_import_time, None),  # fixed run count, ignores --sizes
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark whenwords')
+    parser.add_argument('names', nargs='*',
+                        help=f"Benchmarks to run (default: all): {', '.join(BENCHMARKS)}")
+    parser.add_argument('--sizes', nargs='+', type=int,
+                        help='Override the input sizes')
+    args = parser.parse_args()
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+
+    status = 0
+    for name in args.names or BENCHMARKS:
+        fn, default_sizes = BENCHMARKS[name]
+        sizes = default_sizes and (args.sizes or default_sizes)
+        if fn(sizes) is False:
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,6 +4,15 @@ Tests for whenwords library - generated from tests.yaml
 
 import pytest
 from whenwords import timeago, duration, parse_duration, human_date, date_range
+from whenwords import timeago_many, human_date_many
+import whenwords
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+requires_numpy = pytest.mark.skipif(np is None, reason="numpy not installed")
 
 
 # ============================================================================
@@ -488,6 +497,36 @@ def test_parse_duration_error_just_number():
         parse_duration("42")
 
 
+@pytest.mark.parametrize("text, expected", [
+    ("2 and 30 minutes", 1800),
+    ("1.5.3h", 19080),
+    ("2h, and 30m", 9000),
+    ("10:5:7", 36307),
+])
+def test_parse_duration_scanner_edge_cases(text, expected):
+    assert parse_duration(text) == expected
+
+
+def test_parse_duration_caches_results_and_errors():
+    whenwords.parse_duration_cache_clear()
+    for _ in range(3):
+        assert parse_duration("2h30m") == 9000
+        with pytest.raises(ValueError, match="Unknown unit: parsecs"):
+            parse_duration("5 parsecs")
+    info = whenwords.parse_duration_cache_info()
+    assert info.misses == 2
+    assert info.hits == 4
+
+
+def test_parse_duration_cache_resize():
+    try:
+        whenwords.set_parse_duration_cache_size(0)
+        assert parse_duration("90m") == 5400
+        assert whenwords.parse_duration_cache_info().currsize == 0
+    finally:
+        whenwords.set_parse_duration_cache_size(1024)
+
+
 # ============================================================================
 # human_date tests
 # ============================================================================
@@ -639,3 +678,207 @@ def test_date_range_swapped_inputs_should_auto_correct():
 def test_date_range_multi_year_span():
     result = date_range(1672531200, 1735689600)
     assert result == "January 1, 2023 – January 1, 2025"
+
+
+def test_timeago_index_matches_cascade():
+    assert whenwords._verify_timeago_index(-100_000, 100_000) == []
+
+
+def test_timeago_beyond_index_horizon():
+    result = timeago(0, reference=2000 * 365 * 86400)
+    assert result == "2000 years ago"
+
+
+# ============================================================================
+# ISO 8601 parsing tests
+# ============================================================================
+
+@pytest.mark.parametrize("text", [
+    "2024-01-01T00:00:00Z",
+    "2024-02-29T12:34:56.789Z",
+    "2023-12-31 23:59:59+05:30",
+    "1969-07-20T20:17:40.123456-04:00",
+    "2024-01-01T00:00:00",
+    "2024-01-01",
+])
+def test_iso_parsing_matches_fromisoformat(text):
+    from datetime import datetime
+    expected = datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp()
+    assert whenwords._normalize_timestamp(text) == expected
+    assert whenwords._normalize_timestamp(text) == expected
+
+
+@pytest.mark.parametrize("text", ["2023-02-29T00:00:00Z", "2024-13-01T00:00:00Z", "yesterday"])
+def test_iso_invalid_raises(text):
+    with pytest.raises(ValueError):
+        timeago(text, reference=1704067200)
+
+
+def test_iso_naive_strings_are_not_cached():
+    whenwords.iso_cache_clear()
+    whenwords._normalize_timestamp("2024-01-01T00:00:00")
+    assert whenwords._parse_iso_cached("2024-01-01T00:00:00") is None
+
+
+def test_iso_cache_counts_repeats():
+    whenwords.iso_cache_clear()
+    for _ in range(3):
+        timeago("2024-01-01T00:00:00Z", reference="2024-01-01T01:00:00Z")
+    info = whenwords.iso_cache_info()
+    assert info.misses == 2
+    assert info.hits == 4
+
+
+# ============================================================================
+# timeago_many tests
+# ============================================================================
+
+@requires_numpy
+def test_timeago_many_matches_scalar_around_thresholds():
+    reference = 1704067200
+    edges = [45, 90, 2700, 5400, 79200, 129600, 2246400, 3974400, 27648000, 47347200]
+    diffs = [d + delta for d in [0] + edges for delta in (-1, -0.5, 0, 0.5, 1)]
+    diffs += [-d for d in diffs]
+    timestamps = np.array([reference - d for d in diffs])
+    result = timeago_many(timestamps, reference)
+    assert result.tolist() == [timeago(float(t), reference) for t in timestamps]
+
+
+@requires_numpy
+def test_timeago_many_matches_scalar_random():
+    rng = np.random.default_rng(42)
+    reference = rng.integers(1_600_000_000, 1_800_000_000, 5000)
+    timestamps = reference - rng.integers(-10 * 365 * 86400, 10 * 365 * 86400, 5000)
+    result = timeago_many(timestamps, reference)
+    assert result.tolist() == [timeago(int(t), int(r)) for t, r in zip(timestamps, reference)]
+
+
+@requires_numpy
+def test_timeago_many_datetime64_input():
+    timestamps = np.array(["2024-01-01T00:00:00", "2023-12-31T00:00:00"], dtype="datetime64[s]")
+    result = timeago_many(timestamps, np.datetime64("2024-01-01T01:00:00"))
+    assert result.tolist() == ["1 hour ago", "1 day ago"]
+
+
+@requires_numpy
+def test_timeago_many_iso_string_reference():
+    result = timeago_many([1704067200, 1704074400], "2024-01-01T01:00:00Z")
+    assert result.tolist() == ["1 hour ago", "in 1 hour"]
+
+
+@requires_numpy
+def test_timeago_many_nan_raises():
+    with pytest.raises(ValueError):
+        timeago_many(np.array([np.nan]), 1704067200)
+
+
+@requires_numpy
+def test_timeago_many_scalar_input_gives_0d_array():
+    for result, expected in [(timeago_many(1704067110, 1704067200), "2 minutes ago"),
+                             (timeago_many(0, 10**10), timeago(0, 10**10))]:
+        assert isinstance(result, np.ndarray) and result.shape == ()
+        assert result.item() == expected
+
+
+# ============================================================================
+# human_date_many tests
+# ============================================================================
+
+@requires_numpy
+def test_human_date_many_matches_scalar_random():
+    rng = np.random.default_rng(7)
+    reference = rng.integers(-2_000_000_000, 4_000_000_000, 5000)
+    timestamps = reference + rng.integers(-400 * 86400, 400 * 86400, 5000)
+    result = human_date_many(timestamps, reference)
+    assert result.tolist() == [human_date(int(t), int(r)) for t, r in zip(timestamps, reference)]
+
+
+@requires_numpy
+def test_human_date_many_rounds_like_fromtimestamp_near_midnight():
+    timestamps = np.array([86400 - 4e-7, 86400 - 6e-7, -4e-7, -6e-7, -86400.0])
+    result = human_date_many(timestamps, 0)
+    assert result.tolist() == [human_date(float(t), 0) for t in timestamps]
+
+
+@requires_numpy
+def test_human_date_many_labels():
+    result = human_date_many([1705190400, 1705104000, 1705536000, 1709251200, 1600000000], 1705276800)
+    assert result.tolist() == ["Yesterday", "Last Saturday", "This Thursday", "March 1", "September 13, 2020"]
+
+
+@requires_numpy
+def test_human_date_many_scalar_input_gives_0d_array():
+    result = human_date_many(1705190400, 1705276800)
+    assert isinstance(result, np.ndarray) and result.shape == ()
+    assert result.item() == "Yesterday"
+
+
+# ============================================================================
+# command-line tests
+# ============================================================================
+
+def _run_cli(tmp_path, name, content, *args):
+    import whenwords_cli
+    src = tmp_path / name
+    src.write_text(content, encoding="utf-8")
+    dst = tmp_path / ("out_" + name)
+    assert whenwords_cli.main([str(src), "-o", str(dst), "--reference", "1704067200", *args]) == 0
+    return dst.read_text(encoding="utf-8")
+
+
+def test_cli_ndjson_adds_columns(tmp_path):
+    import json
+    content = '{"ts": 1704067110, "d": 3661}\n{"ts": "2024-01-01T01:00:00Z", "d": "oops"}\n'
+    out = _run_cli(tmp_path, "events.ndjson", content, "--timeago", "ts", "--duration", "d")
+    records = [json.loads(line) for line in out.splitlines()]
+    assert records[0]["ts_timeago"] == "2 minutes ago"
+    assert records[0]["d_duration"] == "1 hour, 1 minute"
+    assert records[1]["ts_timeago"] == "in 1 hour"
+    assert records[1]["d_duration"] is None
+
+
+def test_cli_ndjson_passes_bad_lines_through(tmp_path, capsys):
+    import json
+    content = '{"ts": 1704067110}\n{"ts": oops\n\n["ts"]\n{"ts": 1704067200}'
+    out = _run_cli(tmp_path, "events.ndjson", content, "--timeago", "ts", "--chunk-size", "2")
+    lines = out.splitlines()
+    assert json.loads(lines[0])["ts_timeago"] == "2 minutes ago"
+    assert lines[1:3] == ['{"ts": oops', '["ts"]']
+    assert json.loads(lines[3])["ts_timeago"] == "just now"
+    err = capsys.readouterr().err
+    assert "line 2: invalid JSON" in err and "line 4: not a JSON object" in err
+
+
+def test_cli_csv_adds_columns(tmp_path):
+    content = "id,ts\n1,1705190400\n2,\n"
+    out = _run_cli(tmp_path, "events.csv", content, "--human-date", "ts")
+    assert out.splitlines() == ["id,ts,ts_human_date", "1,1705190400,January 14", "2,,"]
+
+
+def test_cli_workers_keep_order(tmp_path):
+    content = "".join(f'{{"i": {i}, "ts": {1704067200 - i * 60}}}\n' for i in range(50))
+    serial = _run_cli(tmp_path, "a.ndjson", content, "--timeago", "ts", "--chunk-size", "7")
+    parallel = _run_cli(tmp_path, "a.ndjson", content, "--timeago", "ts", "--chunk-size", "7",
+                        "--workers", "2")
+    assert parallel == serial
+
+
+# ============================================================================
+# import-time tests
+# ============================================================================
+
+def test_import_loads_no_heavy_modules():
+    import os
+    import subprocess
+    import sys
+    code = ("import sys, whenwords; "
+            "print(' '.join(m for m in ('re', 'typing', 'datetime', 'functools', 'bisect', 'numpy') "
+            "if m in sys.modules))")
+    here = os.path.dirname(os.path.abspath(__file__))
+    out = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_timestamp_alias_is_built_on_demand():
+    from datetime import datetime
+    assert datetime in whenwords.Timestamp.__args__
@@ -2,34 +2,102 @@
 whenwords - Human-friendly time formatting and parsing.
 
 All functions are pure with no side effects. Timestamps are Unix seconds.
+
+Importing this module only runs builtin code: datetime, functools, bisect
+and typing are imported by the first function that needs them, and lookup
+tables are built on first use (see bench_whenwords.py import_time).
 """
 
-import re
-from datetime import datetime, timezone
-from typing import Union, Optional
+from __future__ import annotations
+
+_ISO_CACHE_SIZE = 4096
+_PARSE_DURATION_CACHE_SIZE = 1024
+
+_INF = float('inf')
+
+_WEEKDAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+_MONTH_NAMES = ("January", "February", "March", "April", "May", "June",
+                "July", "August", "September", "October", "November", "December")
+
+# datetime.datetime and datetime.timezone, bound by _load_datetime()
+_datetime = None
+_timezone = None
+
+
+def _load_datetime():
+    """Import datetime on first use; returns (datetime, timezone)."""
+    global _datetime, _timezone
+    if _datetime is None:
+        from datetime import datetime, timezone
+        _datetime, _timezone = datetime, timezone
+    return _datetime, _timezone
+
+
+def __getattr__(name):
+    # Timestamp needs typing and datetime, so it is only built when asked for
+    if name == "Timestamp":
+        from typing import Union
+        datetime, _ = _load_datetime()
+        globals()["Timestamp"] = Union[int, float, str, datetime]
+        return globals()["Timestamp"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _parse_iso(ts: str) -> float | None:
+    """
+    Parse an ISO 8601 string to Unix seconds.
+
+    Returns None when the string has no UTC offset: fromisoformat reads
+    those as local time, which can change under the cache.
+    """
+    datetime, _ = _load_datetime()
+    dt = datetime.fromisoformat(ts.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        return None
+    return dt.timestamp()
+
+
+def _install_iso_cache():
+    """Replace _parse_iso_cached with the lru_cache-wrapped parser."""
+    global _parse_iso_cached
+    from functools import lru_cache
+    _parse_iso_cached = lru_cache(maxsize=_ISO_CACHE_SIZE)(_parse_iso)
+    return _parse_iso_cached
+
+
+def _parse_iso_cached(ts: str) -> float | None:
+    """_parse_iso memoized on the raw string; installs the cache on first call."""
+    return _install_iso_cache()(ts)
+
+
+def iso_cache_info():
+    """Hit/miss statistics for the ISO 8601 parse cache (a functools CacheInfo)."""
+    if not hasattr(_parse_iso_cached, 'cache_info'):
+        _install_iso_cache()
+    return _parse_iso_cached.cache_info()
 
-# Type alias for timestamp inputs
-Timestamp = Union[int, float, str, datetime]
+
+def iso_cache_clear() -> None:
+    """Empty the ISO 8601 parse cache and reset its statistics."""
+    if hasattr(_parse_iso_cached, 'cache_clear'):
+        _parse_iso_cached.cache_clear()
 
 
 def _normalize_timestamp(ts: Timestamp) -> float:
     """Convert various timestamp formats to Unix seconds."""
-    if isinstance(ts, datetime):
-        return ts.timestamp()
+    if isinstance(ts, (int, float)):
+        return float(ts)
     elif isinstance(ts, str):
         # Parse ISO 8601 string
         try:
-            # Handle various ISO 8601 formats
-            ts_str = ts.replace('Z', '+00:00')
-            if '.' in ts_str:
-                dt = datetime.fromisoformat(ts_str)
-            else:
-                dt = datetime.fromisoformat(ts_str)
-            return dt.timestamp()
+            seconds = _parse_iso_cached(ts)
+            if seconds is None:
+                seconds = _load_datetime()[0].fromisoformat(ts).timestamp()
+            return seconds
         except ValueError as e:
             raise ValueError(f"Invalid timestamp format: {ts}") from e
-    elif isinstance(ts, (int, float)):
-        return float(ts)
+    elif isinstance(ts, _load_datetime()[0]):
+        return ts.timestamp()
     else:
         raise ValueError(f"Invalid timestamp type: {type(ts)}")
 
@@ -42,21 +110,79 @@ def _round_half_up(n: float) -> int:
         return int(n - 0.5)
 
 
-def timeago(timestamp: Timestamp, reference: Optional[Timestamp] = None) -> str:
+# Label segments for timeago: (start, end, unit, divisor). Within a segment
+# the count is 1 when divisor is None, else _round_half_up(diff / divisor).
+_MINUTE = 60
+_HOUR = 60 * _MINUTE
+_DAY = 24 * _HOUR
+_TIMEAGO_SEGMENTS = [
+    (45, 90, "minute", None),
+    (90, 45 * _MINUTE, "minute", _MINUTE),
+    (45 * _MINUTE, 90 * _MINUTE, "hour", None),
+    (90 * _MINUTE, 22 * _HOUR, "hour", _HOUR),
+    (22 * _HOUR, 36 * _HOUR, "day", None),
+    (36 * _HOUR, 26 * _DAY, "day", _DAY),
+    (26 * _DAY, 46 * _DAY, "month", None),
+    (46 * _DAY, 320 * _DAY, "month", 30.4375 * _DAY),
+    (320 * _DAY, 548 * _DAY, "year", None),
+    (548 * _DAY, None, "year", 365 * _DAY),
+]
+
+# Differences at or beyond this many seconds skip the index and use the cascade
+_TIMEAGO_INDEX_HORIZON = 1000 * 365 * _DAY
+
+# (breakpoints, past labels, future labels) and bisect.bisect_right,
+# bound on first use by _timeago_index_tables()
+_timeago_index = None
+_bisect_right = None
+
+
+def _build_timeago_index(horizon: float = _TIMEAGO_INDEX_HORIZON):
     """
-    Returns a human-readable relative time string.
+    Precompute the step function diff -> label for timeago.
 
-    Args:
-        timestamp: The time to describe
-        reference: The reference time (defaults to timestamp if omitted)
-
-    Returns:
-        A string like "3 hours ago" or "in 5 minutes"
+    Returns (breaks, past, future): for 0 <= diff < horizon, the label is
+    past[i] (or future[i]) with i = bisect_right(breaks, diff). The last
+    breakpoint is the horizon itself, where the index stops.
     """
-    ts = _normalize_timestamp(timestamp)
-    ref = _normalize_timestamp(reference) if reference is not None else ts
-
-    diff = ref - ts  # positive means past, negative means future
+    from math import nextafter
+
+    def first_diff_rounding_to(k, divisor):
+        # Smallest float d with _round_half_up(d / divisor) >= k
+        d = (k - 0.5) * divisor
+        while _round_half_up(d / divisor) >= k:
+            d = nextafter(d, 0.0)
+        while _round_half_up(d / divisor) < k:
+            d = nextafter(d, _INF)
+        return d
+
+    breaks = []
+    counts = [None]  # None marks "just now" below the first breakpoint
+
+    for seg_start, seg_end, unit, divisor in _TIMEAGO_SEGMENTS:
+        seg_end = horizon if seg_end is None else min(seg_end, horizon)
+        if seg_start >= seg_end:
+            break
+        n = 1 if divisor is None else _round_half_up(seg_start / divisor)
+        breaks.append(seg_start)
+        counts.append((n, unit))
+        if divisor is not None:
+            while True:
+                point = first_diff_rounding_to(n + 1, divisor)
+                if point >= seg_end:
+                    break
+                n += 1
+                breaks.append(point)
+                counts.append((n, unit))
+    breaks.append(horizon)
+
+    past = [_format_relative(*c, False) if c else "just now" for c in counts]
+    future = [_format_relative(*c, True) if c else "just now" for c in counts]
+    return breaks, past, future
+
+
+def _timeago_cascade(diff: float) -> str:
+    """Reference implementation of timeago for diff = reference - timestamp."""
     is_future = diff < 0
     diff = abs(diff)
 
@@ -102,6 +228,73 @@ def timeago(timestamp: Timestamp, reference: Optional[Timestamp] = None) -> str:
         n = _round_half_up(diff / YEAR)
         unit = "year"
 
+    return _format_relative(n, unit, is_future)
+
+
+def _timeago_index_tables():
+    """Return the breakpoint index, building it on first use."""
+    global _timeago_index, _bisect_right
+    if _timeago_index is None:
+        from bisect import bisect_right
+        _bisect_right = bisect_right
+        _timeago_index = _build_timeago_index()
+    return _timeago_index
+
+
+def _verify_timeago_index(start: int, stop: int) -> list:
+    """
+    Check the breakpoint index against the cascade.
+
+    Compares every integer diff in [start, stop) plus the floats on both
+    sides of every breakpoint. Returns a list of (diff, indexed, expected)
+    mismatches, empty when the index is equivalent.
+    """
+    from math import nextafter
+
+    breaks, _, _ = _timeago_index_tables()
+    candidates = list(range(start, stop))
+    for point in breaks[:-1]:
+        below = nextafter(point, 0.0)
+        candidates.extend([point, below, -point, -below])
+
+    mismatches = []
+    for diff in candidates:
+        indexed = _timeago_lookup(float(diff))
+        expected = _timeago_cascade(float(diff))
+        if indexed != expected:
+            mismatches.append((diff, indexed, expected))
+    return mismatches
+
+
+def _timeago_lookup(diff: float) -> str:
+    """timeago label for diff = reference - timestamp, via the breakpoint index."""
+    breaks, past, future = _timeago_index_tables()
+    i = _bisect_right(breaks, abs(diff))
+    if i == len(breaks):
+        # Beyond the horizon (or NaN): fall back to the cascade
+        return _timeago_cascade(diff)
+    return future[i] if diff < 0 else past[i]
+
+
+def timeago(timestamp: Timestamp, reference: Timestamp | None = None) -> str:
+    """
+    Returns a human-readable relative time string.
+
+    Args:
+        timestamp: The time to describe
+        reference: The reference time (defaults to timestamp if omitted)
+
+    Returns:
+        A string like "3 hours ago" or "in 5 minutes"
+    """
+    ts = _normalize_timestamp(timestamp)
+    ref = _normalize_timestamp(reference) if reference is not None else ts
+
+    return _timeago_lookup(ref - ts)  # positive means past, negative means future
+
+
+def _format_relative(n: int, unit: str, is_future: bool) -> str:
+    """Build the final timeago label from a count and singular unit name."""
     # Pluralize
     if n != 1:
         unit += "s"
@@ -112,7 +305,173 @@ def timeago(timestamp: Timestamp, reference: Optional[Timestamp] = None) -> str:
         return f"{n} {unit} ago"
 
 
-def duration(seconds: Union[int, float], options: Optional[dict] = None) -> str:
+def _require_numpy():
+    """Import numpy on demand; the batch APIs are the only users."""
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("numpy required for batch functions. Install with: pip install numpy") from e
+    return numpy
+
+
+def _as_seconds_array(np, values):
+    """Convert an array-like (or scalar) of timestamps to float64 Unix seconds."""
+    arr = np.asarray(values)
+    if arr.dtype.kind == 'M':
+        return (arr - np.datetime64(0, 's')) / np.timedelta64(1, 's')
+    if arr.dtype.kind in 'iufb':
+        return arr.astype(np.float64)
+    # Strings, datetime objects and mixed input go through the scalar normalizer
+    flat = np.fromiter((_normalize_timestamp(v) for v in arr.ravel()), dtype=np.float64, count=arr.size)
+    return flat.reshape(arr.shape)
+
+
+def timeago_many(timestamps, reference=None):
+    """
+    Vectorized timeago over an array of timestamps.
+
+    Args:
+        timestamps: Array-like of Unix seconds (int/float), datetime64 values,
+            or anything the scalar timeago accepts
+        reference: A scalar or an array broadcastable against timestamps
+            (defaults to the timestamps themselves)
+
+    Returns:
+        A numpy object array of strings, element-wise identical to timeago()
+
+    Raises:
+        ValueError: If any difference is NaN or infinite
+        ImportError: If numpy is not installed
+    """
+    np = _require_numpy()
+
+    ts = _as_seconds_array(np, timestamps)
+    ref = _as_seconds_array(np, reference) if reference is not None else ts
+
+    diff = ref - ts  # positive means past, negative means future
+    if not np.isfinite(diff).all():
+        raise ValueError("Invalid timestamp value: NaN or infinite")
+
+    # Same breakpoint index as the scalar function, searched in bulk
+    breaks, past, future = _timeago_index_tables()
+    labels = np.array(past + future, dtype=object)
+    i = np.asarray(np.searchsorted(np.asarray(breaks, dtype=np.float64), np.abs(diff), side='right'))
+    beyond = i == len(breaks)
+    i[beyond] = 0
+    # Index flat and reshape, so a scalar input still gives a 0-d array like human_date_many
+    result = labels[(i + (diff < 0) * len(past)).ravel()].reshape(diff.shape)
+
+    if beyond.any():
+        result[beyond] = [_timeago_cascade(d) for d in diff[beyond].tolist()]
+    return result
+
+
+def _epoch_days(np, seconds):
+    """
+    Floor Unix seconds to whole days since 1970-01-01.
+
+    Rounds to microseconds first, half-even like datetime.fromtimestamp,
+    so values a fraction of a microsecond before midnight agree with it.
+    """
+    whole = np.trunc(seconds)
+    micros = np.round((seconds - whole) * 1e6)
+    whole = whole + (micros >= 1e6) - (micros < 0)
+    return np.floor_divide(whole, 86400).astype(np.int64)
+
+
+def _civil_from_days(np, days):
+    """Vectorized (year, month, day) for days since 1970-01-01, proleptic Gregorian."""
+    z = days + 719468
+    era = np.floor_divide(z, 146097)
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    day = doy - (153 * mp + 2) // 5 + 1
+    month = np.where(mp < 10, mp + 3, mp - 9)
+    year = yoe + era * 400 + (month <= 2)
+    return year, month, day
+
+
+def human_date_many(timestamps, reference=None):
+    """
+    Vectorized human_date over an array of timestamps.
+
+    Works on epoch days only, so no per-element datetime objects are created.
+
+    Args:
+        timestamps: Array-like of Unix seconds (int/float), datetime64 values,
+            or anything the scalar human_date accepts
+        reference: A scalar or an array broadcastable against timestamps
+            (defaults to the timestamps themselves)
+
+    Returns:
+        A numpy object array of strings, element-wise identical to human_date()
+
+    Raises:
+        ValueError: If any timestamp is NaN, infinite, or outside years 1-9999
+        ImportError: If numpy is not installed
+    """
+    np = _require_numpy()
+
+    ts = _as_seconds_array(np, timestamps)
+    ref = _as_seconds_array(np, reference) if reference is not None else ts
+    ts, ref = np.broadcast_arrays(ts, ref)
+    if not (np.isfinite(ts).all() and np.isfinite(ref).all()):
+        raise ValueError("Invalid timestamp value: NaN or infinite")
+
+    ts_days = _epoch_days(np, ts)
+    ref_days = _epoch_days(np, ref)
+    # 0001-01-01 and 9999-12-31 as epoch days
+    if (np.minimum(ts_days, ref_days) < -719162).any() or (np.maximum(ts_days, ref_days) > 2932896).any():
+        raise ValueError("Timestamp out of range for a calendar date")
+
+    day_diff = ts_days - ref_days
+    weekday = (ts_days + 3) % 7  # 1970-01-01 was a Thursday
+    year, month, day = _civil_from_days(np, ts_days)
+    ref_year, _, _ = _civil_from_days(np, ref_days)
+
+    # Encode every element as a small label key; each distinct key is formatted once.
+    # 0-2: Today/Yesterday/Tomorrow, 3-9: Last <weekday>, 10-16: This <weekday>,
+    # 100+: month/day with the year (0 when it matches the reference year)
+    shown_year = np.where(year == ref_year, 0, year)
+    key = 100 + (shown_year * 13 + month) * 32 + day
+    key = np.where((day_diff > 1) & (day_diff < 7), 10 + weekday, key)
+    key = np.where((day_diff > -7) & (day_diff < -1), 3 + weekday, key)
+    key = np.where(day_diff == 1, 2, key)
+    key = np.where(day_diff == -1, 1, key)
+    key = np.where(day_diff == 0, 0, key)
+    unique_keys, inverse = np.unique(key.ravel(), return_inverse=True)
+
+    fixed = ["Today", "Yesterday", "Tomorrow"]
+    labels = np.empty(len(unique_keys), dtype=object)
+    for i, k in enumerate(unique_keys.tolist()):
+        if k < 3:
+            labels[i] = fixed[k]
+        elif k < 10:
+            labels[i] = f"Last {_WEEKDAY_NAMES[k - 3]}"
+        elif k < 17:
+            labels[i] = f"This {_WEEKDAY_NAMES[k - 10]}"
+        else:
+            rest, d = divmod(k - 100, 32)
+            y, m = divmod(rest, 13)
+            labels[i] = f"{_MONTH_NAMES[m - 1]} {d}" if y == 0 else f"{_MONTH_NAMES[m - 1]} {d}, {y}"
+
+    return labels[inverse.ravel()].reshape(key.shape)
+
+
+# (seconds, name, abbreviation) for duration, largest first
+_DURATION_UNIT_TABLE = (
+    (365 * _DAY, "year", "y"),
+    (30 * _DAY, "month", "mo"),
+    (_DAY, "day", "d"),
+    (_HOUR, "hour", "h"),
+    (_MINUTE, "minute", "m"),
+    (1, "second", "s"),
+)
+
+
+def duration(seconds: int | float, options: dict | None = None) -> str:
     """
     Formats a duration (not relative to now).
 
@@ -128,9 +487,7 @@ def duration(seconds: Union[int, float], options: Optional[dict] = None) -> str:
     Raises:
         ValueError: If seconds is negative, NaN, or infinite
     """
-    import math
-
-    if math.isnan(seconds) or math.isinf(seconds):
+    if seconds != seconds or seconds == _INF or seconds == -_INF:
         raise ValueError("Invalid seconds value: NaN or infinite")
     if seconds < 0:
         raise ValueError("Duration cannot be negative")
@@ -139,29 +496,13 @@ def duration(seconds: Union[int, float], options: Optional[dict] = None) -> str:
     compact = opts.get('compact', False)
     max_units = opts.get('max_units', 2)
 
-    # Define units in seconds
-    MINUTE = 60
-    HOUR = 60 * MINUTE
-    DAY = 24 * HOUR
-    MONTH = 30 * DAY
-    YEAR = 365 * DAY
-
-    units = [
-        (YEAR, "year", "y"),
-        (MONTH, "month", "mo"),
-        (DAY, "day", "d"),
-        (HOUR, "hour", "h"),
-        (MINUTE, "minute", "m"),
-        (1, "second", "s"),
-    ]
-
     if seconds == 0:
         return "0s" if compact else "0 seconds"
 
     remaining = seconds
     parts = []
 
-    for unit_seconds, unit_name, unit_abbrev in units:
+    for unit_seconds, unit_name, unit_abbrev in _DURATION_UNIT_TABLE:
         if remaining >= unit_seconds:
             count = int(remaining // unit_seconds)
             remaining = remaining % unit_seconds
@@ -183,19 +524,68 @@ def duration(seconds: Union[int, float], options: Optional[dict] = None) -> str:
         return ", ".join(result_parts)
 
 
-def parse_duration(s: str) -> int:
-    """
-    Parses a human-written duration string into seconds.
+# Unit multipliers for parse_duration
+_DURATION_UNITS = {
+    's': 1, 'sec': 1, 'secs': 1, 'second': 1, 'seconds': 1,
+    'm': 60, 'min': 60, 'mins': 60, 'minute': 60, 'minutes': 60,
+    'h': 3600, 'hr': 3600, 'hrs': 3600, 'hour': 3600, 'hours': 3600,
+    'd': 86400, 'day': 86400, 'days': 86400,
+    'w': 604800, 'wk': 604800, 'wks': 604800, 'week': 604800, 'weeks': 604800,
+}
 
-    Args:
-        s: Duration string like "2h30m", "2 hours and 30 minutes", "2:30"
+_ASCII_LOWER = frozenset('abcdefghijklmnopqrstuvwxyz')
 
-    Returns:
-        Number of seconds
 
-    Raises:
-        ValueError: If the string is empty, unparseable, or results in negative
+def _parse_colon(s: str) -> int | None:
+    """h:mm or h:mm:ss to seconds, or None if s is not in colon notation."""
+    parts = s.split(':')
+    if not 2 <= len(parts) <= 3:
+        return None
+    if not (parts[0].isdecimal() and all(p.isdecimal() and len(p) <= 2 for p in parts[1:])):
+        return None
+    hours, minutes = int(parts[0]), int(parts[1])
+    seconds = int(parts[2]) if len(parts) == 3 else 0
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def _scan_duration_pairs(s: str) -> list:
+    """
+    Find every (number, unit) pair in a normalized duration string.
+
+    One pass, returning the same pairs as the former regex
+    (digits, optional ".digits", optional space, [a-z]+) found with
+    re.findall, for strings whose whitespace is collapsed to single spaces.
     """
+    pairs = []
+    n = len(s)
+    i = 0
+    while i < n:
+        if not s[i].isdecimal():
+            i += 1
+            continue
+        j = i + 1
+        while j < n and s[j].isdecimal():
+            j += 1
+        num_end = j
+        if j + 1 < n and s[j] == '.' and s[j + 1].isdecimal():
+            num_end = j + 2
+            while num_end < n and s[num_end].isdecimal():
+                num_end += 1
+        unit_start = num_end + 1 if num_end < n and s[num_end] == ' ' else num_end
+        unit_end = unit_start
+        while unit_end < n and s[unit_end] in _ASCII_LOWER:
+            unit_end += 1
+        if unit_end == unit_start:
+            # No unit after this number; later digits in the run fail the same way
+            i = j
+            continue
+        pairs.append((s[i:num_end], s[unit_start:unit_end]))
+        i = unit_end
+    return pairs
+
+
+def _parse_duration_uncached(s: str) -> int:
+    """parse_duration without the result cache."""
     if not s or not s.strip():
         raise ValueError("Empty duration string")
 
@@ -206,51 +596,93 @@ def parse_duration(s: str) -> int:
     if s.startswith('-'):
         raise ValueError("Negative durations are not allowed")
 
-    # Define unit multipliers
-    unit_map = {
-        's': 1, 'sec': 1, 'secs': 1, 'second': 1, 'seconds': 1,
-        'm': 60, 'min': 60, 'mins': 60, 'minute': 60, 'minutes': 60,
-        'h': 3600, 'hr': 3600, 'hrs': 3600, 'hour': 3600, 'hours': 3600,
-        'd': 86400, 'day': 86400, 'days': 86400,
-        'w': 604800, 'wk': 604800, 'wks': 604800, 'week': 604800, 'weeks': 604800,
-    }
-
     # Try colon notation first (h:mm or h:mm:ss)
-    colon_match = re.match(r'^(\d+):(\d{1,2})(?::(\d{1,2}))?$', s)
-    if colon_match:
-        hours = int(colon_match.group(1))
-        minutes = int(colon_match.group(2))
-        seconds = int(colon_match.group(3)) if colon_match.group(3) else 0
-        return hours * 3600 + minutes * 60 + seconds
+    seconds = _parse_colon(s)
+    if seconds is not None:
+        return seconds
 
     # Normalize: lowercase, remove "and", extra spaces
     s = s.lower()
     s = s.replace(',', ' ').replace(' and ', ' ')
     s = ' '.join(s.split())  # normalize whitespace
 
-    # Pattern to match number followed by unit
-    pattern = r'(\d+(?:\.\d+)?)\s*([a-z]+)'
-    matches = re.findall(pattern, s)
-
+    matches = _scan_duration_pairs(s)
     if not matches:
         raise ValueError(f"Cannot parse duration: {original}")
 
     total_seconds = 0.0
     for value_str, unit in matches:
-        value = float(value_str)
-        if value < 0:
-            raise ValueError("Negative durations are not allowed")
-
-        unit = unit.lower()
-        if unit not in unit_map:
+        multiplier = _DURATION_UNITS.get(unit)
+        if multiplier is None:
             raise ValueError(f"Unknown unit: {unit}")
-
-        total_seconds += value * unit_map[unit]
+        total_seconds += float(value_str) * multiplier
 
     return int(total_seconds)
 
 
-def human_date(timestamp: Timestamp, reference: Optional[Timestamp] = None) -> str:
+def _parse_duration_outcome(s: str):
+    """(seconds, None) on success or (None, message) for invalid input."""
+    try:
+        return _parse_duration_uncached(s), None
+    except ValueError as e:
+        return None, str(e)
+
+
+def _parse_duration_cached(s: str):
+    """_parse_duration_outcome memoized on the raw string; installs the cache on first call."""
+    set_parse_duration_cache_size(_PARSE_DURATION_CACHE_SIZE)
+    return _parse_duration_cached(s)
+
+
+def set_parse_duration_cache_size(maxsize: int | None) -> None:
+    """
+    Resize the parse_duration result cache, dropping its contents.
+
+    Args:
+        maxsize: Maximum number of cached strings (0 disables caching,
+            None means unbounded)
+    """
+    global _parse_duration_cached
+    from functools import lru_cache
+    _parse_duration_cached = lru_cache(maxsize=maxsize)(_parse_duration_outcome)
+
+
+def parse_duration_cache_info():
+    """Hit/miss statistics for the parse_duration cache (a functools CacheInfo)."""
+    if not hasattr(_parse_duration_cached, 'cache_info'):
+        set_parse_duration_cache_size(_PARSE_DURATION_CACHE_SIZE)
+    return _parse_duration_cached.cache_info()
+
+
+def parse_duration_cache_clear() -> None:
+    """Empty the parse_duration cache and reset its statistics."""
+    if hasattr(_parse_duration_cached, 'cache_clear'):
+        _parse_duration_cached.cache_clear()
+
+
+def parse_duration(s: str) -> int:
+    """
+    Parses a human-written duration string into seconds.
+
+    Results, including errors for bad input, are memoized per string
+    (see set_parse_duration_cache_size).
+
+    Args:
+        s: Duration string like "2h30m", "2 hours and 30 minutes", "2:30"
+
+    Returns:
+        Number of seconds
+
+    Raises:
+        ValueError: If the string is empty, unparseable, or results in negative
+    """
+    seconds, error = _parse_duration_cached(s)
+    if error is not None:
+        raise ValueError(error)
+    return seconds
+
+
+def human_date(timestamp: Timestamp, reference: Timestamp | None = None) -> str:
     """
     Returns a contextual date string.
 
@@ -263,6 +695,7 @@ def human_date(timestamp: Timestamp, reference: Optional[Timestamp] = None) -> s
     """
     ts = _normalize_timestamp(timestamp)
     ref = _normalize_timestamp(reference) if reference is not None else ts
+    datetime, timezone = _load_datetime()
 
     # Convert to UTC dates
     ts_dt = datetime.fromtimestamp(ts, tz=timezone.utc)
@@ -275,10 +708,6 @@ def human_date(timestamp: Timestamp, reference: Optional[Timestamp] = None) -> s
     # Calculate day difference
     day_diff = (ts_date - ref_date).days
 
-    weekday_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    month_names = ["January", "February", "March", "April", "May", "June",
-                   "July", "August", "September", "October", "November", "December"]
-
     if day_diff == 0:
         return "Today"
     elif day_diff == -1:
@@ -288,14 +717,14 @@ def human_date(timestamp: Timestamp, reference: Optional[Timestamp] = None) -> s
     elif -7 < day_diff < 0:
         # Within past 7 days (but not yesterday)
         weekday = ts_dt.weekday()
-        return f"Last {weekday_names[weekday]}"
+        return f"Last {_WEEKDAY_NAMES[weekday]}"
     elif 0 < day_diff < 7:
         # Within next 7 days (but not tomorrow)
         weekday = ts_dt.weekday()
-        return f"This {weekday_names[weekday]}"
+        return f"This {_WEEKDAY_NAMES[weekday]}"
     else:
         # Format as date
-        month = month_names[ts_dt.month - 1]
+        month = _MONTH_NAMES[ts_dt.month - 1]
         day = ts_dt.day
         if ts_dt.year == ref_dt.year:
             return f"{month} {day}"
@@ -322,17 +751,15 @@ def date_range(start: Timestamp, end: Timestamp) -> str:
         start_ts, end_ts = end_ts, start_ts
 
     # Convert to UTC dates
+    datetime, timezone = _load_datetime()
     start_dt = datetime.fromtimestamp(start_ts, tz=timezone.utc)
     end_dt = datetime.fromtimestamp(end_ts, tz=timezone.utc)
 
     start_date = start_dt.date()
     end_date = end_dt.date()
 
-    month_names = ["January", "February", "March", "April", "May", "June",
-                   "July", "August", "September", "October", "November", "December"]
-
-    start_month = month_names[start_dt.month - 1]
-    end_month = month_names[end_dt.month - 1]
+    start_month = _MONTH_NAMES[start_dt.month - 1]
+    end_month = _MONTH_NAMES[end_dt.month - 1]
 
     # Same day
     if start_date == end_date:
@@ -348,3 +775,11 @@ def date_range(start: Timestamp, end: Timestamp) -> str:
 
     # Different years
     return f"{start_month} {start_dt.day}, {start_dt.year} \u2013 {end_month} {end_dt.day}, {end_dt.year}"
+
+
+if __name__ == "__main__":
+    # `python -m whenwords` streams NDJSON/CSV enrichment; see whenwords_cli.py
+    import sys
+    from whenwords_cli import main
+
+    sys.exit(main())
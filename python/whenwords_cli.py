@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Command-line enrichment of NDJSON and CSV records with whenwords columns.
+
+Reads records from a file or stdin in bounded chunks, adds one column per
+requested (function, field) pair and writes each chunk as soon as it is
+done, so memory stays constant regardless of input size.
+
+Usage:
+    python -m whenwords events.ndjson --timeago created_at --reference 1704067200
+    python -m whenwords export.csv --human-date day --duration elapsed -o out.csv
+    cat events.ndjson | python -m whenwords --timeago ts --workers 4 > out.ndjson
+
+For a field `ts`, `--timeago ts` adds `ts_timeago`, `--human-date ts` adds
+`ts_human_date` and `--duration ts` adds `ts_duration`. Values that cannot
+be formatted produce null (NDJSON) or an empty cell (CSV). An NDJSON line
+that is not a JSON object is passed through unchanged and reported on
+stderr with its line number.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import deque
+
+import whenwords
+
+
+def _coerce(value):
+    """Turn CSV/JSON cell values into something whenwords accepts."""
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            return float(text)
+        except ValueError:
+            return text
+    return value
+
+
+def _apply(function, value, reference):
+    """Run one whenwords function on a raw value; None if it cannot be formatted."""
+    if value is None or value == "":
+        return None
+    try:
+        value = _coerce(value)
+        if function == 'timeago':
+            return whenwords.timeago(value, reference)
+        if function == 'human_date':
+            return whenwords.human_date(value, reference)
+        return whenwords.duration(value)
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+def _enrich_chunk(job):
+    """
+    Enrich one chunk of records. Runs in worker processes, so takes and
+    returns only plain picklable data.
+
+    NDJSON chunks are lists of (line number, raw line) and come back as
+    output lines; CSV chunks are lists of rows and come back as extended
+    rows. Returns (output, skipped), skipped listing (line number, reason)
+    for each NDJSON line passed through as it was.
+    """
+    fmt, chunk, columns, reference = job
+    out = []
+    skipped = []
+    if fmt == 'ndjson':
+        for number, line in chunk:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                record = None
+                reason = f"invalid JSON ({e})"
+            else:
+                reason = "not a JSON object"
+            if not isinstance(record, dict):
+                skipped.append((number, reason))
+                out.append(line if line.endswith("\n") else line + "\n")
+                continue
+            for function, field, _ in columns:
+                record[f"{field}_{function}"] = _apply(function, record.get(field), reference)
+            out.append(json.dumps(record, ensure_ascii=False) + "\n")
+    else:
+        for row in chunk:
+            extra = [_apply(function, row[index] if index < len(row) else None, reference)
+                     for function, _, index in columns]
+            out.append(row + ["" if v is None else v for v in extra])
+    return out, skipped
+
+
+def _chunks(iterable, size):
+    """Yield lists of up to `size` items."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _ordered_map(fn, jobs, workers):
+    """
+    Map fn over jobs, yielding results in input order.
+
+    With workers > 1 the jobs run in a process pool with at most
+    2 * workers chunks in flight, so memory stays bounded.
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield fn(job)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for job in jobs:
+            pending.append(executor.submit(fn, job))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _parse_reference(value):
+    """Reference time from the command line: Unix seconds or ISO 8601."""
+    if value is None:
+        return time.time()
+    return whenwords._normalize_timestamp(_coerce(value))
+
+
+def _detect_format(path):
+    if path and path.lower().endswith('.csv'):
+        return 'csv'
+    return 'ndjson'
+
+
+def _requested_columns(args):
+    columns = []
+    for function, fields in (('timeago', args.timeago), ('human_date', args.human_date),
+                             ('duration', args.duration)):
+        for field in fields:
+            columns.append((function, field))
+    return columns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m whenwords',
+        description='Add whenwords columns to NDJSON or CSV records')
+    parser.add_argument('input', nargs='?',
+                        help='Input file (default: stdin)')
+    parser.add_argument('-o', '--output',
+                        help='Output file (default: stdout)')
+    parser.add_argument('--format', choices=['ndjson', 'csv'],
+                        help='Record format (default: from the input extension, else ndjson)')
+    parser.add_argument('--timeago', action='append', default=[], metavar='FIELD',
+                        help='Add FIELD_timeago (repeatable)')
+    parser.add_argument('--human-date', action='append', default=[], metavar='FIELD',
+                        help='Add FIELD_human_date (repeatable)')
+    parser.add_argument('--duration', action='append', default=[], metavar='FIELD',
+                        help='Add FIELD_duration (repeatable)')
+    parser.add_argument('--reference',
+                        help='Fixed reference time, Unix seconds or ISO 8601 (default: now)')
+    parser.add_argument('--chunk-size', type=int, default=10000,
+                        help='Records per chunk (default: 10000)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes (default: 1, no pool)')
+    args = parser.parse_args(argv)
+
+    requested = _requested_columns(args)
+    if not requested:
+        parser.error('nothing to do: pass at least one of --timeago, --human-date, --duration')
+    if args.chunk_size < 1:
+        parser.error('--chunk-size must be at least 1')
+    try:
+        reference = _parse_reference(args.reference)
+    except ValueError as e:
+        parser.error(str(e))
+
+    fmt = args.format or _detect_format(args.input)
+    src = open(args.input, 'r', encoding='utf-8', newline='') if args.input else sys.stdin
+    dst = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+
+    start = time.perf_counter()
+    rows = 0
+    try:
+        if fmt == 'ndjson':
+            columns = [(function, field, None) for function, field in requested]
+            records = ((number, line) for number, line in enumerate(src, 1) if line.strip())
+            writer = dst.writelines
+        else:
+            reader = csv.reader(src)
+            header = next(reader, None)
+            if header is None:
+                return 0
+            missing = [field for _, field in requested if field not in header]
+            if missing:
+                print(f"Error: missing CSV columns: {', '.join(missing)}", file=sys.stderr)
+                return 1
+            columns = [(function, field, header.index(field)) for function, field in requested]
+            csv_writer = csv.writer(dst)
+            csv_writer.writerow(header + [f"{field}_{function}" for function, field, _ in columns])
+            records = reader
+            writer = csv_writer.writerows
+
+        jobs = ((fmt, chunk, columns, reference) for chunk in _chunks(records, args.chunk_size))
+        for out, skipped in _ordered_map(_enrich_chunk, jobs, args.workers):
+            writer(out)
+            rows += len(out)
+            for number, reason in skipped:
+                print(f"Warning: line {number}: {reason}, passed through unchanged", file=sys.stderr)
+        dst.flush()
+    finally:
+        if args.input:
+            src.close()
+        if args.output:
+            dst.close()
+
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed if elapsed > 0 else float('inf')
+    print(f"Processed {rows:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())